@@ -3,6 +3,12 @@ import collections
 
 import os
 import copy
+import time
+import pickle
+import weakref
+import threading
+import contextlib
+import concurrent.futures
 
 import re
 from pathlib import Path, PurePath, PureWindowsPath
@@ -11,8 +17,18 @@ from collections.abc import Sequence, Container
 
 # from .file_management import FileManager, FileNameAnalyzer, serialize_to_file, open_in_explorer
 from .configs import *
+from .buid import *
 from .parser import *
 from .file_management import *
+from .snapshot import *
+from .snapshot import mtime_is_trusted, SNAPSHOT_DIR
+from .index import *
+from .query import *
+from .name_index import *
+from .walker import *
+from .watcher import *
+from .reservation import *
+from .codec import *
 
 # from .tools import *
 # Naming conventions: https://swift.org/documentation/api-design-guidelines/#strive-for-fluent-usage
@@ -22,12 +38,23 @@ __all__ = [
     'BarelyDBConfig',
     'BarelyDBSystemConfig',
     'BarelyDBEntity',
+    'BUID',
     'FileManager',
     'FileNameAnalyzer',
     'serialize_to_file',
     'open_in_explorer',
     'ClassFileSerializer',
     'cattr_json_serialize',
+    'EntityIndexSnapshot',
+    'EntityPathIndex',
+    'ComponentPathIndex',
+    'EntityNameIndex',
+    'BUIDReservation',
+    'BUIDCodec',
+    'ScandirWalker',
+    'PathlibWalker',
+    'MemoryWalker',
+    'BarelyDBWatcher',
 ]
 
 # create logger
@@ -45,13 +72,23 @@ def _reload_module():
     importlib.reload(current_module)
 
 
+# number of directory entries per is_dir task in parallel scans
+SCAN_CHUNK_SIZE = 64
+
+# When cached component paths are reloaded by get_component_paths:
+# 'always': on every call, 'ttl': when older than component_cache_ttl seconds,
+# 'mtime': when the mtime of the entity folder changed, 'never': only once.
+COMPONENT_CACHE_POLICIES = ['always', 'ttl', 'mtime', 'never']
+DEFAULT_COMPONENT_CACHE_TTL = 60.0
+
+
 class BarelyDB(object):
     config = None
     base_path = None
 
-    auto_reload_components = None
-
-    buid_type_paths = {}
+    component_cache_policy = None
+    component_cache_ttl = None
+    buid_cache_size = None
 
     path_converter = Path
     long_windows_path_limit = None
@@ -67,12 +104,18 @@ class BarelyDB(object):
         auto_reload_components=True,
         path_converter=Path,
         long_windows_path_limit=150,
+        index_snapshot_file=None,
+        walker=None,
+        component_cache_policy=None,
+        component_cache_ttl=None,
+        buid_cache_size=None,
     ):
 
         self.logger = module_logger
 
         self.long_windows_path_limit = long_windows_path_limit
         self.path_converter = path_converter
+        self.walker = ScandirWalker() if walker is None else walker
 
         # if base path is None, check default base path for existance and
         # break at first existing path
@@ -94,26 +137,175 @@ class BarelyDB(object):
         if path_depth:
             self.logger.warning('Deprecated: path_depth in constructor is deprecated!')
 
-        self.auto_reload_components = auto_reload_components
+        # component_cache_policy overrides auto_reload_components (True: 'always', False: 'never')
+        if component_cache_policy is None:
+            component_cache_policy = self.config.component_cache_policy
+        if component_cache_policy is None:
+            component_cache_policy = 'always' if auto_reload_components else 'never'
+
+        if component_cache_ttl is None:
+            component_cache_ttl = self.config.component_cache_ttl
+        if component_cache_ttl is None:
+            component_cache_ttl = DEFAULT_COMPONENT_CACHE_TTL
+
+        self.component_cache_policy = component_cache_policy
+        self.component_cache_ttl = component_cache_ttl
+        self._component_cache_info = {}
+
+        # opt-in LRU cache of the BUID parsers, BUIDs are often normalized several times in a row
+        self.buid_cache_size = buid_cache_size
 
         self.base_path = Path(base_path)
         self.base_path = self.base_path.absolute().resolve()
 
-        self.entity_paths = {}
+        self._entity_paths = EntityPathIndex(self.base_path)
         self.entity_properties = {}
-        self.component_paths = {}
+        self.component_paths = ComponentPathIndex(self._indexed_entity_path)
+        self._buid_type_paths = {}
+
+        if index_snapshot_file is None:
+            index_snapshot_file = self.config.index_snapshot_file
+
+        if index_snapshot_file is not None:
+            index_snapshot_file = self._snapshot_location(self.base_path.joinpath(index_snapshot_file))
+        self.index_snapshot_file = index_snapshot_file
+        self._scan_records = {}
+        self._duplicate_buid_count = collections.Counter()
+        self._duplicate_buid = []
+
+        # lazy loading: scan directories that were listed but not scanned yet, key -> (path, mtime_ns, hint)
+        self._lazy = False
+        self._pending_scan_dirs = {}
+        self._scan_dir_order = []
+        self._name_index = EntityNameIndex()
+        self._name_index_pickle = None
+
+        self._init_runtime()
+        self.register_error_handler(None)
+
+    def _init_runtime(self):
+        """ Creates the parts that are not pickled (parsers, locks and caches). """
+        self.logger = module_logger
+        self.component_cache_stats = collections.defaultdict(collections.Counter)
+        self._watcher = None
+
+        # serializes the writers (scans and creation). Readers do not lock, the
+        # indexes are never modified in place but copied and swapped in whole.
+        self._load_lock = threading.RLock()
 
         self._MyBUIDParser = GenericBUIDParser.create_class(self.config.buid_types)
 
+        cache_size = self.buid_cache_size
         self.buid_normalizer = self.BUIDParser(
-            ignore_unknown=True, mode='unique', warn_empty=True, allow_components=False
+            ignore_unknown=True, mode='unique', warn_empty=True, allow_components=False, cache_size=cache_size
         )
 
-        self.buid_scan = self.BUIDParser(ignore_unknown=True, mode='first', warn_empty=False, allow_components=False)
+        self.buid_scan = self.BUIDParser(
+            ignore_unknown=True, mode='first', warn_empty=False, allow_components=False, cache_size=cache_size
+        )
+
+        self.buid_entity_parser = self.BUIDParser(
+            ignore_unknown=False, mode='first', warn_empty=True, allow_components=False, cache_size=cache_size
+        )
+        self._entity_cache = weakref.WeakValueDictionary()
+        self._query_index = None
+        self._free_id_index = None
 
         self.known_bases = self.config.known_bases
+
+    # attributes that are recreated by _init_runtime after unpickling
+    _RUNTIME_ATTRIBUTES = (
+        'logger',
+        'component_cache_stats',
+        '_watcher',
+        '_load_lock',
+        '_MyBUIDParser',
+        'buid_normalizer',
+        'buid_scan',
+        'buid_entity_parser',
+        '_entity_cache',
+        '_query_index',
+        '_free_id_index',
+        '_known_bases',
+        'known_bases_re',
+        '_error_handler',
+    )
+
+    def __getstate__(self):
+        """ Compact state for pickling: config, settings and the index, without filesystem access.
+
+        Parsers, locks, caches and the watcher are recreated on unpickling,
+        the error handler has to be registered again. Cached components are
+        kept, their timestamps only for the mtime cache policy.
+        """
+        with self._load_lock:
+            state = {key: value for key, value in self.__dict__.items() if key not in self._RUNTIME_ATTRIBUTES}
+
+            # readers and the watcher change the component cache without the lock, it is copied at once
+            state['component_paths'] = self.component_paths.all_names()
+            state['_component_cache_info'] = dict(self._component_cache_info)
+
+        # duplicates are counted again from the scan records
+        del state['_duplicate_buid_count']
+
+        # the name index is only unpickled when it is used
+        if state['_name_index'] is not None:
+            state['_name_index_pickle'] = pickle.dumps(state['_name_index'], protocol=pickle.HIGHEST_PROTOCOL)
+            state['_name_index'] = None
+
+        state['_component_cache_info'] = {
+            buid: (None, mtime_ns) for buid, (_, mtime_ns) in state['_component_cache_info'].items()
+        }
+        return state
+
+    def __setstate__(self, state):
+        state = dict(state)
+        component_names = state.pop('component_paths')
+        self.__dict__.update(state)
+
+        self._duplicate_buid_count = collections.Counter(
+            buid for record in self._scan_records.values() for buid, _ in record.entities
+        )
+        self.component_paths = ComponentPathIndex(self._indexed_entity_path)
+        self.component_paths.update_names(component_names)
+
+        self._init_runtime()
         self.register_error_handler(None)
 
+    @property
+    def name_index(self):
+        name_index = self._name_index
+        if name_index is None:
+            with self._load_lock:
+                if self._name_index is None:
+                    self._name_index = pickle.loads(self._name_index_pickle)
+                    self._name_index_pickle = None
+                name_index = self._name_index
+        return name_index
+
+    @name_index.setter
+    def name_index(self, value):
+        self._name_index = value
+        self._name_index_pickle = None
+
+    @property
+    def component_cache_policy(self):
+        return self._component_cache_policy
+
+    @component_cache_policy.setter
+    def component_cache_policy(self, value):
+        if value not in COMPONENT_CACHE_POLICIES:
+            raise ValueError(f'Unknown component cache policy {value}! Use one of {COMPONENT_CACHE_POLICIES}.')
+        self._component_cache_policy = value
+
+    @property
+    def auto_reload_components(self):
+        return self.component_cache_policy == 'always'
+
+    @auto_reload_components.setter
+    def auto_reload_components(self, value):
+        self.component_cache_policy = 'always' if value else 'never'
+
     def register_error_handler(self, error_handler):
         self._error_handler = error_handler
 
@@ -162,15 +354,61 @@ class BarelyDB(object):
         return self.get_entity(buid)
 
     def get_entity(self, buid):
-        return BarelyDBEntity(buid, self)
+        return self._get_entity_handle(BarelyDBEntity, buid)
+
+    def _get_entity_handle(self, cls, buid, component=None):
+        """ Returns the cached handle of class cls for buid (and component), creating it if needed.
+
+        Handles only hold the identity of an entity, all data is looked up in
+        the database, so they can be shared as long as anybody uses them.
+        """
+        buid, buid_component = self.buid_entity_parser.parse_with_component(buid)
+        if component is None:
+            component = buid_component
+
+        if buid is None:
+            return cls._from_parsed(self, buid, component)
+
+        self._ensure_buid_loaded(buid)
+
+        key = (cls, buid, component)
+        entity = self._entity_cache.get(key, None)
+        if entity is None:
+            entity = cls._from_parsed(self, buid, component)
+            entity = self._entity_cache.setdefault(key, entity)
+
+        return entity
 
     def __contains__(self, buid):
         buid = self.buid_normalizer(buid)
-        return buid in self.entity_paths
+        self._ensure_buid_loaded(buid)
+        return buid in self._entity_paths
 
     @property
     def entities(self):
-        return list(self.entity_paths.keys())
+        self._ensure_all_loaded()
+        return list(self._entity_paths.keys())
+
+    @property
+    def entity_paths(self):
+        self._ensure_all_loaded()
+        return self._entity_paths
+
+    @entity_paths.setter
+    def entity_paths(self, value):
+        self._entity_paths = value if isinstance(value, EntityPathIndex) else EntityPathIndex(self.base_path, value)
+
+    def _indexed_entity_path(self, buid):
+        return self._entity_paths[buid]
+
+    @property
+    def buid_type_paths(self):
+        self._ensure_all_loaded()
+        return self._buid_type_paths
+
+    @buid_type_paths.setter
+    def buid_type_paths(self, value):
+        self._buid_type_paths = value
 
     def resolved_file(self, filename):
         base_path_str = f'{str(self.base_path)}{os.sep}'
@@ -219,39 +457,385 @@ class BarelyDB(object):
         return str(file_abs_recover)
 
     @staticmethod
-    def iter_subdir(path, depth=0):
+    def iter_subdir(path, depth=0, walker=None):
+        if walker is None:
+            walker = ScandirWalker()
+
         def _iter_subdir(path, depth=0):
-            for sub in path.iterdir():
-                if sub.is_dir():
+            for sub in walker.scandir(path):
+                if sub.is_dir if sub.is_dir is not None else walker.is_dir(sub.path):
                     if depth == 0:
-                        yield sub
+                        yield Path(sub.path)
                     else:
-                        for sub in _iter_subdir(sub, depth - 1):
+                        for sub in _iter_subdir(sub.path, depth - 1):
                             yield sub
 
-        return _iter_subdir(path, depth=depth)
+        return _iter_subdir(str(path), depth=depth)
+
+    @staticmethod
+    def _map(func, items, executor=None):
+        if executor is None:
+            return [func(item) for item in items]
+        else:
+            return list(executor.map(func, items))
+
+    def _list_subdirs(self, paths, executor=None):
+        """ Lists the subdirectories of each path in paths (as WalkEntry).
+
+        With an executor, the directory listings (and the is_dir checks for
+        walkers that do not know the entry type) are issued concurrently. The
+        result is the same as for a sequential scan.
+        """
+        listings = self._map(self.walker.scandir, paths, executor)
+
+        unknown = [entry.path for listing in listings for entry in listing if entry.is_dir is None]
+        if unknown:
+            chunks = [unknown[i : i + SCAN_CHUNK_SIZE] for i in range(0, len(unknown), SCAN_CHUNK_SIZE)]
+            chunks_is_dir = self._map(lambda chunk: [self.walker.is_dir(p) for p in chunk], chunks, executor)
+            unknown_is_dir = dict(zip(unknown, (flag for flags in chunks_is_dir for flag in flags)))
+        else:
+            unknown_is_dir = {}
+
+        def is_dir(entry):
+            return entry.is_dir if entry.is_dir is not None else unknown_is_dir[entry.path]
+
+        return [[entry for entry in listing if is_dir(entry)] for listing in listings]
+
+    def _list_scan_dirs(self, executor=None):
+        """ Returns the directories that directly contain entity folders (e.g. type directories). """
+        scan_dirs = [str(self.base_path)]
+        for _ in range(self.path_depth):
+            scan_dirs = [sub.path for subdirs in self._list_subdirs(scan_dirs, executor) for sub in subdirs]
 
-    def load_entities(self, verbose=True):
-        # candidates = [x.relative_to(self.base_path) for x in self.base_path.iterdir() if x.is_dir()]
+        return scan_dirs
 
-        # candidates = [x for x in self.base_path.iterdir() if x.is_dir()]
-        candidates = self.iter_subdir(self.base_path, depth=self.path_depth)
+    def _scan_dir_key(self, scan_dir):
+        return Path(scan_dir).relative_to(self.base_path).as_posix()
+
+    def _scan_entity_dirs(self, scan_dirs, mtimes, scanned_ns, executor=None):
         buid_p = self.buid_scan
+        records = []
+
+        for mtime_ns, candidates in zip(mtimes, self._list_subdirs(scan_dirs, executor)):
+            candidates_buid = zip(buid_p.parse_many(c.path for c in candidates), (c.name for c in candidates))
+            entities = [(buid, name) for buid, name in candidates_buid if buid is not None]
+            records.append(ScanDirRecord(mtime_ns=mtime_ns, scanned_ns=scanned_ns, entities=entities))
+
+        return records
+
+    @staticmethod
+    def _scan_executor(workers):
+        if workers is not None and workers > 1:
+            return concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+        else:
+            return contextlib.nullcontext()
+
+    def load_entities(self, verbose=True, use_snapshot=True, workers=None, with_components=False, lazy=False):
+        """ Scans the database for entities.
+
+        If an index snapshot file is configured, the snapshot is loaded first
+        and only scan directories whose mtime changed since the snapshot are
+        scanned again. The updated snapshot is written back afterwards.
+
+        With workers > 1, the directory levels are listed concurrently by a
+        thread pool, which helps on filesystems with a high latency per call.
+
+        With with_components=True, the component folders of all entities are
+        listed in the same pass and component_paths is filled for every entity.
+
+        With lazy=True, only the directory levels above the entity folders are
+        listed. A scan directory (e.g. a type directory) is scanned the first
+        time an entity of a type in it is accessed (db[buid], buid in db,
+        get_entity_path). Directories that are current in the index snapshot
+        do not need a scan at all. entities, entity_paths and buid_type_paths
+        scan all remaining directories. Lazy loading assumes that all entities
+        of a type live in a single directory.
+        """
+        snapshot = self._load_index_snapshot() if use_snapshot else None
+        previous_records = snapshot.scan_dirs if snapshot is not None else {}
+
+        with self._load_lock, self._scan_executor(workers) as executor:
+            self._lazy = lazy
+            self._scan_records = {}
+            self._pending_scan_dirs = {}
+            rescanned = self._update_index(previous_records, verbose=verbose, executor=executor)
+
+            if with_components:
+                self._load_all_components(self._entity_paths.keys(), executor=executor, replace=True)
+
+        if snapshot is not None:
+            self.logger.info(
+                f'Index snapshot used, rescanned {len(rescanned)} of {len(self._scan_dir_order)} directories'
+            )
+
+        if lazy:
+            self.logger.info(f'Lazy loading, {len(self._pending_scan_dirs)} directories not scanned yet')
+
+        snapshot_outdated = snapshot is None or rescanned or (previous_records.keys() != set(self._scan_dir_order))
+        if self.index_snapshot_file is not None and snapshot_outdated:
+            self.save_index_snapshot()
+
+    def refresh(self, verbose=False, workers=None, with_components=False):
+        """ Updates the index incrementally and returns the changes (RefreshResult).
+
+        Only scan directories whose mtime changed since the last scan are
+        listed again. Cached component paths of removed or moved entities
+        are dropped, with with_components=True the components of added and
+        moved entities are listed right away.
+
+        After load_entities(lazy=True), only directories that were scanned
+        already are rescanned, the others remain pending.
+        """
+        with self._load_lock:
+            previous_records = self._scan_records
+            previous_keys = set(self._scan_dir_order)
+            previous_paths = self._entity_paths
+
+            with self._scan_executor(workers) as executor:
+                rescanned = self._update_index(previous_records, verbose=verbose, executor=executor)
+
+            entity_paths = self._entity_paths
+            result = RefreshResult(
+                added=[buid for buid in entity_paths if buid not in previous_paths],
+                removed=[buid for buid in previous_paths if buid not in entity_paths],
+                moved=[
+                    buid
+                    for buid in entity_paths
+                    if buid in previous_paths and previous_paths.location(buid) != entity_paths.location(buid)
+                ],
+                rescanned=rescanned,
+            )
+
+            # the cached components are dropped by swapping in new dicts, readers may use the old ones
+            dropped = set(result.removed + result.moved)
+            self.component_paths.discard(dropped)
+            self._component_cache_info = {
+                buid: info for buid, info in dict(self._component_cache_info).items() if buid not in dropped
+            }
+
+        if with_components:
+            with self._scan_executor(workers) as executor:
+                self._load_all_components(result.added + result.moved, executor=executor)
+
+        if result:
+            self.logger.info(
+                f'Refresh: {len(result.added)} added, {len(result.removed)} removed, {len(result.moved)} moved'
+            )
+
+        index_changed = rescanned or (previous_keys != set(self._scan_dir_order))
+        if self.index_snapshot_file is not None and index_changed:
+            self.save_index_snapshot()
+
+        return result
+
+    def _update_index(self, previous_records, verbose=True, executor=None):
+        """ Scans all scan directories that changed compared to previous_records and applies the result.
+
+        In lazy mode, changed directories that were not scanned before are
+        only marked as pending (with the outdated record as hint).
+        """
+        scan_dirs = self._list_scan_dirs(executor)
+        keys = [self._scan_dir_key(scan_dir) for scan_dir in scan_dirs]
+
+        scanned_ns = time.time_ns()
+        mtimes = self._map(self.walker.mtime_ns, scan_dirs, executor)
+
+        scan_records = {}
+        rescan = []
+        pending = {}
+        for key, scan_dir, mtime_ns in zip(keys, scan_dirs, mtimes):
+            record = previous_records.get(key, None)
+            if record is not None and record.is_current(mtime_ns):
+                scan_records[key] = record
+            elif self._lazy and key not in self._scan_records:
+                hint = record if record is not None else self._pending_scan_dirs.get(key, (None, None, None))[2]
+                pending[key] = (scan_dir, mtime_ns, hint)
+            else:
+                rescan.append((key, scan_dir, mtime_ns))
+                scan_records[key] = record
+
+        unchanged = (
+            not rescan
+            and previous_records is self._scan_records
+            and keys == self._scan_dir_order
+            and scan_records.keys() == previous_records.keys()
+        )
+        if unchanged:
+            # keep the current indexes, such that their versions and caches stay valid
+            self._pending_scan_dirs = pending
+            return []
+
+        if rescan:
+            rescan_keys, rescan_dirs, rescan_mtimes = zip(*rescan)
+            records = self._scan_entity_dirs(rescan_dirs, rescan_mtimes, scanned_ns, executor)
+            scan_records.update(zip(rescan_keys, records))
+
+        self._scan_dir_order = keys
+        self._apply_scan_records(scan_records, verbose=verbose)
+        self._pending_scan_dirs = pending
+
+        return [key for key, scan_dir, mtime_ns in rescan]
+
+    def _apply_scan_records(self, scan_records, verbose=True):
+        entity_paths = EntityPathIndex(self.base_path)
+        found_buids = []
+        for key, record in scan_records.items():
+            for buid, name in record.entities:
+                found_buids.append(buid)
+                entity_paths.add(buid, key, name)
 
-        candidates_buid = [(buid_p(c), c) for c in candidates]
-        found_buids = [buid for buid, path in candidates_buid if buid is not None]
         self._duplicate_buid_count = collections.Counter(found_buids)
         self._duplicate_buid = [item for item, count in self._duplicate_buid_count.items() if item and count > 1]
 
-        self.entity_paths = {buid: path for buid, path in candidates_buid if buid is not None}
-        self.logger.info(f'Entities found: {len(self.entity_paths)}')
+        name_index = self.name_index.copy()
+        name_index.update((buid, entity_paths.location(buid)[1]) for buid in entity_paths)
+
+        # the new index is complete before it is swapped in, readers never see a partial scan
+        self._scan_records = scan_records
+        self._entity_paths = entity_paths
+        self.name_index = name_index
+        self.component_paths.clear_resolved()
+        self.logger.info(f'Entities found: {len(self._entity_paths)}')
 
         self.check_for_duplicates(verbose=verbose)
         self.refresh_buid_type_paths(verbose=verbose)
 
+    def _ensure_buid_loaded(self, buid):
+        if self._pending_scan_dirs:
+            buid = self.buid_normalizer(buid)
+            if buid is not None:
+                self._ensure_type_loaded(self.buid_normalizer.parse_type(buid))
+
+    def _ensure_type_loaded(self, buid_type):
+        """ Scans pending scan directories until entities of buid_type are found (lazy loading).
+
+        The directories that likely hold the type are scanned together, such
+        that all entities of the type are known afterwards (e.g. to find free
+        ids), the others only if the type was not found in them.
+        """
+        if not self._pending_scan_dirs or buid_type in self._buid_type_paths:
+            return
+
+        with self._load_lock:
+            for keys in self._lazy_scan_groups(buid_type):
+                if buid_type in self._buid_type_paths:
+                    break
+                self._scan_pending_dirs(keys)
+
+    def _ensure_all_loaded(self):
+        if not self._pending_scan_dirs:
+            return
+
+        with self._load_lock:
+            self._scan_pending_dirs(list(self._pending_scan_dirs.keys()))
+
+    def _lazy_scan_groups(self, buid_type):
+        """ Groups the pending scan directories by the likelihood to contain entities of buid_type.
+
+        Directories that contained the type according to the (outdated) index
+        snapshot and directories whose name resembles the name of the type in
+        the config form the first group, all others the second.
+        """
+        names = [name.lower() for name, t in self.buid_types.items() if t == buid_type]
+
+        def name_matches(key):
+            dir_name = key.rsplit('/', 1)[-1].lower()
+            return any(len(os.path.commonprefix([dir_name, name])) >= min(4, len(name)) for name in names)
+
+        def hint_matches(hint):
+            return hint is not None and any(self.buid_scan.parse_type(buid) == buid_type for buid, _ in hint.entities)
+
+        pending = list(self._pending_scan_dirs.items())
+        by_hint = [key for key, (_, _, hint) in pending if hint_matches(hint)]
+        by_name = [key for key, _ in pending if key not in by_hint and name_matches(key)]
+        others = [key for key, _ in pending if key not in by_hint and key not in by_name]
+        return [keys for keys in (by_hint + by_name, others) if keys]
+
+    def _scan_pending_dirs(self, keys):
+        keys = [key for key in keys if key in self._pending_scan_dirs]
+        if not keys:
+            return
+
+        scanned_ns = time.time_ns()
+        scan_dirs = [self._pending_scan_dirs[key][0] for key in keys]
+        mtimes = [self._pending_scan_dirs[key][1] for key in keys]
+        records = self._scan_entity_dirs(scan_dirs, mtimes, scanned_ns)
+
+        order = {key: i for i, key in enumerate(self._scan_dir_order)}
+        scan_records = dict(self._scan_records)
+        scan_records.update(zip(keys, records))
+        scan_records = dict(sorted(scan_records.items(), key=lambda item: order.get(item[0], len(order))))
+        self._apply_scan_records(scan_records, verbose=False)
+
+        # entities are in the index before the directories stop being pending
+        self._pending_scan_dirs = {
+            key: pending for key, pending in self._pending_scan_dirs.items() if key not in scan_records
+        }
+        self.logger.debug(f'Lazily scanned {keys}')
+
+    def _load_index_snapshot(self):
+        if self.index_snapshot_file is None:
+            return None
+
+        try:
+            snapshot = EntityIndexSnapshot.load(self.index_snapshot_file)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            self.logger.warning(f'Index snapshot {self.index_snapshot_file} is corrupt, using full scan! ({e!r})')
+            return None
+
+        if not snapshot.is_compatible(self.path_depth, self.buid_types):
+            self.logger.warning(f'Index snapshot {self.index_snapshot_file} is stale, using full scan!')
+            return None
+
+        return snapshot
+
+    def _snapshot_location(self, filename):
+        """ Moves a snapshot file that would be written into a scan directory to a subfolder of it.
+
+        Writing the file changes the mtime of its directory, a snapshot in a
+        scan directory (e.g. the base path for path_depth = 0) would make the
+        next start scan that directory again.
+        """
+        try:
+            depth = len(filename.parent.relative_to(self.base_path).parts)
+        except ValueError:
+            return filename
+
+        if depth == self.path_depth:
+            return filename.parent.joinpath(SNAPSHOT_DIR, filename.name)
+        return filename
+
+    def make_index_snapshot(self):
+        return EntityIndexSnapshot(
+            path_depth=self.path_depth,
+            buid_types=dict(self.buid_types),
+            scan_dirs={
+                **{key: hint for key, (_, _, hint) in self._pending_scan_dirs.items() if hint is not None},
+                **self._scan_records,
+            },
+        )
+
+    def save_index_snapshot(self, filename=None):
+        if filename is None:
+            filename = self.index_snapshot_file
+
+        if filename is None:
+            raise ValueError('No index snapshot file configured!')
+
+        with self._load_lock:
+            snapshot = self.make_index_snapshot()
+
+        try:
+            Path(filename).parent.mkdir(parents=True, exist_ok=True)
+            snapshot.save(filename)
+        except OSError as e:
+            self.logger.warning(f'Could not write index snapshot {filename}! ({e!r})')
+
     def check_for_duplicates(self, verbose=True):
         # Check for duplicates
-        # found_buid = self.entity_paths.keys()
+        # found_buid = self._entity_paths.keys()
         duplicate_buid = self._duplicate_buid
 
         if duplicate_buid:
@@ -261,20 +845,21 @@ class BarelyDB(object):
 
     def refresh_buid_type_paths(self, verbose=True):
         # Scan all paths and determine target directories for each buid type!
-        self.buid_type_paths = {}
+        buid_type_paths = {}
 
         buid_types_done = set()
         buid_p = self.buid_scan
 
-        for buid, entity_path in self.entity_paths.items():
+        entity_paths = self._entity_paths
+        for buid in entity_paths:
             buid_type = buid_p.parse_type(buid)
 
             if buid_type in buid_types_done:
                 pass
             else:
-                if buid_type in self.buid_type_paths:
+                if buid_type in buid_type_paths:
                     # if this type was already registered, check if parent path is the same
-                    if self.buid_type_paths[buid_type] == entity_path.parent:
+                    if buid_type_paths[buid_type] == entity_paths.parent(buid):
                         pass
                     else:
                         module_logger.warning(
@@ -283,33 +868,72 @@ class BarelyDB(object):
                         buid_types_done.add(buid_type)
                 else:
                     # if this is the first entity of this type use the parent directory
-                    self.buid_type_paths[buid_type] = entity_path.parent
+                    buid_type_paths[buid_type] = entity_paths.parent(buid)
+
+        self._buid_type_paths = buid_type_paths
 
         if verbose:
-            for buid_type, buid_path in self.buid_type_paths.items():
+            for buid_type, buid_path in buid_type_paths.items():
                 self.logger.info(f'{buid_type} --> {buid_path}')
 
+    def _parse_components(self, base_buid, candidates):
+        def component_parser(component_name):
+            return self.buid_scan.parse_component(base_buid + component_name)
+
+        candidates_components = [(component_parser(c.name), c.name) for c in candidates]
+        return [(component, name) for component, name in candidates_components if component is not None]
+
+    @staticmethod
+    def _trusted_mtime(mtime_ns):
+        # like the scan records, a listing in the same (coarse) tick as the last change is not trusted
+        if mtime_ns is None or not mtime_is_trusted(mtime_ns, time.time_ns()):
+            return None
+        return mtime_ns
+
     def load_components(self, buid):
         entity_path = self.get_entity_path(buid)
         base_buid = self.buid_normalizer(buid)
 
-        candidates = self.iter_subdir(entity_path, depth=0)
+        loaded = time.monotonic()
+        mtime_ns = self.walker.mtime_ns(str(entity_path)) if self.component_cache_policy == 'mtime' else None
+        mtime_ns = self._trusted_mtime(mtime_ns)
 
-        def component_parser(component_path):
-            return self.buid_scan.parse_component(base_buid + component_path.name)
+        (candidates,) = self._list_subdirs([str(entity_path)])
+        self.component_paths.set_names(base_buid, self._parse_components(base_buid, candidates))
+        self._component_cache_info[base_buid] = (loaded, mtime_ns)
 
-        candidates_components = [(component_parser(c), c) for c in candidates]
-        component_paths = {component: path for component, path in candidates_components if component is not None}
+        # self.logger.debug(f'Components for {base_buid} found: {len(component_paths)}')
 
-        self.component_paths[base_buid] = component_paths
+    def _load_all_components(self, buids, executor=None, replace=False):
+        """ Lists the component folders of many entities at once (concurrently with an executor).
 
-        # self.logger.debug(f'Components for {base_buid} found: {len(component_paths)}')
+        The cached components are updated in one swap, with replace=True the
+        components of all other entities are dropped.
+        """
+        entity_paths = self._entity_paths
+        buids = [buid for buid in buids if buid in entity_paths]
+        entity_dirs = [str(entity_paths[buid]) for buid in buids]
+
+        loaded = time.monotonic()
+        if self.component_cache_policy == 'mtime':
+            mtimes = self._map(self.walker.mtime_ns, entity_dirs, executor)
+            mtimes = [self._trusted_mtime(mtime_ns) for mtime_ns in mtimes]
+        else:
+            mtimes = [None] * len(buids)
+
+        component_names = {}
+        component_cache_info = {} if replace else dict(self._component_cache_info)
+        for buid, mtime_ns, candidates in zip(buids, mtimes, self._list_subdirs(entity_dirs, executor)):
+            component_names[buid] = self._parse_components(buid, candidates)
+            component_cache_info[buid] = (loaded, mtime_ns)
+
+        self.component_paths.update_names(component_names, replace=replace)
+        self._component_cache_info = component_cache_info
 
     def get_entity_path(self, buid):
         buid = self.buid_normalizer(buid)
-        path = self.entity_paths[buid]
-        path = path.absolute().resolve()
-        return path
+        self._ensure_buid_loaded(buid)
+        return self._entity_paths.resolved(buid)
 
     @staticmethod
     def _extract_name_from_path(path, identifier):
@@ -324,14 +948,205 @@ class BarelyDB(object):
         path = self.get_entity_path(buid)
         return self._extract_name_from_path(path, buid)
 
-    def get_component_paths(self, buid):
-        buid = self.buid_normalizer(buid)
-        if self.auto_reload_components or (buid not in self.component_paths):
+    def get_query_index(self):
+        """ Returns the EntityQueryIndex of the current entity index (built on first use after a change). """
+        self._ensure_all_loaded()
+        entity_paths = self._entity_paths
+
+        query_index = self._query_index
+        if (
+            query_index is None
+            or query_index.entity_paths is not entity_paths
+            or query_index.version != entity_paths.version
+        ):
+            query_index = EntityQueryIndex(entity_paths)
+            self._query_index = query_index
+
+        return query_index
+
+    def _query_types(self, types):
+        if isinstance(types, str):
+            types = [types]
+        return [self.buid_types.get(t, t.upper()) for t in types]
+
+    def _query_range_bound(self, bound):
+        if bound is None or isinstance(bound, int):
+            return None, bound
+
+        buid = self.buid_normalizer(bound)
+        if buid is None:
+            raise ValueError(f'Invalid BUID {bound} in buid_range!')
+        return split_buid(buid)
+
+    def query(
+        self, types=None, buid_range=None, name_regex=None, has_component=None, has_file=None, reload_components=False
+    ):
+        """ Selects entities and returns an iterator of entities, ordered by type and id.
+
+        types: BUID type or type name of the config ('WB' or 'web'), or a list of them.
+        buid_range: (first, last) as BUIDs or numeric ids, inclusive. BUIDs restrict the type as well.
+        name_regex: regular expression that is searched in the entity name.
+        has_component: component or list of components the entity must have.
+        has_file: glob that must match at least one file in the entity folder.
+        reload_components: check has_component against the folders as the component cache policy requires.
+
+        Types, ids and names are served from an in-memory index. Components
+        are taken from the component path cache, whatever its policy, and
+        only listed for entities that are not cached yet (see
+        load_entities(with_components=True)) or with reload_components=True.
+        has_file lists the entity folders that pass the other conditions.
+        """
+        index = self.get_query_index()
+
+        types = None if types is None else self._query_types(types)
+
+        id_range = None
+        if buid_range is not None:
+            (first_type, first), (last_type, last) = [self._query_range_bound(b) for b in buid_range]
+            range_types = {t for t in [first_type, last_type] if t is not None}
+            if len(range_types) > 1:
+                raise ValueError(f'buid_range spans several types ({buid_range})!')
+            if range_types:
+                types = list(range_types) if types is None else [t for t in types if t in range_types]
+            id_range = (first, last)
+
+        if isinstance(name_regex, str):
+            name_regex = re.compile(name_regex)
+
+        if isinstance(has_component, str):
+            has_component = [has_component]
+
+        def matches(buid):
+            if name_regex is not None and not name_regex.search(index.names[buid]):
+                return False
+
+            if has_component:
+                components = None if reload_components else self.component_paths.names(buid, None)
+                if components is None:
+                    self._ensure_components(buid)
+                    components = self.component_paths.names(buid, [])
+                if not all(any(c == component for c, _ in components) for component in has_component):
+                    return False
+
+            if has_file is not None and not self._get_files(buid, index.entity_paths[buid], has_file):
+                return False
+
+            return True
+
+        return (self.get_entity(buid) for buid in index.select(types, id_range) if matches(buid))
+
+    def to_records(self, with_components=False, workers=None):
+        """ Returns the entity index as columns {column: list}, one row per entity, ordered by type and id.
+
+        Columns: buid, type, id (numeric), name, path (as string, not resolved)
+        and components (tuple of the cached components, None if not cached).
+        The columns are built from the in-memory index without touching the
+        filesystem. With with_components=True, components that are not cached
+        yet are listed first (concurrently with workers > 1).
+        """
+        index = self.get_query_index()
+        entity_paths = index.entity_paths
+
+        if with_components:
+            missing = [buid for buid in entity_paths if buid not in self.component_paths]
+            with self._scan_executor(workers) as executor:
+                self._load_all_components(missing, executor)
+
+        component_names = self.component_paths.all_names()
+
+        columns = {column: [] for column in ['buid', 'type', 'id', 'name', 'path', 'components']}
+        dir_paths = {}
+        for buid_type in index.types:
+            buids = index.buids[buid_type]
+            columns['buid'].extend(buids)
+            columns['type'].extend([buid_type] * len(buids))
+            columns['id'].extend(index.ids[buid_type])
+
+            for buid in buids:
+                dir_key, folder_name = entity_paths.location(buid)
+                dir_path = dir_paths.get(dir_key, None)
+                if dir_path is None:
+                    dir_path = dir_paths[dir_key] = str(entity_paths.parent(buid))
+                columns['path'].append(os.path.join(dir_path, folder_name))
+                columns['name'].append(index.names[buid])
+
+                names = component_names.get(buid, None)
+                columns['components'].append(None if names is None else tuple(c for c, _ in names))
+
+        return columns
+
+    def to_table(self, backend=None, with_components=False, workers=None):
+        """ Returns the columns of to_records as a pandas DataFrame (if pandas is installed).
+
+        Without pandas, a dict of numpy arrays is returned, or the plain
+        column lists if numpy is not installed either. Use backend ('pandas',
+        'numpy' or 'lists') to choose explicitly (see columns_to_table).
+        """
+        return columns_to_table(self.to_records(with_components=with_components, workers=workers), backend=backend)
+
+    def get_buid_codec(self, type_codes=None):
+        """ Returns a BUIDCodec for the BUID types of the database, e.g. to join tables on int64 keys. """
+        return BUIDCodec(self.BUIDParser, type_codes=type_codes)
+
+    def find_entities(self, text, limit=10):
+        """ Returns up to limit entities whose folder name matches text best (see EntityNameIndex).
+
+        The lookup only uses the in-memory name index, which is kept current
+        by load_entities, refresh and the creation methods.
+        """
+        self._ensure_all_loaded()
+        return [self.get_entity(buid) for buid, score in self.name_index.search(text, limit)]
+
+    def start_watcher(self, mode='auto', interval=1.0):
+        """ Starts a background watcher that keeps entity and component paths current (see BarelyDBWatcher).
+
+        While the watcher runs, cached component paths are not reloaded on access.
+        """
+        if not self.watching:
+            self._watcher = BarelyDBWatcher(self, mode=mode, interval=interval).start()
+
+        return self._watcher
+
+    def stop_watcher(self):
+        if self._watcher is not None:
+            self._watcher.stop()
+            self._watcher = None
+
+    @property
+    def watching(self):
+        return self._watcher is not None and self._watcher.running
+
+    def _component_cache_valid(self, buid):
+        """ Checks if the cached component paths of buid can be used according to the cache policy. """
+        if buid not in self.component_paths:
+            return False
+
+        policy = self.component_cache_policy
+        if policy == 'never' or self.watching:
+            return True
+        elif policy == 'always':
+            return False
+
+        loaded, mtime_ns = self._component_cache_info.get(buid, (None, None))
+        if policy == 'ttl':
+            return loaded is not None and time.monotonic() - loaded < self.component_cache_ttl
+        else:
+            try:
+                return mtime_ns is not None and self.walker.mtime_ns(str(self._entity_paths[buid])) == mtime_ns
+            except FileNotFoundError:
+                return False
+
+    def _ensure_components(self, buid):
+        if self._component_cache_valid(buid):
+            self.component_cache_stats[self.component_cache_policy]['hits'] += 1
+        else:
+            self.component_cache_stats[self.component_cache_policy]['misses'] += 1
             self.load_components(buid)
 
-        paths = self.component_paths[buid]
-        paths = {comp: Path(path).absolute().resolve() for comp, path in paths.items()}
-        return paths
+    def get_component_paths(self, buid):
+        buid = self.buid_normalizer(buid)
+        self._ensure_components(buid)
+        return self.component_paths.resolved(buid)
 
     def get_component_path(self, buid, component):
         component_paths = self.get_component_paths(buid)
@@ -346,42 +1161,198 @@ class BarelyDB(object):
         return self._extract_name_from_path(path, '-' + component)
 
     def create_new_entity(self, *, name, after=None, buid=None, reload=True):
+        """ Creates a new entity folder and adds it to the index.
+
+        The index is updated without rescanning the database. The reload
+        parameter is kept for compatibility, use refresh() to pick up changes
+        made by others.
+        """
         if not buid and not after:
             raise ValueError('create_new_entity needs either after or buid parameter!')
 
-        if not buid:
-            buid = self._get_free_buid(after)[0]
+        # allocation and creation must not interleave with other writers
+        with self._load_lock:
+            if not buid:
+                buid = self.get_free_buids(after)[0]
 
-        self._create_entity_path(buid, name, reload=reload)
+            self._create_entity_path(buid, name, reload=reload)
 
         return self[buid]
 
-    def _get_free_buid(self, after, no_buids=1, no_free_biuds=None):
-        buid_p = self.BUIDParser()
+    def create_new_entities(self, entities, workers=None):
+        """ Creates several new entities (and their components) in one pass.
+
+        entities is a list of dicts with the keywords of create_new_entity
+        (name, after or buid) and optionally components = {component: name}.
+        BUIDs are allocated for all entities at once, each after gets the
+        first free BUIDs like repeated calls of create_new_entity. With
+        workers > 1, the folders are created concurrently by a thread pool.
+        The index is updated once all folders exist. Returns the entity
+        handles in the order of entities.
+        """
+        with self._load_lock:
+            buids = self._create_new_entities(entities, workers=workers)
+
+        return [self[buid] for buid in buids]
+
+    def _create_new_entities(self, entities, workers=None):
+        entities = [dict(entity) for entity in entities]
+
+        buids = [None] * len(entities)
+        for i, entity in enumerate(entities):
+            if entity.get('buid', None):
+                buids[i] = self.buid_normalizer(entity['buid'])
+            elif not entity.get('after', None):
+                raise ValueError('create_new_entities needs either after or buid for every entity!')
+
+        duplicates = [buid for buid, count in collections.Counter(filter(None, buids)).items() if count > 1]
+        if duplicates:
+            raise ValueError(f'BUIDs {duplicates} are given more than once!')
+
+        # all entities after the same BUID are allocated by a single lookup
+        by_after = collections.defaultdict(list)
+        for i, entity in enumerate(entities):
+            if buids[i] is None:
+                by_after[entity['after']].append(i)
+
+        after_buids = {}
+        for after in by_after:
+            buid, _ = self.buid_entity_parser.parse_with_component(after)
+            if buid is None:
+                raise ValueError(f'Invalid BUID {after}!')
+            after_buids[after] = buid
+
+        buid_types = {self.buid_normalizer.parse_type(buid) for buid in filter(None, buids)}
+        buid_types.update(split_buid(buid)[0] for buid in after_buids.values())
+        free_id_index = self._get_free_id_index(*buid_types).copy()
+        for buid in filter(None, buids):
+            free_id_index.add(buid)
+
+        for after, indices in by_after.items():
+            buid = after_buids[after]
+            buid_type, start = split_buid(buid)
+            free_ids = free_id_index.free_ids(buid_type, start, count=len(indices), contiguous=False)
+            if len(free_ids) < len(indices):
+                raise ValueError(f'Not enough free ids for {len(indices)} entities of type {buid_type} after {buid}!')
+            for i, free_id in zip(indices, free_ids):
+                buids[i] = self.buid_entity_parser.format(buid_type, free_id)
+                free_id_index.add(buids[i])
+
+        base_paths = {}
+        for buid_type in set(map(self.buid_normalizer.parse_type, buids)):
+            base_paths[buid_type] = self.get_buid_type_path(buid_type).absolute().resolve()
+
+        new = []
+        existing = []
+        for buid, entity in zip(buids, entities):
+            components = {
+                self.buid_normalizer.validated_component(component): name
+                for component, name in (entity.get('components', None) or {}).items()
+            }
+            if buid in self._entity_paths:
+                existing.append((buid, components))
+            else:
+                path = base_paths[self.buid_normalizer.parse_type(buid)].joinpath(f'{buid}_{entity["name"]}')
+                component_names = [
+                    (component, f'-{component}' if name is None else f'-{component}_{name}')
+                    for component, name in components.items()
+                ]
+                new.append((buid, path, component_names))
+
+        def make_dirs(item):
+            buid, path, component_names = item
+            self.walker.mkdir(str(path), exist_ok=True)
+            for _, folder_name in component_names:
+                self.walker.mkdir(str(path.joinpath(folder_name)), exist_ok=True)
+
+        with self._scan_executor(workers) as executor:
+            self._map(make_dirs, new, executor)
+
+        self._add_entity_paths([(buid, path) for buid, path, _ in new])
+        self.component_paths.update_names({buid: component_names for buid, _, component_names in new})
+
+        for buid, components in existing:
+            for component, name in components.items():
+                self[buid].create_component(component=component, name=name)
+
+        return buids
+
+    def get_buid_type_path(self, buid_type):
+        """ Returns the directory new entities of buid_type are created in. """
+        self._ensure_type_loaded(buid_type)
+        if buid_type not in self._buid_type_paths:
+            raise ValueError(f'Do not know where to put entities of type {buid_type}!')
+        return Path(self._buid_type_paths[buid_type])
 
-        btype, bid = buid_p.parse_type_and_uid(after)
-        bid = int(bid)
+    def reserve_buids(self, after, block_size=DEFAULT_BLOCK_SIZE):
+        """ Returns a BUIDReservation for entities of the type of after, starting at after.
 
-        if no_free_biuds is None:
-            no_free_biuds = no_buids
+        Use it to create entities from several processes at once without
+        BUID collisions (see BUIDReservation):
 
-        found_buids = []
+            with bdb.reserve_buids('WB0001') as reservation:
+                reservation.create_new_entities([dict(name=name) for name in names])
+        """
+        return BUIDReservation(self, after, block_size=block_size)
 
-        while bid < 9999:
-            new_buid = buid_p.format(btype, bid)
-            bid += 1
-            if new_buid in self.entities:
-                found_buids = []
-            else:
-                found_buids += [new_buid]
-                if len(found_buids) >= no_free_biuds:
-                    break
+    def clear_buid_reservations(self, buid_type):
+        """ Removes all reservation markers of buid_type, e.g. left over by crashed workers.
+
+        Only call this while no worker holds a reservation of the type.
+        """
+        reservation_path = self.get_buid_type_path(buid_type).joinpath(RESERVATION_DIR)
+        try:
+            markers = self.walker.scandir(str(reservation_path))
+        except FileNotFoundError:
+            return
+
+        for marker in markers:
+            self.walker.rmdir(marker.path)
+
+    def _get_free_id_index(self, *buid_types):
+        # only the entities of buid_types need to be known
+        for buid_type in buid_types:
+            self._ensure_type_loaded(buid_type)
+        entity_paths = self._entity_paths
+
+        free_id_index = self._free_id_index
+        if free_id_index is None or free_id_index[0] is not entity_paths or free_id_index[1] != entity_paths.version:
+            free_id_index = (entity_paths, entity_paths.version, FreeIdIndex(entity_paths))
+            self._free_id_index = free_id_index
 
-        return found_buids[0:no_buids]
+        return free_id_index[2]
+
+    def get_free_buids(self, after, count=1, contiguous=True):
+        """ Returns count unused BUIDs of the type of after, starting at after (inclusive).
+
+        With contiguous=True, the BUIDs are the first run of count consecutive
+        free ids. Raises ValueError if there are not enough free ids. The
+        BUIDs are not reserved, they are taken once an entity is created.
+        """
+        buid, _ = self.buid_entity_parser.parse_with_component(after)
+        if buid is None:
+            raise ValueError(f'Invalid BUID {after}!')
+
+        buid_type, start = split_buid(buid)
+        free_ids = self._get_free_id_index(buid_type).free_ids(buid_type, start, count=count, contiguous=contiguous)
+        if len(free_ids) < count:
+            raise ValueError(f'Not enough free ids for {count} entities of type {buid_type} after {buid}!')
+
+        return [self.buid_entity_parser.format(buid_type, free_id) for free_id in free_ids]
+
+    def _get_free_buid(self, after, no_buids=1, no_free_biuds=None):
+        if no_free_biuds is None:
+            no_free_biuds = no_buids
+
+        try:
+            return self.get_free_buids(after, count=no_free_biuds)[0:no_buids]
+        except ValueError:
+            return []
 
     def _create_entity_path(self, buid, name, reload=True):
         buid = self.buid_normalizer(buid)
         buid_type = self.buid_normalizer.parse_type(buid)
+        self._ensure_type_loaded(buid_type)
 
         try:
             buid_path = self.get_entity_path(buid)
@@ -390,46 +1361,119 @@ class BarelyDB(object):
             # entity does not exist
             pass
 
-        if buid_type not in self.buid_type_paths:
+        if buid_type not in self._buid_type_paths:
             raise ValueError(f'Do not know where to put entities of type {buid_type}!')
 
         # create new path
-        buid_base_path = Path(self.buid_type_paths[buid_type])
+        buid_base_path = Path(self._buid_type_paths[buid_type])
         buid_path = buid_base_path.joinpath(f'{buid}_{name}')
 
         buid_path = buid_path.absolute().resolve()
 
-        buid_path.mkdir(parents=False, exist_ok=True)
-
-        self.entity_paths[buid] = Path(buid_path)
+        self.walker.mkdir(str(buid_path), exist_ok=True)
 
-        if reload:
-            self.load_entities()
+        self._add_entity_path(buid, Path(buid_path))
 
         return buid_path
 
+    def _add_entity_path(self, buid, path):
+        """ Adds a newly created entity folder to the index, without rescanning. """
+        self._add_entity_paths([(buid, path)])
+
+    def _add_entity_paths(self, items):
+        """ Adds newly created entity folders [(buid, path)] to the index in a single update.
+
+        The indexes are modified as copies and swapped in (copy on write),
+        such that concurrent readers see either all or none of the entities.
+        """
+        with self._load_lock:
+            scan_records = dict(self._scan_records)
+            entity_paths = self._entity_paths.copy()
+            name_index = self.name_index.copy()
+            duplicate_buid_count = collections.Counter(self._duplicate_buid_count)
+            buid_type_paths = dict(self._buid_type_paths)
+
+            for buid, path in items:
+                path = Path(path)
+                try:
+                    key = self._scan_dir_key(path.parent)
+                except ValueError:
+                    # the entity is not located below base_path
+                    key = None
+
+                if key is not None:
+                    record = scan_records.get(key, None)
+                    if record is None:
+                        record = ScanDirRecord(mtime_ns=-1, scanned_ns=time.time_ns())
+                    scan_records[key] = record.with_entity(buid, path.name)
+
+                entity_paths[buid] = path
+                name_index.add(buid, path.name)
+                duplicate_buid_count[buid] += 1
+                buid_type_paths.setdefault(self.buid_scan.parse_type(buid), path.parent)
+
+            # keep the free id index current instead of rebuilding it
+            free_id_index = self._free_id_index
+            previous = self._entity_paths
+            if free_id_index is not None and free_id_index[0] is previous and free_id_index[1] == previous.version:
+                free_ids = free_id_index[2]
+                for buid, _ in items:
+                    free_ids.add(buid)
+                self._free_id_index = (entity_paths, entity_paths.version, free_ids)
+
+            self._scan_records = scan_records
+            self._entity_paths = entity_paths
+            self.name_index = name_index
+            self._duplicate_buid_count = duplicate_buid_count
+            self._buid_type_paths = buid_type_paths
+
+            duplicate_buid = [buid for buid, _ in items if duplicate_buid_count[buid] > 1]
+            if any(buid not in self._duplicate_buid for buid in duplicate_buid):
+                self._duplicate_buid = list(dict.fromkeys(self._duplicate_buid + duplicate_buid))
+                self.check_for_duplicates()
+
+    def _add_component_path(self, buid, component, path):
+        """ Adds a newly created component folder to the cached component paths, without rescanning. """
+        buid = self.buid_normalizer(buid)
+        with self._load_lock:
+            if buid in self.component_paths:
+                self.component_paths.add_name(buid, component, Path(path).name)
+
     def _get_files(self, buid, path, glob, must_contain_buid=False, output_as_str=True):
-        files = Path(path).glob(glob)
+        files = self.walker.glob(str(path), glob)
 
         if must_contain_buid:
             buid_p = self.BUIDParser(ignore_unknown=False, mode='first', warn_empty=False)
-            files_sel = [fn for fn in files if (buid_p(fn) == buid)]
+            files_buid = buid_p.parse_many(fn.path for fn in files)
+            files_sel = [fn for fn, file_buid in zip(files, files_buid) if file_buid == buid]
             files = files_sel
 
         def ignore_file(fn):
             return fn in self.ignored_files
 
-        files = [fn for fn in files if not ignore_file(fn.name)]
+        files = [fn.path for fn in files if not ignore_file(fn.name)]
 
-        if output_as_str:
-            files = [str(fn) for fn in files]
+        if not output_as_str:
+            files = [Path(fn) for fn in files]
 
         return list(files)
 
 
+def _unpickle_entity(cls, parent_bdb, buid, component):
+    return parent_bdb._get_entity_handle(cls, buid, component)
+
+
 class BarelyDBEntity(object):
+    """ Handle of an entity (or one of its components) in a BarelyDB.
+
+    Handles obtained from the database (bdb[buid], parent, get_component_entity,
+    like) are cached per database, the same class, BUID and component give the
+    same handle. Subclasses that keep their own state share it between all
+    users of the handle. logger and path_converter are taken from the database
+    unless they are set on the handle.
+    """
 
-    path_converter = None
+    __slots__ = ('_bdb', '_buid', 'component', '_logger', '_path_converter', '__weakref__')
 
     @classmethod
     def like(cls, entity):
@@ -437,26 +1481,48 @@ class BarelyDBEntity(object):
         if entity is None:
             return None
 
-        return cls(buid=entity.buid_with_component, parent_bdb=entity.bdb)
+        return entity.bdb._get_entity_handle(cls, entity.buid, entity.component)
 
     def __init__(self, buid, parent_bdb, component=None):
-        self.logger = parent_bdb.logger
+        buid, buid_component = parent_bdb.buid_entity_parser.parse_with_component(buid)
+        self._set_identity(parent_bdb, buid, buid_component if component is None else component)
+
+    def _set_identity(self, parent_bdb, buid, component):
         self._bdb = parent_bdb
-        self.path_converter = parent_bdb.path_converter
+        self._buid = buid
+        self.component = component
 
-        buid_p = self.bdb.BUIDParser(ignore_unknown=False, mode='first', warn_empty=True, allow_components=False)
-        self._buid = buid_p(buid)
+    @classmethod
+    def _from_parsed(cls, parent_bdb, buid, component):
+        if cls.__init__ is not BarelyDBEntity.__init__:
+            # subclasses with their own constructor are created the regular way
+            return cls(buid, parent_bdb, component=component)
 
-        buid_ent_p = self.bdb.BUIDParser(ignore_unknown=False, mode='first', warn_empty=True, allow_components=False)
-        self._buid_entity = buid_ent_p(buid)
+        self = cls.__new__(cls)
+        self._set_identity(parent_bdb, buid, component)
+        return self
 
-        if component is None:
-            buid_comp_p = self.bdb.BUIDParser(
-                ignore_unknown=False, mode='first', warn_empty=False, allow_components=False
-            )
-            component = buid_comp_p.parse_component(buid)
+    def __reduce__(self):
+        # the handle is taken from the handle cache of the unpickled database
+        return _unpickle_entity, (self.__class__, self._bdb, self._buid, self.component)
 
-        self.component = component
+    @property
+    def logger(self):
+        logger = getattr(self, '_logger', None)
+        return self._bdb.logger if logger is None else logger
+
+    @logger.setter
+    def logger(self, logger):
+        self._logger = logger
+
+    @property
+    def path_converter(self):
+        path_converter = getattr(self, '_path_converter', None)
+        return self._bdb.path_converter if path_converter is None else path_converter
+
+    @path_converter.setter
+    def path_converter(self, path_converter):
+        self._path_converter = path_converter
 
     def __repr__(self):
         try:
@@ -483,7 +1549,7 @@ class BarelyDBEntity(object):
 
     @property
     def buid_entity(self):
-        return self._buid_entity
+        return self._buid
 
     @property
     def buid_with_component(self):
@@ -495,7 +1561,7 @@ class BarelyDBEntity(object):
 
     @property
     def parent(self):
-        return BarelyDBEntity(self.buid_entity, self.bdb)
+        return self.bdb._get_entity_handle(BarelyDBEntity, self.buid_entity)
 
     @property
     def name(self):
@@ -525,7 +1591,7 @@ class BarelyDBEntity(object):
         return component in self.components
 
     def get_component_entity(self, component):
-        return self.__class__(buid=self.buid, parent_bdb=self.bdb, component=component)
+        return self.bdb._get_entity_handle(self.__class__, self.buid, component)
 
     def __getitem__(self, component):
         return self.get_component_entity(component)
@@ -604,6 +1670,7 @@ class BarelyDBEntity(object):
                 auto_string=auto_string,
                 auto_remove_duplicates=auto_remove_duplicates,
                 long_windows_path_limit=self.bdb.long_windows_path_limit,
+                walker=self.bdb.walker,
             )
         )
 
@@ -626,9 +1693,9 @@ class BarelyDBEntity(object):
             path_name += f'_{str(name)}'
 
         component_path = base_bath.joinpath(path_name)
-        component_path.mkdir(parents=False, exist_ok=True)
+        self.bdb.walker.mkdir(str(component_path), exist_ok=True)
 
-        self.bdb.load_components(self.buid)
+        self.bdb._add_component_path(self.buid, component, component_path)
 
         return component_path
 
@@ -0,0 +1,186 @@
+import logging
+import asyncio
+import functools
+import concurrent.futures
+
+from . import BarelyDB
+
+__all__ = ['AsyncBarelyDB', 'AsyncBarelyDBEntity']
+
+# create logger
+module_logger = logging.getLogger(__name__)
+module_logger.setLevel(logging.DEBUG)
+
+
+# general useful module components
+def _reload_module():
+    import sys
+    import importlib
+
+    current_module = sys.modules[__name__]
+    module_logger.info('Reloading module %s' % __name__)
+    importlib.reload(current_module)
+
+
+DEFAULT_MAX_WORKERS = 16
+
+
+class AsyncBarelyDB(object):
+    ''' asyncio facade of a BarelyDB.
+
+    Blocking filesystem operations run on a bounded thread pool (max_workers),
+    such that many concurrent lookups overlap their I/O without blocking the
+    event loop. Every awaitable accepts a timeout in seconds (default: the
+    timeout given to the constructor, None waits forever).
+
+    Cancelling an awaitable (or hitting its timeout) cancels the operation if
+    it has not started yet. An operation that is already running in the pool
+    finishes in the background and its result is discarded.
+
+        async with AsyncBarelyDB(base_path=path) as adb:
+            await adb.load_entities()
+            entity = await adb.get_entity('WB0001')
+            files = await entity.files('*.yaml')
+    '''
+
+    def __init__(self, bdb=None, *, max_workers=DEFAULT_MAX_WORKERS, timeout=None, **kwds):
+        self.bdb = BarelyDB(**kwds) if bdb is None else bdb
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=f'AsyncBarelyDB({self.bdb.name})'
+        )
+
+    def __repr__(self):
+        return f'{self.__class__.__qualname__}({self.bdb!r})'
+
+    async def run(self, func, *args, timeout=None, **kwds):
+        ''' Runs func(*args, **kwds) on the thread pool and waits for the result. '''
+        timeout = self.timeout if timeout is None else timeout
+        future = asyncio.get_running_loop().run_in_executor(self._executor, functools.partial(func, *args, **kwds))
+
+        if timeout is None:
+            return await future
+        else:
+            return await asyncio.wait_for(future, timeout)
+
+    def close(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, traceback):
+        self.close(wait=False)
+
+    async def load_entities(self, *, timeout=None, **kwds):
+        return await self.run(self.bdb.load_entities, timeout=timeout, **kwds)
+
+    async def refresh(self, *, timeout=None, **kwds):
+        return await self.run(self.bdb.refresh, timeout=timeout, **kwds)
+
+    async def contains(self, buid, *, timeout=None):
+        return await self.run(self.bdb.__contains__, buid, timeout=timeout)
+
+    async def get_entity(self, buid, *, timeout=None):
+        entity = await self.run(self.bdb.get_entity, buid, timeout=timeout)
+        return AsyncBarelyDBEntity(entity, self)
+
+    async def get_entities(self, buids, *, timeout=None):
+        ''' Gets many entities concurrently (the timeout applies to each of them). '''
+        return await asyncio.gather(*[self.get_entity(buid, timeout=timeout) for buid in buids])
+
+    async def get_entity_path(self, buid, *, timeout=None):
+        return await self.run(self.bdb.get_entity_path, buid, timeout=timeout)
+
+    async def get_entity_name(self, buid, *, timeout=None):
+        return await self.run(self.bdb.get_entity_name, buid, timeout=timeout)
+
+    async def get_component_paths(self, buid, *, timeout=None):
+        return await self.run(self.bdb.get_component_paths, buid, timeout=timeout)
+
+    async def get_component_path(self, buid, component, *, timeout=None):
+        return await self.run(self.bdb.get_component_path, buid, component, timeout=timeout)
+
+    async def create_new_entity(self, *, name, after=None, buid=None, timeout=None):
+        entity = await self.run(self.bdb.create_new_entity, name=name, after=after, buid=buid, timeout=timeout)
+        return AsyncBarelyDBEntity(entity, self)
+
+    async def create_new_entities(self, entities, *, workers=None, timeout=None):
+        created = await self.run(self.bdb.create_new_entities, entities, workers=workers, timeout=timeout)
+        return [AsyncBarelyDBEntity(entity, self) for entity in created]
+
+
+class AsyncBarelyDBEntity(object):
+    ''' asyncio facade of a BarelyDBEntity, the I/O runs on the pool of the AsyncBarelyDB. '''
+
+    def __init__(self, entity, adb):
+        self.entity = entity
+        self.adb = adb
+
+    def __repr__(self):
+        return f"{self.__class__.__qualname__}('{self.buid_with_component}')"
+
+    def __eq__(self, other):
+        return self.buid_with_component == other.buid_with_component
+
+    @property
+    def buid(self):
+        return self.entity.buid
+
+    @property
+    def buid_entity(self):
+        return self.entity.buid_entity
+
+    @property
+    def buid_with_component(self):
+        return self.entity.buid_with_component
+
+    @property
+    def component(self):
+        return self.entity.component
+
+    def get_component_entity(self, component):
+        return self.__class__(self.entity.get_component_entity(component), self.adb)
+
+    def __getitem__(self, component):
+        return self.get_component_entity(component)
+
+    async def _get(self, name, timeout=None):
+        return await self.adb.run(getattr, self.entity, name, timeout=timeout)
+
+    async def name(self, *, timeout=None):
+        return await self._get('name', timeout=timeout)
+
+    async def path(self, *, timeout=None):
+        return await self._get('path', timeout=timeout)
+
+    async def exists(self, *, timeout=None):
+        return await self._get('exists', timeout=timeout)
+
+    async def component_paths(self, *, timeout=None):
+        return await self._get('component_paths', timeout=timeout)
+
+    async def components(self, *, timeout=None):
+        return await self._get('components', timeout=timeout)
+
+    async def files(self, glob, *, timeout=None, **kwds):
+        return await self.adb.run(self.entity.files, glob, timeout=timeout, **kwds)
+
+    async def entity_files(self, glob, *, timeout=None, **kwds):
+        return await self.adb.run(self.entity.entity_files, glob, timeout=timeout, **kwds)
+
+    async def component_files(self, glob, *, timeout=None, **kwds):
+        return await self.adb.run(self.entity.component_files, glob, timeout=timeout, **kwds)
+
+    async def create_component(self, *, component, name, timeout=None):
+        return await self.adb.run(self.entity.create_component, component=component, name=name, timeout=timeout)
+
+    async def has_object(self, object_class, *, timeout=None, **kwds):
+        return await self.adb.run(self.entity.has_object, object_class, timeout=timeout, **kwds)
+
+    async def load_object(self, object_class, *, timeout=None, **kwds):
+        return await self.adb.run(self.entity.load_object, object_class, timeout=timeout, **kwds)
+
+    async def save_object(self, obj, *, timeout=None, **kwds):
+        return await self.adb.run(self.entity.save_object, obj, timeout=timeout, **kwds)
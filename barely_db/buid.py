@@ -0,0 +1,113 @@
+import logging
+import re
+
+__all__ = ['BUID']
+
+# create logger
+module_logger = logging.getLogger(__name__)
+module_logger.setLevel(logging.DEBUG)
+
+
+# general useful module components
+def _reload_module():
+    import sys
+    import importlib
+
+    current_module = sys.modules[__name__]
+    module_logger.info('Reloading module %s' % __name__)
+    importlib.reload(current_module)
+
+
+# normalized BUID as formatted by GenericBUIDParser (the component is taken as parsed)
+_NORMALIZED_REGEX = re.compile(r'[A-Z]{2,3}(?:[0-9]{4}|[1-9][0-9]{4})(?:-[a-zA-Z]{1,2}\d{1,5})?')
+
+
+class BUID(str):
+    ''' A normalized BUID (e.g. WB3001 or WB3001-Q1) that knows its parts.
+
+    BUID is a str holding the normalized form, so it hashes and compares
+    equal like that string and works wherever BUID strings are used (e.g. as
+    key of the entity index). BUIDs sort by type, numeric id and component
+    (WB9999 < WB10000), compared to a plain str they sort like strings. Type,
+    id and component are sliced from the string on access, without a regex.
+    Parsers created with as_buid=True return BUIDs and pass BUIDs through
+    without parsing them.
+    '''
+
+    __slots__ = ()
+
+    def __new__(cls, value):
+        if type(value) is cls:
+            return value
+
+        if _NORMALIZED_REGEX.fullmatch(value) is None:
+            raise ValueError(f'{value!r} is not a normalized BUID!')
+
+        return super().__new__(cls, value)
+
+    @classmethod
+    def from_parts(cls, buid_type, buid_id, component=None):
+        component = '' if component is None else f'-{component}'
+        return cls(f'{buid_type.upper()}{int(buid_id):04d}{component}')
+
+    @classmethod
+    def _from_normalized(cls, value):
+        # value is known to be normalized (e.g. formatted by the parser)
+        return str.__new__(cls, value)
+
+    @property
+    def type(self):
+        return self[:3] if self[2] > '9' else self[:2]
+
+    @property
+    def id(self):
+        end = self.find('-')
+        return int(self[3 if self[2] > '9' else 2 : None if end < 0 else end])
+
+    @property
+    def component(self):
+        end = self.find('-')
+        return None if end < 0 else self[end + 1 :]
+
+    @property
+    def base(self):
+        ''' The BUID without component. '''
+        end = self.find('-')
+        return self if end < 0 else str.__new__(BUID, self[:end])
+
+    def with_component(self, component):
+        return self.from_parts(self.type, self.id, component)
+
+    def sort_key(self):
+        return self.type, self.id, self.component or ''
+
+    def __lt__(self, other):
+        if isinstance(other, BUID):
+            return self.sort_key() < other.sort_key()
+        return str.__lt__(self, other)
+
+    def __le__(self, other):
+        if isinstance(other, BUID):
+            return self.sort_key() <= other.sort_key()
+        return str.__le__(self, other)
+
+    def __gt__(self, other):
+        if isinstance(other, BUID):
+            return self.sort_key() > other.sort_key()
+        return str.__gt__(self, other)
+
+    def __ge__(self, other):
+        if isinstance(other, BUID):
+            return self.sort_key() >= other.sort_key()
+        return str.__ge__(self, other)
+
+    def _regex_result(self):
+        # the (type, id, component) groups that the parser regexes find in the string
+        end = self.find('-')
+        start = 3 if self[2] > '9' else 2
+        if end < 0:
+            return self[:start], self[start:], ''
+        return self[:start], self[start:end], self[end + 1 :]
+
+    def __repr__(self):
+        return f'{self.__class__.__qualname__}({str.__repr__(self)})'
@@ -0,0 +1,170 @@
+import logging
+import string
+import sys
+
+from .buid import BUID
+
+__all__ = ['BUIDCodec', 'MISSING_KEY']
+
+# create logger
+module_logger = logging.getLogger(__name__)
+module_logger.setLevel(logging.DEBUG)
+
+
+# general useful module components
+def _reload_module():
+    import sys
+    import importlib
+
+    current_module = sys.modules[__name__]
+    module_logger.info('Reloading module %s' % __name__)
+    importlib.reload(current_module)
+
+
+# key of values without a BUID (of a known type) in the bulk functions
+MISSING_KEY = -1
+
+# key layout: type code (17 bits) | id (17 bits) | component code (29 bits)
+_ID_SHIFT = 29
+_TYPE_SHIFT = 46
+_MAX_TYPE_CODE = (1 << 17) - 1
+
+# components are 1-2 letters and 1-5 digits, leading zeros of the digits are kept
+_LETTERS = string.ascii_uppercase + string.ascii_lowercase
+_LETTER_CODES = {letter: i for i, letter in enumerate(_LETTERS)}
+_DIGIT_OFFSETS = [0, 10, 110, 1110, 11110, 111110]
+
+
+def _encode_component(component):
+    letters = component.rstrip(string.digits)
+    digits = component[len(letters) :]
+    if not (1 <= len(letters) <= 2 and 1 <= len(digits) <= 5 and digits.isascii()):
+        return None
+
+    letters_code = _LETTER_CODES.get(letters[0])
+    second = _LETTER_CODES.get(letters[1], None) if len(letters) == 2 else -1
+    if letters_code is None or second is None:
+        return None
+
+    letters_code = letters_code * (len(_LETTERS) + 1) + second + 1
+    return 1 + letters_code * _DIGIT_OFFSETS[-1] + _DIGIT_OFFSETS[len(digits) - 1] + int(digits)
+
+
+def _decode_component(component_code):
+    letters_code, digits_code = divmod(component_code - 1, _DIGIT_OFFSETS[-1])
+    first, second = divmod(letters_code, len(_LETTERS) + 1)
+    letters = _LETTERS[first] + ('' if second == 0 else _LETTERS[second - 1])
+
+    length = max(i for i, offset in enumerate(_DIGIT_OFFSETS) if offset <= digits_code) + 1
+    return f'{letters}{digits_code - _DIGIT_OFFSETS[length - 1]:0{length}d}'
+
+
+def _factorize(array):
+    ''' Returns codes (-1 for None and NaN) and the list of distinct values of a 1-d array. '''
+    try:
+        import pandas as pd
+    except ImportError:
+        pd = None
+
+    if pd is not None:
+        codes, uniques = pd.factorize(array)
+        return codes, uniques.tolist()
+
+    import numpy as np
+
+    if array.dtype == object:
+        missing = np.array([value is None or value != value for value in array], dtype=bool)
+        array = np.where(missing, '', array).astype(str)
+    uniques, codes = np.unique(array, return_inverse=True)
+    return codes.reshape(-1), uniques.tolist()
+
+
+def _like(values, array):
+    # a pandas Series is returned with its index and name
+    pd = sys.modules.get('pandas', None)
+    if pd is not None and isinstance(values, pd.Series):
+        return pd.Series(array, index=values.index, name=values.name, dtype=array.dtype)
+    return array
+
+
+class BUIDCodec(object):
+    ''' Encodes BUIDs (with component) into non-negative int64 keys and back.
+
+    A key packs the code of the BUID type, the id and a code of the
+    component, e.g. for joins and group-bys on integer columns instead of
+    strings. Keys sort by type (in the order of type_codes), id and then
+    component. Values are parsed with the given parser class (e.g.
+    BarelyDB.BUIDParser), only BUIDs of its types can be encoded.
+
+    The type codes are numbered in alphabetical order of the types by
+    default, pass type_codes ({buid_type: code}) to keep the keys stable when
+    types are added to the configuration. The bulk functions take numpy
+    arrays, pandas Series or other iterables and need numpy.
+    '''
+
+    def __init__(self, parser_class, type_codes=None):
+        if type_codes is None:
+            buid_types = sorted(set(parser_class.buid_types.values()))
+            type_codes = {buid_type: code for code, buid_type in enumerate(buid_types, start=1)}
+
+        for buid_type, code in type_codes.items():
+            if not 0 < code <= _MAX_TYPE_CODE:
+                raise ValueError(f'Type code of {buid_type} must be in [1, {_MAX_TYPE_CODE}], not {code}!')
+
+        self.type_codes = dict(type_codes)
+        self._code_types = {code: buid_type for buid_type, code in self.type_codes.items()}
+        self.parser = parser_class(ignore_unknown=True, mode='unique', warn_empty=False, as_buid=True)
+
+    def _encode_buid(self, buid):
+        type_code = self.type_codes.get(buid.type, None)
+        component = buid.component
+        component_code = 0 if component is None else _encode_component(component)
+        if type_code is None or component_code is None:
+            return None
+        return (type_code << _TYPE_SHIFT) | (buid.id << _ID_SHIFT) | component_code
+
+    def encode(self, value):
+        ''' Returns the key of the BUID in value (e.g. 'WB0012-Q1' or a file name). '''
+        buid = self.parser.parse(value)
+        key = None if buid is None else self._encode_buid(buid)
+        if key is None:
+            raise ValueError(f'No BUID that can be encoded found in {value}!')
+        return key
+
+    def decode(self, key):
+        ''' Returns the BUID of key. '''
+        key = int(key)
+        buid_type = self._code_types.get(key >> _TYPE_SHIFT, None)
+        if key < 0 or buid_type is None:
+            raise ValueError(f'Invalid BUID key {key}!')
+
+        component_code = key & ((1 << _ID_SHIFT) - 1)
+        component = None if component_code == 0 else _decode_component(component_code)
+        return BUID.from_parts(buid_type, (key >> _ID_SHIFT) & ((1 << (_TYPE_SHIFT - _ID_SHIFT)) - 1), component)
+
+    def encode_many(self, values):
+        ''' Returns the keys of values as int64 array (or Series, for a Series), MISSING_KEY where there is no BUID.
+
+        Each distinct value is parsed once.
+        '''
+        import numpy as np
+
+        codes, uniques = _factorize(np.asarray(values, dtype=object))
+        keys = [None if buid is None else self._encode_buid(buid) for buid in self.parser.parse_many(uniques)]
+
+        # code -1 (missing values) takes the last key
+        unique_keys = np.array([MISSING_KEY if key is None else key for key in keys] + [MISSING_KEY], dtype=np.int64)
+        return _like(values, unique_keys[codes])
+
+    def decode_many(self, keys):
+        ''' Returns the BUIDs of keys as object array (or Series, for a Series), None for MISSING_KEY. '''
+        import numpy as np
+
+        codes, uniques = _factorize(np.asarray(keys, dtype=np.int64))
+
+        buids = np.empty(len(uniques) + 1, dtype=object)
+        buids[:-1] = [None if key == MISSING_KEY else self.decode(key) for key in uniques]
+        return _like(keys, buids[codes])
+
+    def __repr__(self):
+        return f'{self.__class__.__qualname__}({len(self.type_codes)} types)'
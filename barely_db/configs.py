@@ -86,6 +86,9 @@ class BarelyDBConfig:
     ignored_files = attr.ib(factory=list, type=typing.List[str])
     auto_reload_components = attr.ib(default=None)
     buid_types = attr.ib(factory=dict, type=typing.Dict[str, str])
+    index_snapshot_file = attr.ib(default=None, type=typing.Optional[str])
+    component_cache_policy = attr.ib(default=None, type=typing.Optional[str])
+    component_cache_ttl = attr.ib(default=None, type=typing.Optional[float])
 
     @staticmethod
     def resolve_file(base_path):
@@ -67,13 +67,10 @@ def make_example_db(base_path):
         p.mkdir(exist_ok=True)
         bdb.buid_type_paths[bt] = str(p)
 
-    for i in range(0, 20):
-        bdb.create_new_entity(after='CU0001', name=names.get_full_name(), reload=False)
+    entities = [dict(after='CU0001', name=names.get_full_name()) for i in range(0, 20)]
 
     for name in ['mixer_30L', 'mixer_5L', 'sieve', 'scale_30kg']:
-        ent = bdb.create_new_entity(after='EQ0001', name=name, reload=False)
-        ent.create_component(component='D1', name='device1')
-        ent.create_component(component='D2', name='device2')
+        entities.append(dict(after='EQ0001', name=name, components={'D1': 'device1', 'D2': 'device2'}))
 
     for name in [
         'flour_white_supplierA',
@@ -83,12 +80,14 @@ def make_example_db(base_path):
         'yeast_supplierK',
         'yeast_supplierJ',
     ]:
-        ent = bdb.create_new_entity(after='IG0001', name=name, reload=False)
+        entities.append(dict(after='IG0001', name=name))
 
     buid_types = {'IG': 20, 'DG': 30, 'BR': 30, 'DOC': 10}
     for bt, number in buid_types.items():
         for i in range(0, number):
-            bdb.create_new_entity(after=bt + '0001', name=rw.random_word(), reload=False)
+            entities.append(dict(after=bt + '0001', name=rw.random_word()))
+
+    bdb.create_new_entities(entities)
 
     bdb.load_entities()
 
@@ -26,6 +26,7 @@ import functools
 from enum import Enum, IntEnum
 
 from .parser import *
+from .walker import ScandirWalker
 from .error_handler import DefaultErrorHandler
 
 
@@ -104,9 +105,11 @@ class FileManager(object):
         auto_string=True,
         auto_remove_duplicates=True,
         long_windows_path_limit=150,
+        walker=None,
     ):
 
         self.long_windows_path_limit = long_windows_path_limit
+        self.walker = ScandirWalker() if walker is None else walker
 
         self.set_raw_path(raw_path)
         self.set_export_path(export_path, export_prefix)
@@ -154,18 +157,23 @@ class FileManager(object):
         if not isinstance(file_glob, list):
             file_glob = [file_glob]
 
-        fns = []
+        entries = []
         for p, g in product(paths, file_glob):
-            fns += list(p.glob(g))
+            entries += self.walker.glob(str(p), g)
+
+        def is_dir(entry):
+            return entry.is_dir if entry.is_dir is not None else self.walker.is_dir(entry.path)
 
         if directories_only:
-            fns = [fn for fn in fns if fn.is_dir()]
+            entries = [e for e in entries if is_dir(e)]
 
         if files_only:
-            fns = [fn for fn in fns if not fn.is_dir()]
+            entries = [e for e in entries if not is_dir(e)]
+
+        fns = [e.path for e in entries]
 
-        if self.auto_string:
-            fns = [str(f) for f in fns]
+        if not self.auto_string:
+            fns = [Path(f) for f in fns]
 
         if self.auto_remove_duplicates:
             fns = self.remove_gdrive_duplicates(fns)
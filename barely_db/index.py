@@ -0,0 +1,309 @@
+import logging
+import sys
+import array
+
+from pathlib import Path
+from collections.abc import MutableMapping
+
+__all__ = ['StringTable', 'EntityPathIndex', 'ComponentPathIndex']
+
+# create logger
+module_logger = logging.getLogger(__name__)
+module_logger.setLevel(logging.DEBUG)
+
+
+# general useful module components
+def _reload_module():
+    import sys
+    import importlib
+
+    current_module = sys.modules[__name__]
+    module_logger.info('Reloading module %s' % __name__)
+    importlib.reload(current_module)
+
+
+class StringTable(object):
+    ''' Table of unique strings, each string is stored once and referenced by a small integer id. '''
+
+    __slots__ = ('_ids', '_strings')
+
+    def __init__(self):
+        self._ids = {}
+        self._strings = []
+
+    def __len__(self):
+        return len(self._strings)
+
+    def __getitem__(self, string_id):
+        return self._strings[string_id]
+
+    def id(self, string):
+        string_id = self._ids.get(string, None)
+        if string_id is None:
+            string_id = len(self._strings)
+            string = sys.intern(string)
+            self._ids[string] = string_id
+            self._strings.append(string)
+        return string_id
+
+
+class EntityPathIndex(MutableMapping):
+    ''' Mapping buid -> entity path that stores the paths compactly.
+
+    Each entity is stored as the id of its parent directory (relative to
+    base_path, in a shared string table) and its folder name. BUIDs are
+    interned. Path objects are only created on access, use location() to
+    compare entries without creating them. Resolved paths are cached until
+    the entry changes. version counts the changes, such that derived indexes
+    can tell when they are outdated.
+
+    BarelyDB does not modify an index that readers may use, it modifies a
+    copy() and swaps it in (copy on write).
+    '''
+
+    __slots__ = ('base_path', 'version', '_dirs', '_dir_paths', '_slots', '_dir_ids', '_names', '_resolved')
+
+    def __init__(self, base_path, items=None):
+        self.base_path = Path(base_path)
+        self.version = 0
+        self._dirs = StringTable()
+        self._dir_paths = []
+        self._slots = {}
+        self._dir_ids = array.array('I')
+        self._names = []
+        self._resolved = {}
+
+        if items is not None:
+            for buid, path in dict(items).items():
+                self[buid] = path
+
+    def copy(self):
+        index = self.__class__(self.base_path)
+        index.version = self.version
+        index._dirs._ids = dict(self._dirs._ids)
+        index._dirs._strings = list(self._dirs._strings)
+        index._dir_paths = list(self._dir_paths)
+        index._slots = dict(self._slots)
+        index._dir_ids = array.array('I', self._dir_ids)
+        index._names = list(self._names)
+        index._resolved = dict(self._resolved)
+        return index
+
+    def __getstate__(self):
+        # resolved paths are a cache, they are resolved again where the index is unpickled
+        return {slot: getattr(self, slot) for slot in self.__slots__ if slot != '_resolved'}
+
+    def __setstate__(self, state):
+        for slot, value in state.items():
+            setattr(self, slot, value)
+        self._resolved = {}
+
+    def _dir_id(self, dir_key):
+        dir_id = self._dirs.id(dir_key)
+        if dir_id == len(self._dir_paths):
+            self._dir_paths.append(self.base_path.joinpath(dir_key))
+        return dir_id
+
+    def add(self, buid, dir_key, name):
+        ''' Adds an entity with folder name in dir_key (relative to base_path as posix string, or absolute). '''
+        dir_id = self._dir_id(dir_key)
+        self.version += 1
+
+        slot = self._slots.get(buid, None)
+        if slot is None:
+            self._slots[sys.intern(buid)] = len(self._names)
+            self._dir_ids.append(dir_id)
+            self._names.append(name)
+        else:
+            self._dir_ids[slot] = dir_id
+            self._names[slot] = name
+            self._resolved.pop(buid, None)
+
+    def parent(self, buid):
+        ''' Returns the path of the directory that contains buid. '''
+        return self._dir_paths[self._dir_ids[self._slots[buid]]]
+
+    def location(self, buid):
+        ''' Returns (dir_key, name) of buid, without creating a Path. '''
+        slot = self._slots[buid]
+        return self._dirs[self._dir_ids[slot]], self._names[slot]
+
+    def __getitem__(self, buid):
+        slot = self._slots[buid]
+        return self._dir_paths[self._dir_ids[slot]] / self._names[slot]
+
+    def resolved(self, buid):
+        ''' Returns the absolute, resolved path of buid (resolved once). '''
+        path = self._resolved.get(buid, None)
+        if path is None:
+            path = self[buid].absolute().resolve()
+            self._resolved[buid] = path
+        return path
+
+    def __setitem__(self, buid, path):
+        path = Path(path)
+        try:
+            dir_key = path.parent.relative_to(self.base_path).as_posix()
+        except ValueError:
+            dir_key = str(path.parent)
+        self.add(buid, dir_key, path.name)
+
+    def __delitem__(self, buid):
+        # the slot is left unused, it disappears when the index is rebuilt
+        del self._slots[buid]
+        self._resolved.pop(buid, None)
+        self.version += 1
+
+    def __contains__(self, buid):
+        return buid in self._slots
+
+    def __iter__(self):
+        return iter(self._slots)
+
+    def __len__(self):
+        return len(self._slots)
+
+    def __repr__(self):
+        return f'{self.__class__.__qualname__}({len(self)} entities @ {self.base_path})'
+
+
+class ComponentPathIndex(MutableMapping):
+    ''' Mapping buid -> {component: path} of the cached component folders.
+
+    Only the component folder names are stored (as flat tuples), the paths
+    are created from the entity path on access. Resolved paths are cached
+    until the components of the entity change or clear_resolved is called.
+
+    The index is a cache that readers fill concurrently. Single entries are
+    replaced atomically, removals and bulk changes build new dicts and swap
+    them in, and iteration works on a snapshot of the keys. Readers that
+    check and then read an entry use names(buid, default) or all_names(),
+    which read a single version of the dict.
+    '''
+
+    __slots__ = ('_entity_path', '_components', '_resolved')
+
+    def __init__(self, entity_path):
+        self._entity_path = entity_path
+        self._components = {}
+        self._resolved = {}
+
+    def set_names(self, buid, component_names):
+        ''' Sets the components of buid from (component, folder name) pairs. '''
+        flat = tuple(item for pair in dict(component_names).items() for item in pair)
+        if self._components.get(buid, None) != flat:
+            self._components[sys.intern(buid)] = flat
+            self._resolved.pop(buid, None)
+
+    def update_names(self, items, replace=False):
+        ''' Sets the components of many entities from {buid: [(component, folder name)]} at once.
+
+        With replace=True, all other entities are dropped.
+        '''
+        components = {} if replace else dict(self._components)
+        resolved = {} if replace else dict(self._resolved)
+        for buid, component_names in dict(items).items():
+            flat = tuple(item for pair in dict(component_names).items() for item in pair)
+            if components.get(buid, None) != flat:
+                components[sys.intern(buid)] = flat
+                resolved.pop(buid, None)
+
+        self._resolved = resolved
+        self._components = components
+
+    def add_name(self, buid, component, name):
+        names = dict(self.names(buid))
+        names[component] = name
+        self.set_names(buid, names)
+
+    def names(self, buid, *default):
+        ''' Returns the (component, folder name) pairs of buid, or default if buid is not cached. '''
+        flat = self._components.get(buid, None)
+        if flat is None:
+            if default:
+                return default[0]
+            raise KeyError(buid)
+        return list(zip(flat[0::2], flat[1::2]))
+
+    def all_names(self):
+        ''' Returns {buid: [(component, folder name)]} of all cached entities, from one version of the cache. '''
+        components = dict(self._components)
+        return {buid: list(zip(flat[0::2], flat[1::2])) for buid, flat in components.items()}
+
+    def __getitem__(self, buid):
+        names = self.names(buid)
+        if not names:
+            return {}
+
+        entity_path = self._entity_path(buid)
+        return {component: entity_path / name for component, name in names}
+
+    def resolved(self, buid):
+        ''' Returns {component: resolved path} of buid (a copy of the cached result). '''
+        paths = self._resolved.get(buid, None)
+        if paths is None:
+            paths = {component: path.absolute().resolve() for component, path in self[buid].items()}
+            self._resolved[buid] = paths
+        return dict(paths)
+
+    def clear_resolved(self):
+        self._resolved = {}
+
+    def __setitem__(self, buid, component_paths):
+        self.set_names(buid, {component: Path(path).name for component, path in component_paths.items()})
+
+    def __delitem__(self, buid):
+        if buid not in self._components:
+            raise KeyError(buid)
+        self.discard([buid])
+
+    def discard(self, buids):
+        ''' Removes the components of buids that are cached, in a single swap. '''
+        components = dict(self._components)
+        resolved = dict(self._resolved)
+        for buid in buids:
+            components.pop(buid, None)
+            resolved.pop(buid, None)
+
+        self._resolved = resolved
+        self._components = components
+
+    def _paths(self, buid):
+        # the paths can only be created while the entity is indexed
+        try:
+            return self[buid]
+        except KeyError:
+            return {}
+
+    def get(self, buid, default=None):
+        ''' Returns the component paths of buid, {} if the entity is not indexed anymore. '''
+        if buid not in self._components:
+            return default
+        return self._paths(buid)
+
+    def pop(self, buid, *default):
+        ''' Removes buid, also if the entity is not indexed anymore, and returns its paths (see get). '''
+        if buid not in self._components:
+            if default:
+                return default[0]
+            raise KeyError(buid)
+
+        paths = self._paths(buid)
+        self.discard([buid])
+        return paths
+
+    def __contains__(self, buid):
+        return buid in self._components
+
+    def __iter__(self):
+        return iter(list(self._components))
+
+    def __len__(self):
+        return len(self._components)
+
+    def clear(self):
+        self._components = {}
+        self._resolved = {}
+
+    def __repr__(self):
+        return f'{self.__class__.__qualname__}({len(self)} entities)'
@@ -0,0 +1,301 @@
+import logging
+import re
+import bisect
+import heapq
+import collections
+
+__all__ = ['EntityNameIndex', 'normalize_name', 'name_words']
+
+# create logger
+module_logger = logging.getLogger(__name__)
+module_logger.setLevel(logging.DEBUG)
+
+
+# general useful module components
+def _reload_module():
+    import sys
+    import importlib
+
+    current_module = sys.modules[__name__]
+    module_logger.info('Reloading module %s' % __name__)
+    importlib.reload(current_module)
+
+
+_SEPARATORS = re.compile(r'[\W_]+')
+_CAMEL_WORDS = re.compile(r'[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+')
+
+# postings of at least this size are sorted by rank when the index is built
+PREBUILD_RANKED_SIZE = 64
+
+# match quality of a query word
+EXACT_MATCH = 1.0
+PREFIX_MATCH = 0.8
+FUZZY_MATCH = 0.6
+
+
+def normalize_name(text):
+    ''' Lower case without separators: 'WB9001_Coding test' -> 'wb9001codingtest'. '''
+    return _SEPARATORS.sub('', text.lower())
+
+
+def name_words(text):
+    ''' Lower case words of a name, split at separators and camel case: 'WB9001_CodingTest' ->
+    ['wb9001', 'wb', '9001', 'codingtest', 'coding', 'test'].
+    '''
+    words = []
+    for part in _SEPARATORS.split(text):
+        if not part:
+            continue
+        words.append(part.lower())
+        camel_words = _CAMEL_WORDS.findall(part)
+        if len(camel_words) > 1:
+            words.extend(word.lower() for word in camel_words)
+
+    return list(dict.fromkeys(words))
+
+
+def _trigrams(word):
+    return {word[i : i + 3] for i in range(len(word) - 2)}
+
+
+def _fuzzy_word(word):
+    # numbers and BUIDs are only matched by prefix
+    return word.isalpha()
+
+
+class EntityNameIndex(object):
+    ''' Fuzzy lookup of entities by fragments of their folder names.
+
+    Folder names are split into words (at separators and camel case) and
+    compared case insensitive, so 'coding test' finds WB9001_CodingTest.
+    Every query word has to match a word of the name, exactly or as prefix.
+    Query words of three or more characters without such a match are matched
+    fuzzy by trigrams. Results are ranked by the match quality and shorter
+    names first.
+
+    Postings are kept per distinct word, prefix and fuzzy matching work on
+    the vocabulary, which is much smaller than the number of entities. The
+    postings are walked in rank order, such that a search stops as soon as
+    the best results are certain.
+
+    copy() returns an index that shares the postings with this one, they are
+    copied when the copy modifies them. BarelyDB modifies a copy and swaps
+    it in, such that concurrent searches never see a partial update.
+    '''
+
+    def __init__(self, min_similarity=0.5):
+        self.min_similarity = min_similarity
+        self.names = {}
+        self._lengths = {}
+        self._postings = {}
+        self._ranked_postings = {}
+        self._vocabulary = []
+        self._word_trigrams = collections.defaultdict(set)
+        # postings, ranked postings and trigram sets that are not shared with a copy
+        self._owned = set()
+
+    def copy(self):
+        ''' Returns a copy that can be modified without changing this index. '''
+        index = self.__class__(min_similarity=self.min_similarity)
+        index.names = dict(self.names)
+        index._lengths = dict(self._lengths)
+        index._postings = dict(self._postings)
+        index._ranked_postings = dict(self._ranked_postings)
+        index._vocabulary = list(self._vocabulary)
+        index._word_trigrams = collections.defaultdict(set, self._word_trigrams)
+
+        # the containers are shared from now on, neither index may modify them in place
+        self._owned = set()
+        return index
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        del state['_owned']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._owned = set()
+
+    def _own(self, mapping, kind, key):
+        ''' Returns mapping[key] for modification, copies it first if it is shared. '''
+        if (kind, key) not in self._owned:
+            mapping[key] = mapping[key].copy()
+            self._owned.add((kind, key))
+        return mapping[key]
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, buid):
+        return buid in self.names
+
+    def _add_word(self, word, buid, sort=True):
+        if word not in self._postings:
+            self._postings[word] = set()
+            self._owned.add(('postings', word))
+            if sort:
+                bisect.insort(self._vocabulary, word)
+            else:
+                self._vocabulary.append(word)
+            if _fuzzy_word(word):
+                for trigram in _trigrams(word):
+                    if trigram not in self._word_trigrams:
+                        self._word_trigrams[trigram] = set()
+                        self._owned.add(('trigrams', trigram))
+                    self._own(self._word_trigrams, 'trigrams', trigram).add(word)
+        self._own(self._postings, 'postings', word).add(buid)
+
+        if word in self._ranked_postings:
+            ranked = self._own(self._ranked_postings, 'ranked', word)
+            ranked.insert(self._ranked_position(ranked, buid), buid)
+
+    def _remove_word(self, word, buid):
+        buids = self._own(self._postings, 'postings', word)
+        buids.discard(buid)
+
+        if word in self._ranked_postings:
+            ranked = self._own(self._ranked_postings, 'ranked', word)
+            del ranked[self._ranked_position(ranked, buid)]
+
+        if not buids:
+            del self._postings[word]
+            self._ranked_postings.pop(word, None)
+            del self._vocabulary[bisect.bisect_left(self._vocabulary, word)]
+            for trigram in _trigrams(word) if _fuzzy_word(word) else ():
+                words = self._own(self._word_trigrams, 'trigrams', trigram)
+                words.discard(word)
+                if not words:
+                    del self._word_trigrams[trigram]
+
+    def add(self, buid, folder_name, _sort=True):
+        if buid in self.names:
+            if self.names[buid] == folder_name:
+                return
+            self.remove(buid)
+
+        self.names[buid] = folder_name
+        self._lengths[buid] = len(normalize_name(folder_name))
+        for word in name_words(folder_name):
+            self._add_word(word, buid, sort=_sort)
+
+    def remove(self, buid):
+        folder_name = self.names.pop(buid)
+        for word in name_words(folder_name):
+            self._remove_word(word, buid)
+        del self._lengths[buid]
+
+    def update(self, items):
+        ''' Synchronizes the index with the (buid, folder name) items, only changed entries are touched. '''
+        items = dict(items)
+
+        for buid in [buid for buid in self.names if buid not in items]:
+            self.remove(buid)
+
+        # a bulk build sorts the vocabulary once instead of inserting word by word
+        bulk = not self.names
+        for buid, folder_name in items.items():
+            self.add(buid, folder_name, _sort=not bulk)
+
+        if bulk:
+            self._vocabulary.sort()
+            for word, buids in self._postings.items():
+                if len(buids) >= PREBUILD_RANKED_SIZE:
+                    self._ranked(word)
+
+    def _match_words(self, query_word):
+        ''' Returns {vocabulary word: match quality} for a query word. '''
+        matches = {}
+
+        i = bisect.bisect_left(self._vocabulary, query_word)
+        while i < len(self._vocabulary) and self._vocabulary[i].startswith(query_word):
+            word = self._vocabulary[i]
+            matches[word] = EXACT_MATCH if word == query_word else PREFIX_MATCH
+            i += 1
+
+        if not matches and len(query_word) >= 3:
+            query_trigrams = _trigrams(query_word)
+            counts = collections.Counter()
+            for trigram in query_trigrams:
+                counts.update(self._word_trigrams.get(trigram, ()))
+
+            for word, count in counts.items():
+                similarity = count / len(query_trigrams | _trigrams(word))
+                if similarity >= self.min_similarity:
+                    matches[word] = FUZZY_MATCH * similarity
+
+        return matches
+
+    def _rank_key(self, buid):
+        return self._lengths[buid], buid
+
+    def _ranked_position(self, ranked, buid):
+        ''' Position of buid in a ranked postings list (bisect by rank key). '''
+        key = self._rank_key(buid)
+        lo, hi = 0, len(ranked)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._rank_key(ranked[mid]) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _ranked(self, word):
+        ''' Postings of word, shortest names first (cached until the postings change). '''
+        ranked = self._ranked_postings.get(word, None)
+        if ranked is None:
+            ranked = sorted(self._postings[word], key=self._rank_key)
+            self._ranked_postings[word] = ranked
+            self._owned.add(('ranked', word))
+        return ranked
+
+    def _union(self, matches):
+        postings = [self._postings[word] for word in matches]
+        return postings[0] if len(postings) == 1 else set().union(*postings)
+
+    def _quality(self, buid, matches):
+        return max((quality for word, quality in matches.items() if buid in self._postings[word]), default=None)
+
+    def search(self, text, limit=10):
+        ''' Returns up to limit (buid, score) tuples, best match first. The score is at most 1. '''
+        query_words = list(dict.fromkeys(word.lower() for word in _SEPARATORS.split(text) if word))
+        if not query_words or limit < 1:
+            return []
+
+        matches = [self._match_words(word) for word in query_words]
+        if not all(matches):
+            return []
+
+        # the query word with the fewest candidates drives the search, the others are checked per candidate
+        sizes = [sum(len(self._postings[word]) for word in word_matches) for word_matches in matches]
+        driver = matches.pop(sizes.index(min(sizes)))
+        others_max = sum(max(word_matches.values()) for word_matches in matches)
+
+        # candidates have to match all other query words
+        others = [self._union(word_matches) for word_matches in matches]
+        candidates = min(others, key=len).intersection(*others) if others else None
+
+        best = []
+        seen = set()
+        for tier in sorted(set(driver.values()), reverse=True):
+            words = [word for word, quality in driver.items() if quality == tier]
+            for buid in heapq.merge(*[self._ranked(word) for word in words], key=self._rank_key):
+                if buid in seen or (candidates is not None and buid not in candidates):
+                    continue
+                seen.add(buid)
+
+                # no candidate from here on can rank before the current results
+                bound = (-(tier + others_max),) + self._rank_key(buid)
+                if len(best) == limit and best[-1][0] < bound:
+                    break
+
+                score = tier + sum(self._quality(buid, word_matches) for word_matches in matches)
+                bisect.insort(best, ((-score,) + self._rank_key(buid), buid))
+                del best[limit:]
+            else:
+                continue
+            break
+
+        n = len(query_words)
+        return [(buid, -key[0] / n) for key, buid in best]
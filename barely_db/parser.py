@@ -10,6 +10,8 @@ import os
 import copy
 
 import json
+import functools
+import threading
 
 # import yaml
 import re
@@ -18,7 +20,9 @@ from pathlib import Path, PureWindowsPath
 from collections import OrderedDict
 from collections.abc import Sequence, Container
 
-__all__ = ['GenericBUIDParser']
+from .buid import BUID
+
+__all__ = ['GenericBUIDParser', 'ParseCache']
 
 # create logger
 module_logger = logging.getLogger(__name__)
@@ -34,17 +38,148 @@ def _reload_module():
     importlib.reload(current_module)
 
 
+# generic BUID type part at the start of the BUID regexes
+_GENERIC_TYPE_PATTERN = r'([a-zA-Z]{2,3})'
+
+
+@functools.lru_cache(maxsize=None)
+def _type_aware_regex(pattern, buid_types):
+    ''' Compiles pattern with the generic type part replaced by an alternation of buid_types.
+
+    BUIDs of other types are matched by a second branch without groups, such
+    that they consume the same text as before (including a component) and
+    leave group 1 unset. At each position, the known branch only matches
+    where the generic pattern would find the same BUID. Types that the
+    generic pattern cannot match are left out.
+    '''
+
+    def letters(buid_type):
+        return ''.join(f'[{c.lower()}{c}]' for c in buid_type)
+
+    matchable = [t for t in buid_types if 2 <= len(t) <= 3 and t.isascii() and t.isalpha() and t.isupper()]
+    known = '|'.join(letters(t) for t in sorted(matchable, key=len, reverse=True)) or '(?!)'
+
+    rest = pattern[len(_GENERIC_TYPE_PATTERN) :]
+    unknown_rest = re.sub(r'\((?!\?)', '(?:', rest)
+    return re.compile(f'({known}){rest}|{_GENERIC_TYPE_PATTERN[1:-1]}{unknown_rest}')
+
+
+class ParseCache(object):
+    ''' Thread-safe LRU cache of parse results, bounded to maxsize entries. '''
+
+    def __init__(self, maxsize=1024):
+        if maxsize < 1:
+            raise ValueError(f'Cache size must be positive, not {maxsize}!')
+
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def info(self):
+        return dict(hits=self.hits, misses=self.misses, evictions=self.evictions, size=len(self), maxsize=self.maxsize)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __reduce__(self):
+        # the cached results are not pickled
+        return self.__class__, (self.maxsize,)
+
+    def __repr__(self):
+        return f'{self.__class__.__qualname__}({len(self)}/{self.maxsize}, {self.hits} hits, {self.misses} misses)'
+
+
+_MISSING = object()
+
+
+def _cached(method):
+    ''' Looks up the result of the parse method in the cache of the parser first (if it has one). '''
+    name = method.__name__
+
+    @functools.wraps(method)
+    def wrapper(self, buid_str):
+        cache = self._cache
+        if cache is None or self.ignore_unknown is None:
+            # ignore_unknown = None warns about unknown types at every parse
+            return method(self, buid_str)
+
+        flags = (self.mode, self.ignore_unknown, self.allow_components, self.warn_empty, self.as_buid)
+        key = (name, buid_str if isinstance(buid_str, str) else str(buid_str), flags)
+        result = cache.get(key, _MISSING)
+        if result is _MISSING:
+            result = method(self, buid_str)
+            # results that come with a warning (not found, not unique) are parsed again
+            if (result is not None and result != (None, None)) or not (self.warn_empty or self.mode == 'unique'):
+                cache.put(key, tuple(result) if isinstance(result, list) else result)
+            return result
+
+        return list(result) if self.mode in ['all', 'all_unique'] else result
+
+    return wrapper
+
+
 class GenericBUIDParser(object):
     # class variables
     buid_types = {}
+    _buid_type_set = frozenset()
+    _buid_type_key = ()
+    _cache = None
+    as_buid = False
+
+    # with ignore_unknown and mode 'first', skip unknown types in the regex instead of filtering the matches
+    type_aware_regex = True
 
     buid_regex = re.compile(r'([a-zA-Z]{2,3})(\d{2,5})')
     buid_comp_regex = re.compile(r'([a-zA-Z]{2,3})(\d{2,5})-?([a-zA-Z]{1,2}\d{1,5})?')
     buid_comp_must_regex = re.compile(r'([a-zA-Z]{2,3})(\d{2,5})-([a-zA-Z]{1,2}\d{1,5})')
     buid_comp_only_regex = re.compile(r'([a-zA-Z]{1,2}\d{1,5})')
+    buid_comp_dash_regex = re.compile(r'([a-zA-Z]{2,3})(\d{2,5})(?:-([a-zA-Z]{1,2}\d{1,5}))?')
 
     ignore_unknown = None
 
+    def __init_subclass__(cls, **kwds):
+        super().__init_subclass__(**kwds)
+        cls._set_buid_types(cls, cls.buid_types)
+
+        # compile the type aware regexes with the class instead of at the first parse
+        for regex in [cls.buid_regex, cls.buid_comp_regex, cls.buid_comp_must_regex, cls.buid_comp_dash_regex]:
+            if regex.pattern.startswith(_GENERIC_TYPE_PATTERN):
+                _type_aware_regex(regex.pattern, cls._buid_type_key)
+
+    @staticmethod
+    def _set_buid_types(target, buid_types):
+        # the type set is taken when the parser class (or the restricted parser) is created
+        target._buid_type_set = frozenset(buid_types.values())
+        target._buid_type_key = tuple(sorted(target._buid_type_set))
+
     @classmethod
     def create_class(cls, new_buid_types):
         class _CustomBUIDParser(GenericBUIDParser):
@@ -52,7 +187,16 @@ class GenericBUIDParser(object):
 
         return _CustomBUIDParser
 
-    def __init__(self, ignore_unknown=None, warn_empty=True, mode='unique', allow_components=True, allowed_types=None):
+    def __init__(
+        self,
+        ignore_unknown=None,
+        warn_empty=True,
+        mode='unique',
+        allow_components=True,
+        allowed_types=None,
+        cache_size=None,
+        as_buid=False,
+    ):
         ''' Creates a BUID parser.
         Parameters:
         ignore_unknown = None: Parses unknown BUID types but warns
@@ -66,6 +210,11 @@ class GenericBUIDParser(object):
         mode = 'last': Returns last BUID found
         mode = 'all': Returns all BUIDs
         mode = 'all_unique': Returns all BUIDs, without duplicates
+
+        cache_size = None: Default. Every call parses
+        cache_size = n: Keeps the results for the last n inputs (LRU), ignored for ignore_unknown = None
+
+        as_buid = True: Returns BUID objects instead of strings from parse and parse_with_component
         '''
 
         if allowed_types is None:
@@ -77,18 +226,29 @@ class GenericBUIDParser(object):
                 ignore_unknown = True
 
             self.buid_types = {k: v for k, v in self.buid_types.items() if v in allowed_types}
+            self._set_buid_types(self, self.buid_types)
             # module_logger.debug(f'Buid parsing restricted to types {self.buid_types.values()}')
 
         self.ignore_unknown = ignore_unknown
         self.warn_empty = warn_empty
         self.mode = mode
         self.allow_components = allow_components
+        self._cache = None if not cache_size else ParseCache(cache_size)
+        self.as_buid = as_buid
+
+    def cache_info(self):
+        ''' Returns hits, misses, evictions and size of the result cache, None without cache. '''
+        return None if self._cache is None else self._cache.info()
+
+    def clear_cache(self):
+        if self._cache is not None:
+            self._cache.clear()
 
     def __call__(self, buid_str):
         return self.parse(buid_str)
 
     def _parse(self, buid_str, regex, formatter):
-        regex_result = self.find(str(buid_str), regex)
+        regex_result = self.find(buid_str if type(buid_str) is BUID else str(buid_str), regex)
 
         if regex_result is None:
             return None
@@ -100,36 +260,36 @@ class GenericBUIDParser(object):
 
         return result
 
+    @_cached
     def parse(self, buid_str):
         regex = self.buid_comp_regex if self.allow_components else self.buid_regex
         result = self._parse(buid_str, regex, self._format_buid_from_regex)
         return result
 
+    @_cached
     def parse_component(self, buid_str):
-        regex = self.buid_comp_must_regex
-
-        def format_component_from_regex(regex_result):
-            if len(regex_result) >= 3 and regex_result[2]:
-                comp_id = f'{regex_result[2]}'
-            else:
-                comp_id = ''
-                module_logger.warning(f'No buid component found when requested!')
+        result = self._parse(buid_str, self.buid_comp_must_regex, self._format_component_from_regex)
+        return result
 
-            return f'{comp_id}'
+    @_cached
+    def parse_with_component(self, buid_str):
+        ''' Parses BUID (without component) and component (or None) in a single pass.
 
-        result = self._parse(buid_str, regex, format_component_from_regex)
-        return result
+        Returns a (buid, component) tuple, (None, None) if no BUID was found.
+        '''
 
-    def parse_type(self, buid_str):
-        regex = self.buid_regex
+        def format_buid_and_component(regex_result):
+            return self._format_buid_from_regex(regex_result[:2]), regex_result[2] or None
 
-        def format_type(regex_result):
-            buid_type = regex_result[0].upper()
-            return f'{buid_type}'
+        result = self._parse(buid_str, self.buid_comp_dash_regex, format_buid_and_component)
+        return (None, None) if result is None else result
 
-        result = self._parse(buid_str, regex, format_type)
+    @_cached
+    def parse_type(self, buid_str):
+        result = self._parse(buid_str, self.buid_regex, self._format_type_from_regex)
         return result
 
+    @_cached
     def parse_type_and_uid(self, buid_str):
         regex = self.buid_regex
 
@@ -140,27 +300,132 @@ class GenericBUIDParser(object):
         result = self._parse(buid_str, regex, format_type_and_uid)
         return result
 
-    def find(self, buid_str, regex):
+    def _parse_many(self, buid_strs, regex, formatter, warn_unknown=False):
+        ''' Parses every item of buid_strs, the warnings are summarized for all items. '''
+        single = self.mode in ['first', 'last', 'unique']
+        find = self._finder(regex)
+
+        results = []
+        empty = []
+        ambiguous = []
+        unknown = collections.Counter()
+        count_unknown = warn_unknown and self.ignore_unknown is None
+
+        for buid_str in buid_strs:
+            res = self._buid_matches(buid_str, regex) if type(buid_str) is BUID else None
+            if res is None:
+                res = find(str(buid_str))
+
+            if count_unknown:
+                unknown.update(r[0].upper() for r in (res[:1] if single else res) if not self.is_known_buid_type(r))
+
+            if not single:
+                results.append([formatter(r) for r in res])
+            elif not res:
+                empty.append(buid_str)
+                results.append(None)
+            elif len(res) > 1 and self.mode == 'unique':
+                ambiguous.append(buid_str)
+                results.append(None)
+            else:
+                results.append(formatter(res[0]))
 
-        res = regex.findall(buid_str)
+        if empty and self.warn_empty:
+            module_logger.warning(f'No valid buid found in {len(empty)} of {len(results)} items, e.g. {empty[:3]}')
+        if ambiguous:
+            module_logger.warning(
+                f'More than one valid buid found in {len(ambiguous)} of {len(results)} items, e.g. {ambiguous[:3]}'
+            )
+        if unknown:
+            module_logger.warning(f'Unknown buid types {dict(unknown)} in {len(results)} items!')
 
-        if self.ignore_unknown:
-            res = [r for r in res if self.is_known_buid_type(r)]
+        return results
 
-        if self.mode in ['all_unique', 'unique']:
-            # res = list(set(res)) # remove duplicates
+    def parse_many(self, buid_strs):
+        ''' Parses all BUIDs of an iterable (e.g. file names), like parse.
 
-            # Remove duplicates but keep order:
-            # https://stackoverflow.com/questions/480214/how-do-you-remove-duplicates-from-a-list-whilst-preserving-order
-            def f7(seq):
-                seen = set()
-                seen_add = seen.add
-                return [x for x in seq if not (x in seen or seen_add(x))]
+        Returns a list aligned with buid_strs (None where nothing was found).
+        The warnings are logged once for all items instead of once per item.
+        '''
+        regex = self.buid_comp_regex if self.allow_components else self.buid_regex
+        formatter = functools.partial(self._format_buid_from_regex, warn_unknown=False)
+        return self._parse_many(buid_strs, regex, formatter, warn_unknown=True)
+
+    def parse_component_many(self, buid_strs):
+        ''' Like parse_component for all items of buid_strs, see parse_many. '''
+        return self._parse_many(buid_strs, self.buid_comp_must_regex, self._format_component_from_regex)
+
+    def parse_type_many(self, buid_strs):
+        ''' Like parse_type for all items of buid_strs, see parse_many. '''
+        return self._parse_many(buid_strs, self.buid_regex, self._format_type_from_regex)
+
+    def _buid_matches(self, buid, regex):
+        ''' Returns the regex results in a BUID from its parts, None if the string has to be searched. '''
+        regex_result = buid._regex_result()
+        if regex.groups == 2:
+            component = regex_result[2]
+            if len(component) > 3 and component[1] > '9':
+                # the component (e.g. QA12) is a BUID of its own for regexes without component
+                return None
+            regex_result = regex_result[:2]
+        elif regex is self.buid_comp_must_regex and not regex_result[2]:
+            return []
+
+        if self.ignore_unknown and not self.is_known_buid_type(regex_result):
+            return []
+        return [regex_result]
+
+    def _finder(self, regex):
+        ''' Returns a function that finds the regex results in a string, reduced according to mode. '''
+        if (
+            self.mode == 'first'
+            and self.ignore_unknown
+            and self.type_aware_regex
+            and regex.pattern.startswith(_GENERIC_TYPE_PATTERN)
+        ):
+            # stop at the first match of a known type, unknown types are skipped by the regex
+            finditer = _type_aware_regex(regex.pattern, self._buid_type_key).finditer
+
+            def find_first_known(buid_str):
+                for match in finditer(buid_str):
+                    if match.start(1) >= 0:
+                        return [match.groups('')]
+                return []
+
+            return find_first_known
+
+        if self.mode == 'first' and not self.ignore_unknown:
+            search = regex.search
+
+            def find_first(buid_str):
+                match = search(buid_str)
+                return [] if match is None else [match.groups('')]
+
+            return find_first
+
+        # all matches are needed, findall with a set-based filter beats the alternation of the types
+        findall = regex.findall
+        is_known = self.is_known_buid_type if self.ignore_unknown else None
+        unique = self.mode in ['all_unique', 'unique']
+        last = self.mode in ['last']
+
+        def find_all(buid_str):
+            res = findall(buid_str)
+            if is_known is not None:
+                res = [r for r in res if is_known(r)]
+            if unique:
+                # remove duplicates but keep order
+                res = list(dict.fromkeys(res))
+            if last:
+                res.reverse()
+            return res
 
-            res = f7(res)
+        return find_all
 
-        if self.mode in ['last']:
-            res.reverse()
+    def find(self, buid_str, regex):
+        res = self._buid_matches(buid_str, regex) if type(buid_str) is BUID else None
+        if res is None:
+            res = self._finder(regex)(str(buid_str))
 
         if len(res) == 0:
             if self.mode in ['first', 'last', 'unique']:
@@ -180,12 +445,24 @@ class GenericBUIDParser(object):
             return res
 
     def is_known_buid_type(self, regex_result):
+        return regex_result[0].upper() in self._buid_type_set
+
+    @staticmethod
+    def _format_component_from_regex(regex_result):
+        if len(regex_result) >= 3 and regex_result[2]:
+            comp_id = f'{regex_result[2]}'
+        else:
+            comp_id = ''
+            module_logger.warning(f'No buid component found when requested!')
+
+        return f'{comp_id}'
+
+    @staticmethod
+    def _format_type_from_regex(regex_result):
         buid_type = regex_result[0].upper()
-        return buid_type in self.buid_types.values()
+        return f'{buid_type}'
 
-    def _format_buid_from_regex(
-        self, regex_result,
-    ):
+    def _format_buid_from_regex(self, regex_result, warn_unknown=True):
         buid_type = regex_result[0].upper()
         buid_id = int(regex_result[1])
         if len(regex_result) >= 3 and regex_result[2]:
@@ -193,11 +470,12 @@ class GenericBUIDParser(object):
         else:
             comp_id = ''
 
-        if self.ignore_unknown is None:
+        if self.ignore_unknown is None and warn_unknown:
             if not self.is_known_buid_type(regex_result):
                 module_logger.warning(f'Unknown buid type {buid_type} in {repr(regex_result)}!')
 
-        return '{}{:04d}{}'.format(buid_type, buid_id, comp_id)
+        buid = '{}{:04d}{}'.format(buid_type, buid_id, comp_id)
+        return BUID._from_normalized(buid) if self.as_buid else buid
 
     def format(self, buid_type, buid_id, component=None):
         regex_result = [buid_type, buid_id]
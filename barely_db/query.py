@@ -0,0 +1,210 @@
+import logging
+import bisect
+import collections
+
+__all__ = ['EntityQueryIndex', 'FreeIdIndex', 'split_buid', 'columns_to_table']
+
+# create logger
+module_logger = logging.getLogger(__name__)
+module_logger.setLevel(logging.DEBUG)
+
+
+# general useful module components
+def _reload_module():
+    import sys
+    import importlib
+
+    current_module = sys.modules[__name__]
+    module_logger.info('Reloading module %s' % __name__)
+    importlib.reload(current_module)
+
+
+_DIGITS = '0123456789'
+
+# BUIDs are formatted with four digits, ids are allocated below this limit
+MAX_BUID_ID = 9999
+
+
+def split_buid(buid):
+    ''' Splits a normalized BUID (e.g. WB0012) into type and numeric id ('WB', 12). '''
+    buid_type = buid.rstrip(_DIGITS)
+    return buid_type, int(buid[len(buid_type) :])
+
+
+def entity_name(folder_name, buid):
+    ''' Name of an entity from its folder name (see BarelyDB.get_entity_name). '''
+    name = folder_name.replace(buid, '')
+    if name and name[0] in [' ', '_']:
+        name = name[1:]
+    return name
+
+
+class EntityQueryIndex(object):
+    ''' In-memory index of the entities of an EntityPathIndex by type, numeric id and name.
+
+    The index is a snapshot: it is built from the entity index at a given
+    version and rebuilt by BarelyDB when the entity index changes. It keeps
+    that entity index, such that paths are read from the same state.
+    '''
+
+    def __init__(self, entity_paths):
+        self.entity_paths = entity_paths
+        self.version = entity_paths.version
+
+        by_type = collections.defaultdict(list)
+        self.names = {}
+        for buid in entity_paths:
+            buid_type, buid_id = split_buid(buid)
+            by_type[buid_type].append((buid_id, buid))
+            self.names[buid] = entity_name(entity_paths.location(buid)[1], buid)
+
+        self.ids = {}
+        self.buids = {}
+        for buid_type in sorted(by_type):
+            items = sorted(by_type[buid_type])
+            self.ids[buid_type] = [buid_id for buid_id, _ in items]
+            self.buids[buid_type] = [buid for _, buid in items]
+
+    @property
+    def types(self):
+        return list(self.buids.keys())
+
+    def select(self, types=None, id_range=None):
+        ''' Iterates the BUIDs of the given types (all if None), ordered by type and id.
+
+        id_range = (first, last) restricts the numeric ids (inclusive, None is open).
+        '''
+        types = self.types if types is None else [t for t in types if t in self.buids]
+
+        for buid_type in types:
+            ids = self.ids[buid_type]
+            buids = self.buids[buid_type]
+
+            start, stop = 0, len(ids)
+            if id_range is not None:
+                first, last = id_range
+                if first is not None:
+                    start = bisect.bisect_left(ids, first)
+                if last is not None:
+                    stop = bisect.bisect_right(ids, last)
+
+            for i in range(start, stop):
+                yield buids[i]
+
+
+def columns_to_table(columns, backend=None):
+    ''' Converts {column: list} to a table of the given backend.
+
+    backend = 'pandas': pandas DataFrame
+    backend = 'numpy': {column: numpy array}, numeric columns as int64, others as object arrays
+    backend = 'lists': the column lists unchanged
+    backend = None: pandas if installed, else numpy if installed, else lists
+    '''
+    if backend is None:
+        for backend in ['pandas', 'numpy', 'lists']:
+            try:
+                return columns_to_table(columns, backend=backend)
+            except ImportError:
+                pass
+
+    if backend == 'lists':
+        return columns
+    elif backend not in ['numpy', 'pandas']:
+        raise ValueError(f'Unknown table backend {backend}!')
+
+    import numpy as np
+
+    def to_array(values):
+        if values and all(isinstance(v, int) for v in values):
+            return np.array(values, dtype=np.int64)
+        array = np.empty(len(values), dtype=object)
+        array[:] = values
+        return array
+
+    arrays = {column: to_array(values) for column, values in columns.items()}
+    if backend == 'numpy':
+        return arrays
+    else:
+        import pandas as pd
+
+        return pd.DataFrame(arrays)
+
+
+class FreeIdIndex(object):
+    ''' Sorted used ids per BUID type, answers "next free ids after X" without scanning the entities. '''
+
+    def __init__(self, buids=()):
+        ids = collections.defaultdict(list)
+        for buid in buids:
+            buid_type, buid_id = split_buid(buid)
+            ids[buid_type].append(buid_id)
+
+        self.ids = {buid_type: sorted(set(type_ids)) for buid_type, type_ids in ids.items()}
+
+    def copy(self):
+        free_id_index = self.__class__()
+        free_id_index.ids = {buid_type: list(type_ids) for buid_type, type_ids in self.ids.items()}
+        return free_id_index
+
+    # the id lists are replaced instead of modified, such that concurrent lookups see a consistent list
+
+    def add(self, buid):
+        buid_type, buid_id = split_buid(buid)
+        type_ids = self.ids.get(buid_type, [])
+        i = bisect.bisect_left(type_ids, buid_id)
+        if i == len(type_ids) or type_ids[i] != buid_id:
+            self.ids[buid_type] = type_ids[:i] + [buid_id] + type_ids[i:]
+
+    def remove(self, buid):
+        buid_type, buid_id = split_buid(buid)
+        type_ids = self.ids.get(buid_type, [])
+        i = bisect.bisect_left(type_ids, buid_id)
+        if i < len(type_ids) and type_ids[i] == buid_id:
+            self.ids[buid_type] = type_ids[:i] + type_ids[i + 1 :]
+
+    def __contains__(self, buid):
+        buid_type, buid_id = split_buid(buid)
+        type_ids = self.ids.get(buid_type, [])
+        i = bisect.bisect_left(type_ids, buid_id)
+        return i < len(type_ids) and type_ids[i] == buid_id
+
+    def free_ids(self, buid_type, start, count=1, contiguous=True, stop=MAX_BUID_ID):
+        ''' Returns count free ids >= start and < stop (the first contiguous run if contiguous).
+
+        Runs of used ids are skipped by bisection (id - position is constant
+        within a run), so only the gaps between start and the result are
+        visited. Returns fewer ids if there is not enough room below stop.
+        '''
+        type_ids = self.ids.get(buid_type, [])
+        i = bisect.bisect_left(type_ids, start)
+
+        found = []
+        candidate = start
+        while candidate < stop and len(found) < count:
+            if i < len(type_ids) and type_ids[i] == candidate:
+                # skip to the end of the run of used ids starting at candidate
+                offset = candidate - i
+                lo, hi = i, len(type_ids)
+                while lo < hi:
+                    mid = (lo + hi) // 2
+                    if type_ids[mid] - mid == offset:
+                        lo = mid + 1
+                    else:
+                        hi = mid
+                i = lo
+                candidate = type_ids[i - 1] + 1
+                continue
+
+            next_used = type_ids[i] if i < len(type_ids) else stop
+            gap = min(next_used, stop) - candidate
+
+            if contiguous:
+                if gap >= count:
+                    return list(range(candidate, candidate + count))
+            else:
+                found.extend(range(candidate, candidate + min(gap, count - len(found))))
+
+            candidate = next_used + 1
+            i += 1
+
+        return found
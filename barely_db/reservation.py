@@ -0,0 +1,155 @@
+import logging
+import collections
+import threading
+
+from pathlib import Path
+
+from .query import split_buid, MAX_BUID_ID
+
+__all__ = ['BUIDReservation', 'RESERVATION_DIR', 'DEFAULT_BLOCK_SIZE']
+
+# create logger
+module_logger = logging.getLogger(__name__)
+module_logger.setLevel(logging.DEBUG)
+
+
+# general useful module components
+def _reload_module():
+    import sys
+    import importlib
+
+    current_module = sys.modules[__name__]
+    module_logger.info('Reloading module %s' % __name__)
+    importlib.reload(current_module)
+
+
+# directory below each type path that holds the reservation markers
+RESERVATION_DIR = '.bdb_reserved'
+
+DEFAULT_BLOCK_SIZE = 32
+
+
+class BUIDReservation(object):
+    ''' BUIDs of one type reserved for this process, safe against other processes.
+
+    Ids are reserved in blocks of block_size: block k covers the ids
+    [k * block_size, (k + 1) * block_size) and is owned by whoever creates its
+    marker directory (e.g. Webs/.bdb_reserved/WB0032-WB0063) first. mkdir is
+    atomic, also on network shares, so concurrent workers never get the same
+    block. Within a block, ids of existing entities are skipped (the type
+    directory is listed once per claimed block).
+
+    All workers have to reserve their BUIDs, create_new_entity(after=...)
+    does not look at the markers. release() removes the markers, the unused
+    ids become available again. Markers of crashed workers can be removed
+    with BarelyDB.clear_buid_reservations().
+    '''
+
+    def __init__(self, bdb, after, block_size=DEFAULT_BLOCK_SIZE):
+        buid, _ = bdb.buid_entity_parser.parse_with_component(after)
+        if buid is None:
+            raise ValueError(f'Invalid BUID {after}!')
+
+        self.bdb = bdb
+        self.buid_type, self.start = split_buid(buid)
+        self.block_size = block_size
+        self.blocks = []
+
+        self._free = collections.deque()
+        self._next_block = self.start // block_size
+        self._lock = threading.Lock()
+
+    @property
+    def reservation_path(self):
+        return Path(self.bdb.get_buid_type_path(self.buid_type)).joinpath(RESERVATION_DIR)
+
+    def _block_name(self, first, last):
+        formatter = self.bdb.buid_entity_parser
+        return f'{formatter.format(self.buid_type, first)}-{formatter.format(self.buid_type, last)}'
+
+    def _used_ids(self):
+        ''' Ids of the type that are taken, by the index and by the type directory right now. '''
+        used = set(self.bdb._get_free_id_index(self.buid_type).ids.get(self.buid_type, []))
+
+        type_path = self.bdb.get_buid_type_path(self.buid_type)
+        for entry in self.bdb.walker.scandir(str(type_path)):
+            buid = self.bdb.buid_scan(entry.name)
+            if buid is not None:
+                buid_type, buid_id = split_buid(buid)
+                if buid_type == self.buid_type:
+                    used.add(buid_id)
+
+        return used
+
+    def _claim_block(self):
+        ''' Reserves the next block with free ids, returns False if there is none. '''
+        walker = self.bdb.walker
+        free_id_index = self.bdb._get_free_id_index(self.buid_type)
+        walker.mkdir(str(self.reservation_path), exist_ok=True)
+
+        while self._next_block * self.block_size < MAX_BUID_ID:
+            block = self._next_block
+            self._next_block += 1
+
+            first = max(block * self.block_size, self.start)
+            stop = min((block + 1) * self.block_size, MAX_BUID_ID)
+            if not free_id_index.free_ids(self.buid_type, first, count=stop - first, contiguous=False, stop=stop):
+                continue
+
+            marker = self.reservation_path.joinpath(self._block_name(block * self.block_size, stop - 1))
+            try:
+                walker.mkdir(str(marker), exist_ok=False)
+            except FileExistsError:
+                continue
+
+            self.blocks.append(marker)
+            used = self._used_ids()
+            free = [buid_id for buid_id in range(first, stop) if buid_id not in used]
+            if free:
+                self._free.extend(free)
+                return True
+
+        return False
+
+    def take(self, count=1):
+        ''' Returns count reserved BUIDs, new blocks are reserved as needed. '''
+        with self._lock:
+            while len(self._free) < count:
+                if not self._claim_block():
+                    raise ValueError(f'Not enough free ids for {count} entities of type {self.buid_type}!')
+
+            buid_ids = [self._free.popleft() for _ in range(count)]
+
+        return [self.bdb.buid_entity_parser.format(self.buid_type, buid_id) for buid_id in buid_ids]
+
+    def create_new_entities(self, entities, workers=None):
+        ''' Like BarelyDB.create_new_entities, entities without buid get reserved BUIDs. '''
+        entities = [dict(entity) for entity in entities]
+        missing = [entity for entity in entities if not entity.get('buid', None)]
+        for entity, buid in zip(missing, self.take(len(missing))):
+            entity['buid'] = buid
+
+        return self.bdb.create_new_entities(entities, workers=workers)
+
+    def create_new_entity(self, *, name, components=None):
+        return self.create_new_entities([dict(name=name, components=components)])[0]
+
+    def release(self):
+        ''' Removes the markers of the reserved blocks, unused BUIDs are given up. '''
+        with self._lock:
+            for marker in self.blocks:
+                try:
+                    self.bdb.walker.rmdir(str(marker))
+                except FileNotFoundError:
+                    pass
+            self.blocks = []
+            self._free.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+    def __repr__(self):
+        return f'{self.__class__.__qualname__}({self.buid_type}, {len(self.blocks)} blocks, {len(self._free)} free)'
@@ -0,0 +1,119 @@
+import logging
+import typing
+import attr
+import cattr
+
+import os
+import time
+import json
+
+from pathlib import Path
+
+__all__ = ['EntityIndexSnapshot', 'ScanDirRecord', 'RefreshResult']
+
+# create logger
+module_logger = logging.getLogger(__name__)
+module_logger.setLevel(logging.DEBUG)
+
+
+# general useful module components
+def _reload_module():
+    import sys
+    import importlib
+
+    current_module = sys.modules[__name__]
+    module_logger.info('Reloading module %s' % __name__)
+    importlib.reload(current_module)
+
+
+SNAPSHOT_VERSION = 1
+
+# folder for snapshot files that are configured in a scan directory
+SNAPSHOT_DIR = '.bdb_snapshot'
+
+# Directory mtimes are only trusted if they are older than the scan by at least
+# this margin. Coarse timestamp resolutions (FAT, SMB shares) could otherwise
+# hide a change that happened in the same tick as the scan.
+MTIME_TRUST_MARGIN_NS = 2 * 10 ** 9
+
+
+def mtime_is_trusted(mtime_ns, listed_ns):
+    ''' True if the mtime of a directory listed at listed_ns (time.time_ns) is old enough to show later changes. '''
+    return mtime_ns < listed_ns - MTIME_TRUST_MARGIN_NS
+
+
+@attr.s(frozen=True, kw_only=True)
+class ScanDirRecord:
+    ''' Result of scanning a single directory that holds entity folders (e.g. a type directory). '''
+
+    mtime_ns = attr.ib(type=int)
+    scanned_ns = attr.ib(type=int)
+    entities = attr.ib(factory=list, type=typing.List[typing.Tuple[str, str]])
+
+    @property
+    def is_trusted(self):
+        ''' True if the recorded mtime can be used to detect changes reliably. '''
+        return mtime_is_trusted(self.mtime_ns, self.scanned_ns)
+
+    def is_current(self, mtime_ns):
+        return self.is_trusted and self.mtime_ns == mtime_ns
+
+    def with_entity(self, buid, name):
+        ''' Returns a copy with an added entity. The mtime is invalidated, such that the next refresh rescans. '''
+        return attr.evolve(self, mtime_ns=-1, entities=self.entities + [(buid, name)])
+
+
+@attr.s(frozen=True, kw_only=True)
+class RefreshResult:
+    ''' Changes found by BarelyDB.refresh(). '''
+
+    added = attr.ib(factory=list, type=typing.List[str])
+    removed = attr.ib(factory=list, type=typing.List[str])
+    moved = attr.ib(factory=list, type=typing.List[str])
+    rescanned = attr.ib(factory=list, type=typing.List[str])
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.moved)
+
+
+@attr.s(frozen=True, kw_only=True)
+class EntityIndexSnapshot:
+    ''' Versioned on-disk snapshot of the entity index of a BarelyDB.
+
+    Paths are stored relative to the base path of the database (as posix
+    strings), such that the snapshot remains valid when the database is
+    mounted at a different location. entity_paths, the type paths and the
+    duplicate counters are derived from the scan_dirs records when the
+    snapshot is applied.
+    '''
+
+    version = attr.ib(default=SNAPSHOT_VERSION, type=int)
+    path_depth = attr.ib(type=int)
+    buid_types = attr.ib(factory=dict, type=typing.Dict[str, str])
+    scan_dirs = attr.ib(factory=dict, type=typing.Dict[str, ScanDirRecord])
+
+    def is_compatible(self, path_depth, buid_types):
+        return self.version == SNAPSHOT_VERSION and self.path_depth == path_depth and self.buid_types == buid_types
+
+    def save(self, filename):
+        ''' Writes the snapshot atomically, such that concurrent readers never see a partial file. '''
+        filename = Path(filename)
+        temp_filename = filename.with_name(f'{filename.name}.{os.getpid()}.{time.time_ns()}.tmp')
+
+        try:
+            with open(temp_filename, 'w') as f:
+                json.dump(cattr.unstructure(self), f)
+            os.replace(temp_filename, filename)
+        finally:
+            if temp_filename.exists():
+                temp_filename.unlink()
+
+    @classmethod
+    def load(cls, filename):
+        with open(filename, 'rb') as f:
+            self_dict = json.load(f)
+
+        if self_dict.get('version', None) != SNAPSHOT_VERSION:
+            raise ValueError(f'Unsupported snapshot version {self_dict.get("version", None)}!')
+
+        return cattr.structure(self_dict, cls)
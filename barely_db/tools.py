@@ -166,8 +166,7 @@ class BarelyDBSyncer(object):
             counter += 1
 
             if copy_components:
-                ent = self.bdb_source.get_entity(buid)
-                comp_paths = ent.get_component_paths()
+                comp_paths = self.bdb_source.get_component_paths(buid)
                 for comp_buid, comp_path in comp_paths.items():
                     self.mkdir_from_source(comp_path)
                     counter += 1
@@ -0,0 +1,226 @@
+import logging
+import collections
+import os
+import time
+import fnmatch
+import threading
+
+from pathlib import Path
+
+__all__ = ['WalkEntry', 'ScandirWalker', 'PathlibWalker', 'MemoryWalker']
+
+# create logger
+module_logger = logging.getLogger(__name__)
+module_logger.setLevel(logging.DEBUG)
+
+
+# general useful module components
+def _reload_module():
+    import sys
+    import importlib
+
+    current_module = sys.modules[__name__]
+    module_logger.info('Reloading module %s' % __name__)
+    importlib.reload(current_module)
+
+
+# is_dir is None if the backend does not know the type of the entry without an extra stat.
+WalkEntry = collections.namedtuple('WalkEntry', ['name', 'path', 'is_dir'])
+
+
+def _is_simple_pattern(pattern):
+    return '/' not in pattern and os.sep not in pattern and '**' not in pattern
+
+
+def _fnmatch_function():
+    # pathlib globbing is case insensitive on windows only
+    return fnmatch.fnmatch if os.name == 'nt' else fnmatch.fnmatchcase
+
+
+class ScandirWalker(object):
+    ''' Tree walker based on os.scandir.
+
+    All paths are plain strings. The type of an entry is taken from the
+    DirEntry (d_type), such that listing a directory does not stat each entry.
+    The stats counter keeps track of the filesystem calls issued by the walker.
+    '''
+
+    def __init__(self):
+        self.stats = collections.Counter()
+
+    def scandir(self, path):
+        self.stats['scandir'] += 1
+        with os.scandir(path) as it:
+            return [WalkEntry(entry.name, entry.path, entry.is_dir()) for entry in it]
+
+    def is_dir(self, path):
+        self.stats['stat'] += 1
+        return os.path.isdir(path)
+
+    def exists(self, path):
+        self.stats['stat'] += 1
+        return os.path.exists(path)
+
+    def mtime_ns(self, path):
+        self.stats['stat'] += 1
+        return os.stat(path).st_mtime_ns
+
+    def mkdir(self, path, exist_ok=True):
+        self.stats['mkdir'] += 1
+        try:
+            os.mkdir(path)
+        except FileExistsError:
+            if not (exist_ok and os.path.isdir(path)):
+                raise
+
+    def rmdir(self, path):
+        self.stats['rmdir'] += 1
+        os.rmdir(path)
+
+    def glob(self, path, pattern):
+        ''' Returns the entries in path that match pattern (like Path.glob, in listing order). '''
+        path = str(path)
+
+        if not _is_simple_pattern(pattern):
+            self.stats['glob'] += 1
+            return [WalkEntry(p.name, str(p), None) for p in Path(path).glob(pattern)]
+
+        try:
+            entries = self.scandir(path)
+        except (FileNotFoundError, NotADirectoryError):
+            return []
+
+        match = _fnmatch_function()
+        return [entry for entry in entries if match(entry.name, pattern)]
+
+
+class PathlibWalker(ScandirWalker):
+    ''' Tree walker based on pathlib (iterdir + is_dir per entry). '''
+
+    def scandir(self, path):
+        self.stats['scandir'] += 1
+        return [WalkEntry(p.name, str(p), None) for p in Path(path).iterdir()]
+
+    def glob(self, path, pattern):
+        self.stats['glob'] += 1
+        return [WalkEntry(p.name, str(p), None) for p in Path(path).glob(pattern)]
+
+
+class MemoryWalker(ScandirWalker):
+    ''' In-memory directory tree, e.g. for tests.
+
+    The tree is given as nested dicts below root, where a dict is a directory
+    and None is a file: {'Webs': {'WB0001_web': {'-Q1': {}, 'data.yaml': None}}}.
+    Modification times are a logical clock that starts in the past, such that
+    mtime based change detection trusts them.
+    '''
+
+    def __init__(self, root, tree=None):
+        super().__init__()
+        self.root = os.path.normpath(str(root))
+        self.tree = {} if tree is None else tree
+        self._lock = threading.RLock()
+        self._clock = time.time_ns() - 3600 * 10**9
+        self._mtimes = {}
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
+
+    def _split(self, path):
+        rel = os.path.relpath(os.path.normpath(str(path)), self.root)
+        if rel == os.curdir:
+            return []
+        if rel.startswith(os.pardir):
+            raise FileNotFoundError(f'{path} is not inside {self.root}')
+        return rel.split(os.sep)
+
+    def _node(self, path):
+        node = self.tree
+        for part in self._split(path):
+            if not isinstance(node, dict) or part not in node:
+                raise FileNotFoundError(str(path))
+            node = node[part]
+        return node
+
+    def _touch(self, path):
+        self._clock += 1
+        self._mtimes[os.path.normpath(str(path))] = self._clock
+
+    def scandir(self, path):
+        self.stats['scandir'] += 1
+        with self._lock:
+            node = self._node(path)
+            if not isinstance(node, dict):
+                raise NotADirectoryError(str(path))
+            return [
+                WalkEntry(name, os.path.join(str(path), name), isinstance(sub, dict)) for name, sub in node.items()
+            ]
+
+    def is_dir(self, path):
+        self.stats['stat'] += 1
+        with self._lock:
+            try:
+                return isinstance(self._node(path), dict)
+            except FileNotFoundError:
+                return False
+
+    def exists(self, path):
+        self.stats['stat'] += 1
+        with self._lock:
+            try:
+                self._node(path)
+                return True
+            except FileNotFoundError:
+                return False
+
+    def mtime_ns(self, path):
+        self.stats['stat'] += 1
+        with self._lock:
+            self._node(path)
+            return self._mtimes.get(os.path.normpath(str(path)), 0)
+
+    def mkdir(self, path, exist_ok=True):
+        self.stats['mkdir'] += 1
+        with self._lock:
+            parent, name = os.path.split(os.path.normpath(str(path)))
+            parent_node = self._node(parent)
+            if name in parent_node:
+                if exist_ok and isinstance(parent_node[name], dict):
+                    return
+                raise FileExistsError(str(path))
+            parent_node[name] = {}
+            self._touch(parent)
+
+    def rmdir(self, path):
+        self.stats['rmdir'] += 1
+        with self._lock:
+            parent, name = os.path.split(os.path.normpath(str(path)))
+            parent_node = self._node(parent)
+            node = parent_node.get(name, None)
+            if not isinstance(node, dict):
+                raise FileNotFoundError(str(path))
+            if node:
+                raise OSError(f'Directory not empty: {path}')
+            del parent_node[name]
+            self._touch(parent)
+
+    def glob(self, path, pattern):
+        if not _is_simple_pattern(pattern):
+            raise NotImplementedError(f'{self.__class__.__qualname__} only supports single level patterns!')
+
+        return super().glob(path, pattern)
+
+    def rename(self, src, dst):
+        with self._lock:
+            src_parent, src_name = os.path.split(os.path.normpath(str(src)))
+            dst_parent, dst_name = os.path.split(os.path.normpath(str(dst)))
+            node = self._node(src_parent).pop(src_name)
+            self._node(dst_parent)[dst_name] = node
+            self._touch(src_parent)
+            self._touch(dst_parent)
@@ -0,0 +1,292 @@
+import logging
+import os
+import sys
+import errno
+import select
+import struct
+import threading
+
+__all__ = ['BarelyDBWatcher', 'inotify_available']
+
+# create logger
+module_logger = logging.getLogger(__name__)
+module_logger.setLevel(logging.DEBUG)
+
+
+# general useful module components
+def _reload_module():
+    import sys
+    import importlib
+
+    current_module = sys.modules[__name__]
+    module_logger.info('Reloading module %s' % __name__)
+    importlib.reload(current_module)
+
+
+# inotify constants from <sys/inotify.h>
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+class _Inotify(object):
+    ''' Minimal ctypes binding of the linux inotify API. '''
+
+    def __init__(self):
+        import ctypes
+        import ctypes.util
+
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+
+    def add_watch(self, path, mask=WATCH_MASK):
+        import ctypes
+
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), path)
+        return wd
+
+    def rm_watch(self, wd):
+        self._libc.inotify_rm_watch(self.fd, wd)
+
+    def read_events(self, timeout):
+        ''' Returns a list of (wd, mask, name) tuples, waiting at most timeout seconds for the first event. '''
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        events = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(data[offset : offset + length].rstrip(b'\0'))
+            offset += length
+            events.append((wd, mask, name))
+
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+def inotify_available():
+    if not sys.platform.startswith('linux'):
+        return False
+
+    try:
+        _Inotify().close()
+        return True
+    except (OSError, AttributeError):
+        return False
+
+
+class BarelyDBWatcher(object):
+    ''' Keeps entity_paths and component_paths of a BarelyDB current in a background thread.
+
+    mode = 'inotify': Reacts to inotify events of the scan directories and of
+        the entity folders whose components are cached.
+    mode = 'poll': Checks directory mtimes every interval seconds. Works on any
+        mount (e.g. network drives, where inotify does not see remote changes).
+    mode = 'auto': Default. Uses inotify if available, polling otherwise.
+
+    Changes are applied by rescanning the directories that changed, so other
+    processes' changes become visible within about interval seconds.
+    '''
+
+    def __init__(self, bdb, mode='auto', interval=1.0):
+        if mode == 'auto':
+            mode = 'inotify' if inotify_available() else 'poll'
+
+        if mode not in ['inotify', 'poll']:
+            raise ValueError(f'Unknown watcher mode {mode}!')
+
+        self.bdb = bdb
+        self.mode = mode
+        self.interval = interval
+        self.logger = logging.getLogger(self.__class__.__qualname__)
+
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._component_mtimes = {}
+        self._watches = {}
+        self._watch_warning_logged = False
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return self
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name=f'BarelyDBWatcher({self.bdb.name})', daemon=True)
+        self._thread.start()
+        self.logger.info(f'Watching {self.bdb.base_path} ({self.mode})')
+        return self
+
+    def stop(self, timeout=None):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, traceback):
+        self.stop()
+
+    def _run(self):
+        try:
+            if self.mode == 'inotify':
+                self._run_inotify()
+            else:
+                self._run_poll()
+        except Exception:
+            self.logger.exception('Watcher stopped because of an error!')
+
+    def _refresh_entities(self):
+        result = self.bdb.refresh(verbose=False)
+        for buid in result.removed + result.moved:
+            self._component_mtimes.pop(buid, None)
+        return result
+
+    def _reload_components(self, buid):
+        try:
+            self.bdb.load_components(buid)
+        except (KeyError, FileNotFoundError):
+            # the entity disappeared, the next entity refresh will drop it
+            self.bdb.component_paths.pop(buid, None)
+
+    # polling
+    def _poll_components(self):
+        walker = self.bdb.walker
+
+        for buid in list(self.bdb.component_paths.keys()):
+            try:
+                mtime_ns = walker.mtime_ns(str(self.bdb._entity_paths[buid]))
+            except (KeyError, FileNotFoundError):
+                self.bdb.component_paths.pop(buid, None)
+                self._component_mtimes.pop(buid, None)
+                continue
+
+            if self._component_mtimes.get(buid, None) != mtime_ns:
+                self._reload_components(buid)
+                self._component_mtimes[buid] = mtime_ns
+
+    def _run_poll(self):
+        while not self._stop_event.is_set():
+            self._refresh_entities()
+            self._poll_components()
+            self._stop_event.wait(self.interval)
+
+    # inotify
+    def _add_watch(self, inotify, path, target):
+        try:
+            wd = inotify.add_watch(str(path))
+        except OSError as e:
+            if e.errno == errno.ENOSPC and not self._watch_warning_logged:
+                self.logger.warning('inotify watch limit reached, some folders are not watched!')
+                self._watch_warning_logged = True
+            return
+        self._watches[wd] = target
+
+    def _sync_watches(self, inotify, scan_dirs=False):
+        ''' Watches the directories down to the scan directories and the entity folders with cached components.
+
+        Entity folders that are watched for the first time get their components
+        reloaded, such that changes before the watch was added are not missed.
+        '''
+        bdb = self.bdb
+        watched = {target: wd for wd, target in self._watches.items()}
+
+        if scan_dirs:
+            wanted = {('dir', str(bdb.base_path)): bdb.base_path}
+            level = [str(bdb.base_path)]
+            for _ in range(bdb.path_depth):
+                level = [sub.path for subdirs in bdb._list_subdirs(level) for sub in subdirs]
+                wanted.update({('dir', p): p for p in level})
+        else:
+            wanted = {target: target[1] for target in watched if target[0] == 'dir'}
+
+        entity_paths = bdb._entity_paths
+        for buid in list(bdb.component_paths.keys()):
+            if buid in entity_paths:
+                wanted[('entity', buid)] = entity_paths[buid]
+
+        for target, wd in watched.items():
+            if target not in wanted:
+                inotify.rm_watch(wd)
+                self._watches.pop(wd, None)
+
+        for target, path in wanted.items():
+            if target not in watched:
+                self._add_watch(inotify, path, target)
+                if target[0] == 'entity':
+                    self._reload_components(target[1])
+
+    def _run_inotify(self):
+        inotify = _Inotify()
+
+        try:
+            self._sync_watches(inotify, scan_dirs=True)
+            self._refresh_entities()
+
+            while not self._stop_event.is_set():
+                events = inotify.read_events(self.interval)
+
+                refresh_entities = False
+                reload_components = set()
+                for wd, mask, name in events:
+                    if mask & IN_Q_OVERFLOW:
+                        refresh_entities = True
+                        reload_components.update(self.bdb.component_paths.keys())
+                        continue
+
+                    if mask & IN_IGNORED:
+                        self._watches.pop(wd, None)
+                        continue
+
+                    if not mask & (IN_ISDIR | IN_DELETE_SELF | IN_MOVE_SELF):
+                        # only folders are entities or components
+                        continue
+
+                    kind, target = self._watches.get(wd, (None, None))
+                    if kind == 'dir':
+                        refresh_entities = True
+                    elif kind == 'entity':
+                        reload_components.add(target)
+
+                if refresh_entities:
+                    self._refresh_entities()
+
+                for buid in reload_components:
+                    self._reload_components(buid)
+
+                self._sync_watches(inotify, scan_dirs=refresh_entities)
+        finally:
+            inotify.close()
@@ -0,0 +1,91 @@
+''' Memory of the entity and component path index, in bytes per entity.
+
+Compares the former representation (dict buid -> Path and dict buid ->
+{component: Path}) with EntityPathIndex / ComponentPathIndex, both built
+from the same directory listing. The database lives in a MemoryWalker.
+
+    python benchmarks/bench_index_memory.py [number of entities]
+'''
+import sys
+import gc
+import json
+import tempfile
+import tracemalloc
+
+from pathlib import Path
+
+from barely_db import BarelyDB, MemoryWalker, EntityPathIndex, ComponentPathIndex
+
+
+BUID_TYPES = {'web': 'WB', 'slurry': 'SL', 'cells': 'CL', 'experiment': 'EXP'}
+TYPE_DIRS = {'WB': 'Webs', 'SL': 'Slurries', 'CL': 'Cells', 'EXP': 'Experiments'}
+COMPONENTS_PER_ENTITY = 2
+
+
+def make_tree(n_entities):
+    tree = {type_dir: {} for type_dir in TYPE_DIRS.values()}
+    per_type = -(-n_entities // len(TYPE_DIRS))
+
+    for buid_type, type_dir in TYPE_DIRS.items():
+        for i in range(per_type):
+            components = {f'-Q{c + 1}_quality_{c}': {} for c in range(COMPONENTS_PER_ENTITY)}
+            tree[type_dir][f'{buid_type}{i + 1:05d}_entity_name_{i}'] = components
+
+    return tree
+
+
+def measure(func):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    result = func()
+    gc.collect()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    return result, size
+
+
+def main(n_entities=100000):
+    base_path = Path(tempfile.mkdtemp())
+    with open(base_path.joinpath('bdb_config.json'), 'w') as f:
+        json.dump({'path_depth': 1, 'buid_types': BUID_TYPES}, f)
+
+    walker = MemoryWalker(base_path, make_tree(n_entities))
+    bdb = BarelyDB(base_path=base_path, walker=walker)
+    bdb.logger.setLevel('WARNING')
+    bdb.load_entities(verbose=False, with_components=True)
+
+    # the same listing as plain (buid, directory, folder name) strings
+    locations = [(buid,) + bdb._entity_paths.location(buid) for buid in bdb._entity_paths]
+    components = {buid: bdb.component_paths.names(buid) for buid in bdb.component_paths}
+    n = len(locations)
+
+    def legacy():
+        entity_paths = {buid: base_path.joinpath(key, name) for buid, key, name in locations}
+        component_paths = {
+            buid: {comp: entity_paths[buid].joinpath(name) for comp, name in names}
+            for buid, names in components.items()
+        }
+        return entity_paths, component_paths
+
+    def compact():
+        entity_paths = EntityPathIndex(base_path)
+        for buid, key, name in locations:
+            entity_paths.add(buid, key, name)
+        component_paths = ComponentPathIndex(entity_paths.__getitem__)
+        for buid, names in components.items():
+            component_paths.set_names(buid, names)
+        return entity_paths, component_paths
+
+    _, legacy_size = measure(legacy)
+    _, compact_size = measure(compact)
+
+    print(f'{n} entities with {COMPONENTS_PER_ENTITY} components each')
+    print(f'dict of Path:         {legacy_size / n:8.1f} bytes/entity')
+    print(f'compact index:        {compact_size / n:8.1f} bytes/entity')
+    print(f'ratio:                {legacy_size / compact_size:8.1f}x')
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,68 @@
+''' Latency of fuzzy name lookups (EntityNameIndex.search) on synthetic folder names.
+
+Names consist of 1-4 words drawn from a vocabulary with Zipf distributed
+frequencies, such that frequent words occur in a large part of all names.
+The first search of a word sorts its postings (cold), later searches reuse
+them (warm).
+
+    python benchmarks/bench_name_lookup.py [number of entities] [vocabulary size]
+'''
+import sys
+import time
+import random
+import itertools
+
+from barely_db import EntityNameIndex
+
+
+WORDS = ['anode', 'cathode', 'coating', 'slurry', 'coin', 'cell', 'test', 'graphite', 'nmc', 'calender', 'dry', 'mix']
+SYLLABLES = ['ka', 'lo', 'mi', 'ne', 'ru', 'ta', 'vo', 'zen', 'pro', 'sil', 'tex', 'dur']
+QUERIES = ['ca', 'cat', 'cathode', 'coating test', 'grafite', 'coin cell nmc', 'wb01234', 'slurry_mix dry', 'kalo']
+
+
+def make_vocabulary(size):
+    generated = (''.join(s) for n in itertools.count(2) for s in itertools.product(SYLLABLES, repeat=n))
+    return WORDS + list(itertools.islice(generated, max(0, size - len(WORDS))))
+
+
+def make_names(n_entities, vocabulary_size=3000, seed=0):
+    rnd = random.Random(seed)
+    vocabulary = make_vocabulary(vocabulary_size)
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+
+    names = []
+    for i in range(n_entities):
+        buid = f'WB{i:05d}'
+        words = [word.capitalize() for word in rnd.choices(vocabulary, weights, k=rnd.randint(1, 4))]
+        names.append((buid, f'{buid}_{"_".join(words)}'))
+    return names
+
+
+def main(n_entities=100000, vocabulary_size=3000, repeat=20):
+    names = make_names(n_entities, vocabulary_size)
+
+    t0 = time.perf_counter()
+    index = EntityNameIndex()
+    index.update(names)
+    print(f'build {n_entities} names: {time.perf_counter() - t0:.2f} s')
+
+    t0 = time.perf_counter()
+    index.add('WB99999', 'WB99999_New_Cathode')
+    print(f'add one name: {(time.perf_counter() - t0) * 1e3:.3f} ms')
+
+    print(f'{"query":20} {"cold":>10} {"warm":>10}')
+    for query in QUERIES:
+        t0 = time.perf_counter()
+        result = index.search(query)
+        cold = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            result = index.search(query)
+        warm = (time.perf_counter() - t0) / repeat
+
+        print(f'{query!r:20} {cold * 1e3:7.3f} ms {warm * 1e3:7.3f} ms  best: {result[0][0] if result else None}')
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
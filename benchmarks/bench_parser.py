@@ -0,0 +1,71 @@
+''' Time per call of BUID parsing with ignore_unknown, on long file paths.
+
+The paths contain many BUID-like tokens of unknown types (sample names, lot
+numbers, ...) and a few known BUIDs. Compares the generic regex, whose
+matches are filtered by type afterwards, with the type aware regex, which
+skips unknown types. The latter is used for mode 'first' only, for the other
+modes both take the same path. Both return the same results.
+
+    python benchmarks/bench_parser.py [number of paths]
+'''
+import sys
+import time
+import random
+import logging
+
+from barely_db import GenericBUIDParser
+
+
+BUID_TYPES = {'web': 'WB', 'slurry': 'SL', 'cells': 'CL', 'experiment': 'EXP', 'document': 'DOC'}
+NOISE = ['lot', 'run', 'ab', 'pos', 'xy', 'mat', 'rev', 'ch', 'img', 'pt']
+METHODS = ['parse', 'parse_with_component', 'parse_type']
+MODES = ['first', 'unique']
+
+
+class LegacyParser(GenericBUIDParser.create_class(BUID_TYPES)):
+    type_aware_regex = False
+
+
+def make_paths(n_paths, seed=0):
+    rnd = random.Random(seed)
+    types = list(BUID_TYPES.values())
+
+    paths = []
+    for _ in range(n_paths):
+        parts = []
+        for _ in range(rnd.randint(6, 12)):
+            tokens = [f'{rnd.choice(NOISE)}{rnd.randint(10, 99999)}' for _ in range(rnd.randint(1, 4))]
+            if rnd.random() < 0.15:
+                tokens.insert(rnd.randrange(len(tokens) + 1), f'{rnd.choice(types)}{rnd.randint(1, 9999):04d}')
+            parts.append('_'.join(tokens))
+        paths.append('/data/measurements/' + '/'.join(parts) + '/result_2023-05-17.csv')
+    return paths
+
+
+def timed(parser, method, paths):
+    func = getattr(parser, method)
+    t0 = time.perf_counter()
+    result = [func(path) for path in paths]
+    return (time.perf_counter() - t0) / len(paths), result
+
+
+def main(n_paths=20000):
+    # paths with several BUIDs are expected, keep the warnings of mode 'unique' quiet
+    logging.getLogger('barely_db.parser').setLevel(logging.ERROR)
+    paths = make_paths(n_paths)
+    print(f'{n_paths} paths, {sum(map(len, paths)) / n_paths:.0f} characters on average')
+
+    Parser = GenericBUIDParser.create_class(BUID_TYPES)
+    print(f'{"method":22} {"mode":8} {"generic":>10} {"type aware":>12}')
+    for method in METHODS:
+        for mode in MODES:
+            kwds = dict(ignore_unknown=True, mode=mode, warn_empty=False)
+            legacy, legacy_result = timed(LegacyParser(**kwds), method, paths)
+            aware, aware_result = timed(Parser(**kwds), method, paths)
+            assert legacy_result == aware_result
+
+            print(f'{method:22} {mode:8} {legacy * 1e6:8.2f} us {aware * 1e6:10.2f} us')
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -60,3 +60,43 @@ def CBUIDParser():
     CBUIDParser = barely_db.GenericBUIDParser.create_class(buid_types)
 
     return CBUIDParser
+
+
+# Small databases in a temporary folder
+@pytest.fixture
+def make_tmp_db(tmp_path):
+    ''' Returns a factory that creates a small database from a {type_dir: [entity_dir, ...]} layout. '''
+
+    def _make_tmp_db(layout, buid_types=None, path_depth=1, **kwds):
+        if buid_types is None:
+            buid_types = {'web': 'WB', 'slurry': 'SL', 'cells': 'CL'}
+
+        BarelyDBConfig(name='tmp', path_depth=path_depth, buid_types=buid_types).save(tmp_path)
+
+        for type_dir, entity_dirs in layout.items():
+            tmp_path.joinpath(type_dir).mkdir(parents=True, exist_ok=True)
+            for entity_dir in entity_dirs:
+                tmp_path.joinpath(type_dir, entity_dir).mkdir(parents=True, exist_ok=True)
+
+        return BarelyDB(base_path=tmp_path, **kwds)
+
+    return _make_tmp_db
+
+
+def set_old_mtime(path, age=3600):
+    ''' Moves the mtime of path into the past, such that mtime based change detection trusts it. '''
+    old = os.stat(path).st_mtime - age
+    os.utime(path, (old, old))
+
+
+def count_scans(bdb):
+    ''' Records the names of the directories that bdb scans for entities, returns the (growing) list. '''
+    scanned = []
+    scan_entity_dirs = bdb._scan_entity_dirs
+
+    def counting_scan(scan_dirs, *args, **kwds):
+        scanned.extend(os.path.basename(scan_dir) for scan_dir in scan_dirs)
+        return scan_entity_dirs(scan_dirs, *args, **kwds)
+
+    bdb._scan_entity_dirs = counting_scan
+    return scanned
@@ -0,0 +1,72 @@
+import pytest
+import asyncio
+import threading
+
+from barely_db import *
+from barely_db.aio import *
+
+
+LAYOUT = {
+    'Webs': ['WB0001_first', 'WB0002_second'],
+    'Cells': ['CL0001_cell'],
+}
+
+
+def test_async_lookups(make_tmp_db, tmp_path):
+    bdb = make_tmp_db(LAYOUT)
+    tmp_path.joinpath('Webs', 'WB0001_first', '-Q1_quality').mkdir()
+    tmp_path.joinpath('Webs', 'WB0001_first', 'data.txt').write_text('data')
+
+    async def main():
+        async with AsyncBarelyDB(bdb, max_workers=4) as adb:
+            await adb.load_entities()
+
+            assert await adb.contains('WB0002')
+            assert not await adb.contains('WB0003')
+
+            entities = await adb.get_entities(['WB0001', 'WB0002', 'CL0001'])
+            names = await asyncio.gather(*[entity.name() for entity in entities])
+            assert names == ['first', 'second', 'cell']
+
+            entity = entities[0]
+            assert await entity.components() == ['Q1']
+            assert (await entity['Q1'].path()).name == '-Q1_quality'
+            assert [f.rsplit('/', 1)[-1] for f in await entity.files('*.txt')] == ['data.txt']
+
+            new_entity = await adb.create_new_entity(name='new', after='WB0001')
+            assert new_entity.buid == 'WB0003'
+            assert await new_entity.exists()
+
+            new_entities = await adb.create_new_entities([dict(name=name, after='WB0001') for name in ['a', 'b']])
+            assert [entity.buid for entity in new_entities] == ['WB0004', 'WB0005']
+
+    asyncio.run(main())
+
+
+def test_async_timeout_and_cancel(make_tmp_db):
+    release = threading.Event()
+    executed = []
+
+    async def main():
+        adb = AsyncBarelyDB(make_tmp_db(LAYOUT), max_workers=1)
+
+        blocking = asyncio.ensure_future(adb.run(release.wait))
+        await asyncio.sleep(0.01)
+
+        # the pool is busy, so the queued call times out and never runs
+        with pytest.raises(asyncio.TimeoutError):
+            await adb.run(executed.append, 'timeout', timeout=0.05)
+
+        queued = asyncio.ensure_future(adb.run(executed.append, 'cancel'))
+        await asyncio.sleep(0.01)
+        queued.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await queued
+
+        release.set()
+        await blocking
+        await adb.run(executed.append, 'done')
+        adb.close()
+
+    asyncio.run(main())
+    assert executed == ['done']
@@ -0,0 +1,47 @@
+import pytest
+import pickle
+
+from barely_db import *
+
+
+def test_buid_parts():
+    buid = BUID('WB0012-Q1')
+
+    assert (buid.type, buid.id, buid.component) == ('WB', 12, 'Q1')
+    assert buid.base == 'WB0012' and isinstance(buid.base, BUID)
+    assert buid.with_component('P2') == 'WB0012-P2'
+    assert BUID('EXP12345').type == 'EXP' and BUID('EXP12345').id == 12345
+    assert BUID.from_parts('wb', 12) == 'WB0012'
+
+    # a str with the hash and order of the normalized string
+    assert buid == 'WB0012-Q1' and hash(buid) == hash('WB0012-Q1')
+    assert {'WB0012-Q1': 1}[buid] == 1
+    assert sorted([BUID('WB1000'), BUID('WB0999-Q1'), BUID('WB0999')]) == ['WB0999', 'WB0999-Q1', 'WB1000']
+
+    # numeric order across the 4 digit boundary
+    assert BUID('WB9999') < BUID('WB10000') and BUID('WB10000') >= BUID('WB9999-Q1')
+    assert not BUID('WB10000') <= BUID('WB9999')
+    assert sorted(map(BUID, ['WB10000', 'SL10001', 'WB9999', 'SL0002'])) == ['SL0002', 'SL10001', 'WB9999', 'WB10000']
+    assert pickle.loads(pickle.dumps(buid)) == buid
+
+    for value in ['wb0012', 'WB012', 'WB01234', 'WB0012-', 'WB0012_name']:
+        with pytest.raises(ValueError):
+            BUID(value)
+
+
+def test_parser_as_buid(CBUIDParser):
+    buid_p = CBUIDParser(ignore_unknown=True, mode='unique', as_buid=True)
+
+    buid = buid_p.parse('xx_wb12-Q1_name')
+    assert type(buid) is BUID and buid == 'WB0012-Q1'
+    assert buid_p.parse_with_component('wb12-Q1') == ('WB0012', 'Q1')
+    assert type(buid_p.parse_with_component('wb12-Q1')[0]) is BUID
+    assert type(CBUIDParser().parse('wb12')) is str
+
+    # BUIDs are taken apart without the regexes, with the same results
+    for value in ['WB0012', 'WB0012-Q1', 'WB0012-EE12', 'XX0012']:
+        for mode in ['unique', 'all']:
+            for ignore_unknown in [True, None]:
+                buid_p = CBUIDParser(ignore_unknown=ignore_unknown, mode=mode, allow_components=False)
+                for method in ['parse', 'parse_component', 'parse_type', 'parse_type_and_uid']:
+                    assert getattr(buid_p, method)(BUID(value)) == getattr(buid_p, method)(value)
@@ -0,0 +1,53 @@
+import pytest
+
+from barely_db import *
+from barely_db.codec import MISSING_KEY
+
+
+def test_codec_scalar(CBUIDParser):
+    codec = BUIDCodec(CBUIDParser)
+
+    for value in ['WB0012', 'WB0012-Q1', 'WB0012-Q01', 'SL9999-ab00012', 'EXP12345-z0']:
+        assert codec.decode(codec.encode(value)) == value
+    assert codec.encode('x_wb12-Q1_data.csv') == codec.encode('WB0012-Q1')
+
+    # keys sort by type, numeric id and component
+    buids = ['WB0100', 'WB0012-Q1', 'SL0100', 'WB0012', 'EXP12345']
+    assert sorted(buids, key=codec.encode) == ['EXP12345', 'SL0100', 'WB0012', 'WB0012-Q1', 'WB0100']
+
+    for value in ['XX0012', 'lorem', 'WB0012_SL0012']:
+        with pytest.raises(ValueError):
+            codec.encode(value)
+    with pytest.raises(ValueError):
+        codec.decode(MISSING_KEY)
+
+    # explicit type codes keep the keys stable
+    codec = BUIDCodec(CBUIDParser, type_codes={'WB': 7})
+    assert codec.encode('WB0001') >> 46 == 7
+    with pytest.raises(ValueError):
+        codec.encode('SL0001')
+
+
+def test_codec_bulk(CBUIDParser):
+    np = pytest.importorskip('numpy')
+    codec = BUIDCodec(CBUIDParser)
+
+    values = np.array(['WB0001', None, 'lorem', 'SL0002-Q1', 'WB0001'], dtype=object)
+    keys = codec.encode_many(values)
+    assert keys.dtype == np.int64
+    assert keys.tolist() == [codec.encode('WB0001'), -1, -1, codec.encode('SL0002-Q1'), codec.encode('WB0001')]
+    assert codec.decode_many(keys).tolist() == ['WB0001', None, None, 'SL0002-Q1', 'WB0001']
+
+    pd = pytest.importorskip('pandas')
+    series = pd.Series(['wb01', 'SL0002-Q1', float('nan')], index=[3, 4, 5], name='buid')
+    keys = codec.encode_many(series)
+    assert keys.dtype == np.int64 and keys.index.tolist() == [3, 4, 5] and keys.name == 'buid'
+    assert codec.decode_many(keys).tolist() == ['WB0001', 'SL0002-Q1', None]
+
+
+def test_database_codec(make_tmp_db):
+    bdb = make_tmp_db({'Webs': ['WB0001_first'], 'Cells': ['CL0001_cell']})
+    codec = bdb.get_buid_codec()
+
+    assert codec.type_codes == {'CL': 1, 'SL': 2, 'WB': 3}
+    assert codec.decode(codec.encode('CL0001')) == 'CL0001'
@@ -0,0 +1,104 @@
+import pytest
+import os
+import time
+import attr
+from pathlib import Path
+
+import barely_db
+from barely_db import *
+from conftest import set_old_mtime
+
+
+LAYOUT = {'Webs': ['WB0001_first', 'WB0002_second']}
+
+
+def _add_component(bdb, buid, component):
+    bdb.entity_paths[buid].joinpath(f'-{component}').mkdir()
+
+
+def _set_old_mtimes(bdb):
+    # listings of recently changed folders are not trusted by the mtime policy
+    for entity_path in bdb.entity_paths.values():
+        set_old_mtime(entity_path)
+
+
+def test_policy_from_arguments(make_tmp_db):
+    assert make_tmp_db(LAYOUT).component_cache_policy == 'always'
+    assert make_tmp_db(LAYOUT, auto_reload_components=False).component_cache_policy == 'never'
+
+    bdb = make_tmp_db(LAYOUT, component_cache_policy='ttl', component_cache_ttl=5)
+    assert bdb.component_cache_policy == 'ttl'
+    assert bdb.component_cache_ttl == 5
+    assert not bdb.auto_reload_components
+
+    with pytest.raises(ValueError):
+        make_tmp_db(LAYOUT, component_cache_policy='sometimes')
+
+
+def test_policy_from_config(make_tmp_db, tmp_path):
+    make_tmp_db(LAYOUT)
+    config = BarelyDBConfig.load(tmp_path)
+    attr.evolve(config, component_cache_policy='mtime').save(tmp_path)
+
+    assert BarelyDB(base_path=tmp_path).component_cache_policy == 'mtime'
+    assert BarelyDB(base_path=tmp_path, component_cache_policy='never').component_cache_policy == 'never'
+
+
+@pytest.mark.parametrize(
+    'policy, reloads',
+    [('always', [True, True, True]), ('never', [True, False, False]), ('mtime', [True, False, True])],
+)
+def test_policies(make_tmp_db, policy, reloads):
+    bdb = make_tmp_db(LAYOUT, component_cache_policy=policy)
+    bdb.load_entities()
+    _set_old_mtimes(bdb)
+
+    assert bdb['WB0001'].components == []
+    assert bdb['WB0001'].components == []
+    _add_component(bdb, 'WB0001', 'Q1')
+    components = bdb['WB0001'].components
+
+    stats = bdb.component_cache_stats[policy]
+    assert stats['misses'] == sum(reloads)
+    assert stats['hits'] == len(reloads) - sum(reloads)
+    assert components == (['Q1'] if reloads[-1] else [])
+
+
+def test_policy_ttl(make_tmp_db):
+    bdb = make_tmp_db(LAYOUT, component_cache_policy='ttl', component_cache_ttl=0.2)
+    bdb.load_entities()
+
+    assert bdb['WB0001'].components == []
+    _add_component(bdb, 'WB0001', 'Q1')
+    assert bdb['WB0001'].components == []
+
+    time.sleep(0.25)
+    assert bdb['WB0001'].components == ['Q1']
+    assert bdb.component_cache_stats['ttl'] == {'hits': 1, 'misses': 2}
+
+
+def test_policy_mtime_eager(make_tmp_db):
+    bdb = make_tmp_db(LAYOUT, component_cache_policy='mtime')
+    bdb.load_entities()
+    _set_old_mtimes(bdb)
+    bdb.load_entities(use_snapshot=False, with_components=True)
+
+    assert bdb['WB0002'].components == []
+    _add_component(bdb, 'WB0002', 'P1')
+    assert bdb['WB0002'].components == ['P1']
+    assert bdb.component_cache_stats['mtime'] == {'hits': 1, 'misses': 1}
+
+
+def test_policy_mtime_coarse_timestamps(make_tmp_db):
+    bdb = make_tmp_db(LAYOUT, component_cache_policy='mtime')
+    bdb.load_entities()
+
+    # the component is created in the same timestamp tick as the listing
+    entity_path = bdb.entity_paths['WB0001']
+    assert bdb['WB0001'].components == []
+    mtime = os.stat(entity_path).st_mtime_ns
+    _add_component(bdb, 'WB0001', 'Q1')
+    os.utime(entity_path, ns=(mtime, mtime))
+
+    assert bdb['WB0001'].components == ['Q1']
+    assert bdb.component_cache_stats['mtime'] == {'misses': 2}
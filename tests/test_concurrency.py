@@ -0,0 +1,78 @@
+import pytest
+import shutil
+import threading
+
+from barely_db import *
+
+
+FIXED = ['WB0001_first', 'WB0002_second', 'WB0003_third']
+
+
+def test_readers_during_refreshes(make_tmp_db, tmp_path):
+    bdb = make_tmp_db({'Webs': FIXED, 'Cells': ['CL0001_cell']}, component_cache_policy='never')
+    tmp_path.joinpath('Webs', 'WB0001_first', '-Q1_quality').mkdir()
+    bdb.load_entities(with_components=True)
+
+    stop = threading.Event()
+    errors = []
+    reads = []
+
+    def reader():
+        count = 0
+        try:
+            while not stop.is_set():
+                entity_paths = bdb.entity_paths
+                buids = list(entity_paths)
+                assert len(buids) == len(entity_paths)
+                assert all(buid in entity_paths for buid in ['WB0001', 'WB0002', 'WB0003', 'CL0001'])
+
+                assert bdb['WB0002'].name == 'second'
+                assert bdb['WB0001'].components == ['Q1']
+                assert [entity.buid for entity in bdb.find_entities('first')] == ['WB0001']
+                assert {'WB0001', 'WB0002', 'WB0003'} <= {entity.buid for entity in bdb.query(types='WB')}
+                assert 'CL0001' in bdb.to_records()['buid']
+                list(bdb.component_paths.keys())
+                count += 1
+        except Exception as e:
+            errors.append(e)
+        reads.append(count)
+
+    threads = [threading.Thread(target=reader) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+
+    try:
+        for i in range(15):
+            # entities appear and disappear on disk and through the API
+            path = tmp_path.joinpath('Webs', f'WB{100 + i:04d}_scanned')
+            path.mkdir()
+            bdb.refresh(with_components=True)
+            bdb.create_new_entity(name='created', after='WB0100')
+            bdb.create_new_entities([dict(after='CL0001', name='bulk', components={'P1': None})])
+            shutil.rmtree(path)
+            bdb.refresh()
+            bdb.load_entities(use_snapshot=False, with_components=(i % 2 == 0))
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+    assert errors == []
+    assert all(count > 0 for count in reads)
+    assert len([buid for buid in bdb.entities if buid.startswith('CL')]) == 16
+
+
+def test_name_index_copy():
+    index = EntityNameIndex()
+    index.update([('WB0001', 'WB0001_coding_test'), ('WB0002', 'WB0002_coding_other')])
+
+    copy = index.copy()
+    copy.add('WB0003', 'WB0003_coding_new')
+    copy.remove('WB0001')
+
+    assert [buid for buid, _ in index.search('coding')] == ['WB0001', 'WB0002']
+    assert [buid for buid, _ in copy.search('coding')] == ['WB0003', 'WB0002']
+    assert index.search('new') == []
+
+    index.add('WB0004', 'WB0004_codingx')
+    assert 'WB0004' not in copy
@@ -18,3 +18,38 @@ def test_db_load():
     all_entities_names = get_all_entity(path_to_db, 'name')
 
     assert len(bdb.entities) == len(all_entities_names)
+
+
+def _index_state(bdb):
+    return (
+        list(bdb.entity_paths.items()),
+        list(bdb._duplicate_buid_count.items()),
+        bdb._duplicate_buid,
+        bdb.buid_type_paths,
+    )
+
+
+def test_db_load_parallel(bdb):
+    bdb_parallel = BarelyDB(base_path=bdb.base_path)
+    bdb_parallel.load_entities(workers=4)
+
+    assert _index_state(bdb_parallel) == _index_state(bdb)
+
+
+def test_db_load_parallel_nested(make_tmp_db):
+    layout = {
+        'Lab1/Webs': [f'WB{i:04d}_web' for i in range(0, 150)] + ['WB0003_duplicate', 'not_an_entity'],
+        'Lab1/Cells': ['CL0001_cell'],
+        'Lab2/Webs': ['WB0004_duplicate', 'WB0200_other_lab'],
+        'Lab2/Empty': [],
+    }
+    bdb_seq = make_tmp_db(layout, path_depth=2)
+    bdb_seq.load_entities()
+    assert sorted(bdb_seq._duplicate_buid) == ['WB0003', 'WB0004']
+
+    for workers in [2, 8]:
+        bdb_parallel = BarelyDB(base_path=bdb_seq.base_path)
+        bdb_parallel.load_entities(workers=workers)
+
+        assert _index_state(bdb_parallel) == _index_state(bdb_seq)
+        assert bdb_parallel.check_for_duplicates() == bdb_seq.check_for_duplicates()
@@ -5,6 +5,7 @@ import re
 
 import barely_db
 from barely_db import *
+from barely_db.query import FreeIdIndex, columns_to_table
 from get_manually_entities import get_all_entity
 
 
@@ -157,3 +158,199 @@ def test_entity_in(bdb):
     assert not bdb['WB3001-X99'].exists
     assert bdb['WB3001-X99'].entity_exists
 
+
+def test_load_with_components(bdb):
+    bdb_eager = BarelyDB(base_path=bdb.base_path, auto_reload_components=False)
+    bdb_eager.load_entities(with_components=True)
+
+    assert sorted(bdb_eager.component_paths.keys()) == sorted(bdb.entities)
+
+    scandir_calls = bdb_eager.walker.stats['scandir']
+    for buid in bdb.entities:
+        assert bdb_eager[buid].component_paths == bdb[buid].component_paths
+    assert bdb_eager.walker.stats['scandir'] == scandir_calls
+
+    bdb_parallel = BarelyDB(base_path=bdb.base_path, auto_reload_components=False)
+    bdb_parallel.load_entities(with_components=True, workers=4)
+    assert bdb_parallel.component_paths == bdb_eager.component_paths
+
+
+def test_entity_handle_cache(bdb):
+    ent = bdb['WB3001']
+    assert bdb['wb3001'] is ent
+    assert bdb['WB3001-P1'] is ent['P1']
+    assert ent['P1'].parent is ent
+    assert bdb['WB3001-P1'].component == 'P1'
+    assert bdb['WB3001'].component is None
+
+    class TestEntity(BarelyDBEntity):
+        pass
+
+    test_ent = TestEntity.like(ent)
+    assert test_ent is not ent
+    assert TestEntity.like(ent) is test_ent
+    assert isinstance(test_ent['P1'], TestEntity)
+
+    # subclasses can still set logger and path_converter in their constructor
+    class ConfiguredEntity(BarelyDBEntity):
+        def __init__(self, buid, parent_bdb, component=None):
+            self.logger = parent_bdb.logger.getChild('configured')
+            self.path_converter = str
+            super().__init__(buid, parent_bdb, component=component)
+
+    configured_ent = ConfiguredEntity.like(ent)
+    assert configured_ent.logger.name.endswith('.configured')
+    assert configured_ent.path_converter is str
+    assert ent.logger is bdb.logger and ent.path_converter is bdb.path_converter
+
+    # handles nobody holds on to are dropped from the cache
+    bdb['WB3002']
+    assert (BarelyDBEntity, 'WB3002', None) not in bdb._entity_cache
+    assert not hasattr(ent, '__dict__')
+
+
+def test_query(make_tmp_db, tmp_path):
+    layout = {
+        'Webs': ['WB2999_early', 'WB3000_CodingTest', 'WB3500_other_web', 'WB4000_late'],
+        'Cells': ['CL3001_coding_cell'],
+    }
+    bdb = make_tmp_db(layout)
+    tmp_path.joinpath('Webs', 'WB3500_other_web', '-Q1_quality').mkdir()
+    tmp_path.joinpath('Webs', 'WB3000_CodingTest', 'data.yaml').write_text('')
+    bdb.load_entities(with_components=True)
+
+    def buids(entities):
+        return [entity.buid for entity in entities]
+
+    assert buids(bdb.query()) == ['CL3001', 'WB2999', 'WB3000', 'WB3500', 'WB4000']
+    assert buids(bdb.query(types='web')) == ['WB2999', 'WB3000', 'WB3500', 'WB4000']
+    assert buids(bdb.query(buid_range=('WB3000', 'WB3999'))) == ['WB3000', 'WB3500']
+    assert buids(bdb.query(types=['CL', 'WB'], buid_range=(3000, None))) == ['CL3001', 'WB3000', 'WB3500', 'WB4000']
+    assert buids(bdb.query(name_regex='(?i)coding')) == ['CL3001', 'WB3000']
+    assert buids(bdb.query(has_file='*.yaml')) == ['WB3000']
+
+    scandir_calls = bdb.walker.stats['scandir']
+    result = bdb.query(types='WB', buid_range=('WB3000', 'WB3999'), has_component='Q1')
+    assert buids(result) == ['WB3500']
+    assert bdb.walker.stats['scandir'] == scandir_calls
+
+    # the folders are only checked on request
+    tmp_path.joinpath('Webs', 'WB3000_CodingTest', '-Q1_quality').mkdir()
+    assert buids(bdb.query(types='WB', has_component='Q1')) == ['WB3500']
+    assert buids(bdb.query(types='WB', has_component='Q1', reload_components=True)) == ['WB3000', 'WB3500']
+    assert bdb.walker.stats['scandir'] == scandir_calls + 4
+
+    with pytest.raises(ValueError):
+        bdb.query(buid_range=('WB3000', 'CL3999'))
+
+    # the index follows changes
+    bdb.create_new_entity(name='new', buid='WB3600')
+    assert buids(bdb.query(buid_range=('WB3000', 'WB3999'))) == ['WB3000', 'WB3500', 'WB3600']
+
+
+def test_get_free_buids(make_tmp_db):
+    layout = {'Webs': ['WB0010_a', 'WB0011_b', 'WB0013_c', 'WB0016_d']}
+    bdb = make_tmp_db(layout)
+    bdb.load_entities()
+
+    assert bdb.get_free_buids('WB0010') == ['WB0012']
+    assert bdb.get_free_buids('WB0012') == ['WB0012']
+    assert bdb.get_free_buids('WB0010', count=2) == ['WB0014', 'WB0015']
+    assert bdb.get_free_buids('WB0010', count=3) == ['WB0017', 'WB0018', 'WB0019']
+    assert bdb.get_free_buids('WB0010', count=3, contiguous=False) == ['WB0012', 'WB0014', 'WB0015']
+    assert bdb.get_free_buids('WB9997', count=2) == ['WB9997', 'WB9998']
+
+    with pytest.raises(ValueError):
+        bdb.get_free_buids('WB9997', count=3)
+
+    # entities created in between are taken into account
+    assert bdb.create_new_entity(name='e', after='WB0010').buid == 'WB0012'
+    assert bdb.get_free_buids('WB0010') == ['WB0014']
+    bdb.create_new_entity(name='f', buid='WB0014')
+    assert bdb.get_free_buids('WB0010', count=2) == ['WB0017', 'WB0018']
+
+
+def test_free_id_index():
+    index = FreeIdIndex(['WB0001', 'WB0003', 'CL0002'])
+    assert index.free_ids('WB', 1, count=2) == [4, 5]
+    assert index.free_ids('CL', 1, count=2) == [3, 4]
+    assert index.free_ids('XX', 0) == [0]
+
+    index.add('WB0002')
+    index.remove('WB0003')
+    assert 'WB0002' in index and 'WB0003' not in index
+    assert index.free_ids('WB', 1, count=2, contiguous=False) == [3, 4]
+    assert index.free_ids('WB', 9990, count=20, stop=9999) == []
+
+
+def test_create_new_entities(make_tmp_db, tmp_path):
+    layout = {'Webs': ['WB0001_a', 'WB0003_b'], 'Cells': ['CL0001_cell']}
+    bdb = make_tmp_db(layout, component_cache_policy='never')
+    bdb.load_entities()
+
+    mkdir_calls = bdb.walker.stats['mkdir']
+    entities = bdb.create_new_entities(
+        [
+            dict(after='WB0001', name='c'),
+            dict(buid='WB0002', name='explicit', components={'Q1': 'quality'}),
+            dict(after='WB0001', name='d', components={'Q1': None, 'Q2': 'second'}),
+            dict(after='CL0001', name='cell'),
+            dict(buid='CL0001', name='ignored', components={'P1': None}),
+        ],
+        workers=4,
+    )
+
+    assert [entity.buid for entity in entities] == ['WB0004', 'WB0002', 'WB0005', 'CL0002', 'CL0001']
+    assert bdb.walker.stats['mkdir'] - mkdir_calls == 8
+    assert bdb.get_entity_path('WB0005') == tmp_path.joinpath('Webs', 'WB0005_d')
+    assert tmp_path.joinpath('Webs', 'WB0005_d', '-Q2_second').is_dir()
+    assert tmp_path.joinpath('Cells', 'CL0001_cell', '-P1').is_dir()
+    assert bdb['WB0002'].component_paths == {'Q1': tmp_path.joinpath('Webs', 'WB0002_explicit', '-Q1_quality')}
+    assert bdb['WB0005'].components == ['Q1', 'Q2']
+    assert bdb.get_free_buids('WB0001') == ['WB0006']
+
+    # the index matches a fresh scan
+    created = {buid: bdb.entity_paths[buid] for buid in bdb.entities}
+    bdb.load_entities(use_snapshot=False)
+    assert {buid: bdb.entity_paths[buid] for buid in bdb.entities} == created
+
+    with pytest.raises(ValueError):
+        bdb.create_new_entities([dict(buid='WB0010', name='x'), dict(buid='WB0010', name='y')])
+    with pytest.raises(ValueError):
+        bdb.create_new_entities([dict(name='no_buid')])
+
+
+def test_to_records(make_tmp_db, tmp_path):
+    layout = {'Webs': ['WB0002_second', 'WB0001_first'], 'Cells': ['CL0010_cell']}
+    bdb = make_tmp_db(layout, component_cache_policy='never')
+    tmp_path.joinpath('Webs', 'WB0001_first', '-Q1_quality').mkdir()
+    bdb.load_entities()
+
+    records = bdb.to_records()
+    assert records['buid'] == ['CL0010', 'WB0001', 'WB0002']
+    assert records['type'] == ['CL', 'WB', 'WB']
+    assert records['id'] == [10, 1, 2]
+    assert records['name'] == ['cell', 'first', 'second']
+    assert records['path'][1] == str(tmp_path.joinpath('Webs', 'WB0001_first'))
+    assert records['components'] == [None, None, None]
+
+    records = bdb.to_records(with_components=True)
+    assert records['components'] == [(), ('Q1',), ()]
+
+    assert bdb.to_table(backend='lists') == records
+    with pytest.raises(ValueError):
+        bdb.to_table(backend='unknown')
+
+
+def test_to_table():
+    np = pytest.importorskip('numpy')
+    columns = {'buid': ['WB0001', 'WB0002'], 'id': [1, 2], 'components': [('Q1',), ()]}
+
+    arrays = columns_to_table(columns, backend='numpy')
+    assert arrays['id'].dtype == np.int64
+    assert list(arrays['components']) == [('Q1',), ()]
+
+    pd = pytest.importorskip('pandas')
+    table = columns_to_table(columns)
+    assert isinstance(table, pd.DataFrame)
+    assert list(table['buid']) == ['WB0001', 'WB0002']
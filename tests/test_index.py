@@ -0,0 +1,90 @@
+import pytest
+from pathlib import Path
+
+from barely_db import *
+from barely_db.query import EntityQueryIndex
+
+
+def test_entity_path_index(tmp_path):
+    index = EntityPathIndex(tmp_path)
+    index.add('WB0001', 'Webs', 'WB0001_first')
+    index['WB0002'] = tmp_path.joinpath('Webs', 'WB0002_second')
+    index['CL0001'] = '/somewhere/else/CL0001_cell'
+
+    assert list(index) == ['WB0001', 'WB0002', 'CL0001']
+    assert index['WB0001'] == tmp_path.joinpath('Webs', 'WB0001_first')
+    assert index.parent('WB0002') is index.parent('WB0001')
+    assert index.location('WB0002') == ('Webs', 'WB0002_second')
+    assert index['CL0001'] == Path('/somewhere/else/CL0001_cell')
+
+    index.add('WB0001', 'Webs', 'WB0001_renamed')
+    assert index['WB0001'].name == 'WB0001_renamed'
+    assert len(index) == 3
+
+    del index['WB0002']
+    assert 'WB0002' not in index
+    assert index == {
+        'WB0001': tmp_path.joinpath('Webs', 'WB0001_renamed'),
+        'CL0001': Path('/somewhere/else/CL0001_cell'),
+    }
+
+
+def test_component_path_index(tmp_path):
+    entity_paths = EntityPathIndex(tmp_path)
+    entity_paths.add('WB0001', 'Webs', 'WB0001_first')
+    index = ComponentPathIndex(entity_paths.__getitem__)
+
+    index.set_names('WB0001', [('Q1', '-Q1_quality')])
+    index.add_name('WB0001', 'Q2', '-Q2')
+
+    entity_path = tmp_path.joinpath('Webs', 'WB0001_first')
+    assert index['WB0001'] == {'Q1': entity_path.joinpath('-Q1_quality'), 'Q2': entity_path.joinpath('-Q2')}
+
+    index['WB0002'] = {}
+    assert index['WB0002'] == {}
+    assert index.pop('WB0002') == {}
+    assert list(index) == ['WB0001']
+
+    # entries of entities that left the entity index can still be dropped
+    del entity_paths['WB0001']
+    assert index.get('WB0001') == {}
+    assert index.pop('WB0001', None) == {}
+    assert 'WB0001' not in index
+    assert index.pop('WB0001', None) is None
+    with pytest.raises(KeyError):
+        index.pop('WB0001')
+
+
+def test_component_path_index_removal_swaps(tmp_path):
+    entity_paths = EntityPathIndex(tmp_path)
+    index = ComponentPathIndex(entity_paths.__getitem__)
+    index.update_names({'WB0001': [('Q1', '-Q1')], 'WB0002': [], 'WB0003': [('P1', '-P1_x')]})
+
+    # removals swap in a new dict, a reader that took the names before still sees all entries
+    all_names = index.all_names()
+    components = index._components
+    index.discard(['WB0001', 'WB0004'])
+    del index['WB0002']
+
+    assert 'WB0001' in components and 'WB0002' in components
+    assert all_names == {'WB0001': [('Q1', '-Q1')], 'WB0002': [], 'WB0003': [('P1', '-P1_x')]}
+    assert index.all_names() == {'WB0003': [('P1', '-P1_x')]}
+
+    assert index.names('WB0003') == [('P1', '-P1_x')]
+    assert index.names('WB0001', None) is None
+    with pytest.raises(KeyError):
+        index.names('WB0001')
+    with pytest.raises(KeyError):
+        del index['WB0001']
+
+
+def test_entity_query_index_order(tmp_path):
+    # the types are ordered by name, not by the order of the folders in the index
+    entity_paths = EntityPathIndex(tmp_path)
+    for buid in ['WB0002', 'SL0001', 'WB0001', 'CL0010']:
+        entity_paths.add(buid, 'Entities', f'{buid}_entity')
+
+    index = EntityQueryIndex(entity_paths)
+    assert index.types == ['CL', 'SL', 'WB']
+    assert list(index.select()) == ['CL0010', 'SL0001', 'WB0001', 'WB0002']
+    assert list(index.select(['WB', 'SL'], id_range=(2, None))) == ['WB0002']
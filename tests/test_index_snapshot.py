@@ -0,0 +1,102 @@
+import pytest
+import json
+from pathlib import Path
+
+import barely_db
+from barely_db import *
+from barely_db.snapshot import SNAPSHOT_DIR
+from conftest import set_old_mtime, count_scans
+
+
+LAYOUT = {
+    'Webs': ['WB0001_first', 'WB0002_second', 'WB0002_duplicate'],
+    'Slurries': ['SL0001_slurry'],
+    'Cells': ['CL0001_cell', 'CL0002_cell'],
+}
+
+
+def test_snapshot_warm_start(make_tmp_db, tmp_path):
+    bdb = make_tmp_db(LAYOUT, index_snapshot_file='.bdb_index.json')
+    for type_dir in LAYOUT:
+        set_old_mtime(tmp_path.joinpath(type_dir))
+
+    bdb.load_entities()
+    assert tmp_path.joinpath('.bdb_index.json').exists()
+
+    bdb_warm = BarelyDB(base_path=tmp_path, index_snapshot_file='.bdb_index.json')
+    scanned = count_scans(bdb_warm)
+    bdb_warm.load_entities()
+
+    assert scanned == []
+    assert bdb_warm.entity_paths == bdb.entity_paths
+    assert bdb_warm.buid_type_paths == bdb.buid_type_paths
+    assert bdb_warm._duplicate_buid == ['WB0002']
+
+    # only the changed type directory is scanned again
+    tmp_path.joinpath('Cells', 'CL0003_new_cell').mkdir()
+    bdb_changed = BarelyDB(base_path=tmp_path, index_snapshot_file='.bdb_index.json')
+    scanned = count_scans(bdb_changed)
+    bdb_changed.load_entities()
+
+    assert scanned == ['Cells']
+    assert 'CL0003' in bdb_changed
+    assert set(bdb_changed.entities) == set(bdb.entities) | {'CL0003'}
+
+
+def test_snapshot_in_scan_dir(make_tmp_db, tmp_path):
+    # with path_depth 0 the base path is the scan directory, writing the snapshot must not change its mtime
+    bdb = make_tmp_db({'.': ['WB0001_first', 'SL0001_slurry']}, path_depth=0, index_snapshot_file='.bdb_index.json')
+    assert bdb.index_snapshot_file == tmp_path.joinpath(SNAPSHOT_DIR, '.bdb_index.json')
+
+    bdb.load_entities()
+    set_old_mtime(tmp_path)
+
+    # the first snapshot holds the recent mtime, the next one is trusted on every start
+    scans = []
+    for _ in range(3):
+        bdb_warm = BarelyDB(base_path=tmp_path, index_snapshot_file='.bdb_index.json')
+        scanned = count_scans(bdb_warm)
+        bdb_warm.load_entities()
+
+        scans.append(len(scanned))
+        assert set(bdb_warm.entities) == {'WB0001', 'SL0001'}
+
+    assert scans == [1, 0, 0]
+
+
+def test_snapshot_recent_mtime_not_trusted(make_tmp_db, tmp_path):
+    bdb = make_tmp_db(LAYOUT, index_snapshot_file='.bdb_index.json')
+    bdb.load_entities()
+
+    bdb_warm = BarelyDB(base_path=tmp_path, index_snapshot_file='.bdb_index.json')
+    scanned = count_scans(bdb_warm)
+    bdb_warm.load_entities()
+
+    assert sorted(scanned) == sorted(LAYOUT)
+
+
+@pytest.mark.parametrize('content', ['{ this is not json', '{"version": 1}', '{"version": 999}'])
+def test_snapshot_corrupt(make_tmp_db, tmp_path, content):
+    bdb = make_tmp_db(LAYOUT, index_snapshot_file='.bdb_index.json')
+    tmp_path.joinpath('.bdb_index.json').write_text(content)
+
+    bdb.load_entities()
+    assert len(bdb.entities) == 5
+
+    # a valid snapshot replaces the corrupt one
+    assert EntityIndexSnapshot.load(tmp_path.joinpath('.bdb_index.json')).path_depth == 1
+
+
+def test_snapshot_stale_config(make_tmp_db, tmp_path):
+    bdb = make_tmp_db(LAYOUT, index_snapshot_file='.bdb_index.json')
+    for type_dir in LAYOUT:
+        set_old_mtime(tmp_path.joinpath(type_dir))
+    bdb.load_entities()
+
+    BarelyDBConfig(name='tmp', path_depth=1, buid_types={'web': 'WB'}).save(tmp_path)
+    bdb_stale = BarelyDB(base_path=tmp_path, index_snapshot_file='.bdb_index.json')
+    scanned = count_scans(bdb_stale)
+    bdb_stale.load_entities()
+
+    assert sorted(scanned) == sorted(LAYOUT)
+    assert sorted(bdb_stale.entities) == ['WB0001', 'WB0002']
@@ -0,0 +1,131 @@
+import pytest
+import threading
+
+from barely_db import *
+from conftest import set_old_mtime, count_scans
+
+
+LAYOUT = {
+    'Webs': ['WB0001_first', 'WB0002_second'],
+    'Slurries': ['SL0001_slurry'],
+    'Cells': ['CL0001_cell', 'CL0002_cell'],
+}
+
+
+def test_lazy_scans_on_first_access(make_tmp_db):
+    bdb = make_tmp_db(LAYOUT)
+    scanned = count_scans(bdb)
+    bdb.load_entities(lazy=True)
+
+    assert scanned == []
+
+    assert 'CL0002' in bdb
+    assert scanned == ['Cells']
+
+    assert bdb.get_entity_path('CL0001').name == 'CL0001_cell'
+    assert bdb['WB0001'].name == 'first'
+    assert scanned == ['Cells', 'Webs']
+
+    # unknown entities of a known type do not trigger further scans
+    assert 'WB0003' not in bdb
+    assert scanned == ['Cells', 'Webs']
+
+
+def test_lazy_full_access(make_tmp_db):
+    bdb_full = make_tmp_db(LAYOUT)
+    bdb_full.load_entities()
+
+    bdb = make_tmp_db(LAYOUT)
+    bdb.load_entities(lazy=True)
+    assert 'SL0001' in bdb
+
+    assert list(bdb.entity_paths.items()) == list(bdb_full.entity_paths.items())
+    assert bdb.buid_type_paths == bdb_full.buid_type_paths
+    assert bdb.entities == bdb_full.entities
+
+
+def test_lazy_with_snapshot(make_tmp_db, tmp_path):
+    layout = {'Webs': LAYOUT['Webs'], 'Slurries': LAYOUT['Slurries'], 'Batteries': LAYOUT['Cells']}
+    bdb = make_tmp_db(layout, index_snapshot_file='index.json')
+    for type_dir in layout:
+        set_old_mtime(tmp_path.joinpath(type_dir))
+    bdb.load_entities()
+
+    tmp_path.joinpath('Webs', 'WB0003_new').mkdir()
+    tmp_path.joinpath('Batteries', 'CL0003_new').mkdir()
+
+    bdb_lazy = make_tmp_db(layout, index_snapshot_file='index.json')
+    scanned = count_scans(bdb_lazy)
+    bdb_lazy.load_entities(lazy=True)
+
+    # unchanged directories are taken from the snapshot
+    assert 'SL0001' in bdb_lazy
+    assert scanned == []
+
+    # the outdated snapshot still tells where the cells are, although the folder name does not match
+    assert 'CL0003' in bdb_lazy
+    assert scanned == ['Batteries']
+
+
+def test_lazy_create_and_refresh(make_tmp_db, tmp_path):
+    bdb = make_tmp_db(LAYOUT)
+    for type_dir in LAYOUT:
+        set_old_mtime(tmp_path.joinpath(type_dir))
+    bdb.load_entities(lazy=True)
+
+    bdb.create_new_entity(name='new', buid='WB0005')
+    assert 'WB0005' in bdb
+
+    scanned = count_scans(bdb)
+    tmp_path.joinpath('Cells', 'CL0003_external').mkdir()
+    result = bdb.refresh()
+
+    assert scanned == ['Webs']
+    assert not result
+    assert 'CL0003' in bdb
+
+
+def test_lazy_create_after(make_tmp_db):
+    bdb = make_tmp_db(LAYOUT)
+    scanned = count_scans(bdb)
+    bdb.load_entities(lazy=True)
+
+    applied = []
+    apply_scan_records = bdb._apply_scan_records
+
+    def counting_apply(scan_records, *args, **kwds):
+        applied.append(list(scan_records))
+        return apply_scan_records(scan_records, *args, **kwds)
+
+    bdb._apply_scan_records = counting_apply
+
+    # only the directories of the type are scanned to find a free id, in a single pass
+    assert bdb.create_new_entity(name='third', after='WB0001').buid == 'WB0003'
+    assert scanned == ['Webs']
+    assert applied == [['Webs']]
+
+    assert bdb.get_free_buids('CL0001', count=2) == ['CL0003', 'CL0004']
+    assert scanned == ['Webs', 'Cells']
+    assert len(applied) == 2
+
+
+def test_lazy_concurrent_first_access(make_tmp_db):
+    bdb = make_tmp_db(LAYOUT)
+    scanned = count_scans(bdb)
+    bdb.load_entities(lazy=True)
+
+    barrier = threading.Barrier(8)
+    results = []
+
+    def access():
+        barrier.wait()
+        results.append('CL0001' in bdb)
+
+    threads = [threading.Thread(target=access) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [True] * 8
+    assert scanned == ['Cells']
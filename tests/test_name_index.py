@@ -0,0 +1,47 @@
+import pytest
+
+from barely_db import *
+
+
+LAYOUT = {
+    'Webs': ['WB9001_CodingTest', 'WB9002_coding_test_save_to_file', 'WB0001_anode', 'WB0002_cathode_web'],
+    'Cells': ['CL0001_coin_cell'],
+}
+
+
+def test_name_index_search():
+    index = EntityNameIndex()
+    index.update([('WB9001', 'WB9001_CodingTest'), ('WB9002', 'WB9002_coding_test_save_to_file')])
+    index.add('WB0001', 'WB0001_Cathode')
+
+    assert [buid for buid, score in index.search('coding test')] == ['WB9001', 'WB9002']
+    assert [buid for buid, score in index.search('CODING-TEST save')] == ['WB9002']
+    assert [buid for buid, score in index.search('cathdoe')] == []
+    assert [buid for buid, score in index.search('cathod')] == ['WB0001']
+    assert [buid for buid, score in index.search('cathodes')] == ['WB0001']
+    assert [buid for buid, score in index.search('ca')] == ['WB0001']
+    assert [buid for buid, score in index.search('te')] == ['WB9001', 'WB9002']
+    assert index.search('') == []
+
+    index.add('WB0001', 'WB0001_Anode')
+    assert index.search('cathod') == []
+    index.remove('WB9002')
+    assert [buid for buid, score in index.search('coding')] == ['WB9001']
+    assert [buid for buid, score in index.search('wb90')] == ['WB9001']
+
+
+def test_find_entities(make_tmp_db, tmp_path):
+    bdb = make_tmp_db(LAYOUT)
+    bdb.load_entities()
+
+    assert [e.buid for e in bdb.find_entities('coding test')] == ['WB9001', 'WB9002']
+    assert [e.buid for e in bdb.find_entities('cathode', limit=1)] == ['WB0002']
+    assert bdb.find_entities('CL0001')[0].buid == 'CL0001'
+
+    bdb.create_new_entity(name='Cathode_Coating', buid='WB0003')
+    assert [e.buid for e in bdb.find_entities('cathode coat')] == ['WB0003']
+
+    tmp_path.joinpath('Webs', 'WB0001_anode').rename(tmp_path.joinpath('Webs', 'WB0001_graphite'))
+    bdb.refresh()
+    assert bdb.find_entities('anode') == []
+    assert [e.buid for e in bdb.find_entities('graphite')] == ['WB0001']
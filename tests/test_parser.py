@@ -2,6 +2,8 @@ import pytest
 import os
 import warnings
 import shutil
+import random
+import pickle
 from pathlib import Path
 
 import barely_db
@@ -103,6 +105,86 @@ def test_parser_basic(CBUIDParser):
         _test_parser_restriction(CBUIDParser(ignore_unknown=False, mode='all', allowed_types=['EE']), ['EE0215'])
 
 
+def test_parse_with_component(CBUIDParser):
+    buid_p = CBUIDParser(ignore_unknown=False, mode='first', allow_components=False)
+
+    assert buid_p.parse_with_component('WB0252-D2') == ('WB0252', 'D2')
+    assert buid_p.parse_with_component('wb252_D2') == ('WB0252', None)
+    assert buid_p.parse_with_component('xx_SL0293_name') == ('SL0293', None)
+    assert buid_p.parse_with_component('lorem ipsum') == (None, None)
+
+
+def test_type_aware_first(CBUIDParser):
+    class GenericParser(CBUIDParser):
+        type_aware_regex = False
+
+    # unknown BUIDs (with a component) must not hide or expose known ones
+    samples = ['pow819CL885-S4', 'xy12_abc0293_wb0252-D2', 'SLX0012_sl0013', 'ee99rm12', 'lorem ipsum', 'doc0012']
+    rnd = random.Random(0)
+    samples += [''.join(rnd.choices('SLWBCLEXPdocxy_-0123456789', k=40)) for _ in range(200)]
+
+    for allow_components in [True, False]:
+        kwds = dict(ignore_unknown=True, mode='first', warn_empty=False, allow_components=allow_components)
+        for method in ['parse', 'parse_component', 'parse_with_component', 'parse_type', 'parse_type_and_uid']:
+            for sample in samples:
+                expected = getattr(GenericParser(**kwds), method)(sample)
+                assert getattr(CBUIDParser(**kwds), method)(sample) == expected
+
+    assert CBUIDParser(ignore_unknown=True, mode='first').parse('pow819CL885-S4_EE0012') == 'EE0012'
+
+
+def test_parse_many(CBUIDParser, caplog):
+    items = ['WB0001_a', Path('data/sl12-P1.csv'), 'lorem', 'WB0001_SL0002', 'xx0012_wb0003']
+
+    for kwds in [dict(mode='unique'), dict(mode='first', ignore_unknown=True), dict(mode='all_unique')]:
+        for method in ['parse', 'parse_component', 'parse_type']:
+            buid_p = CBUIDParser(warn_empty=False, **kwds)
+            expected = [getattr(buid_p, method)(item) for item in items]
+            assert getattr(buid_p, f'{method}_many')(iter(items)) == expected
+
+    caplog.clear()
+    buid_p = CBUIDParser(mode='unique')
+    assert buid_p.parse_many(items) == ['WB0001', 'SL0012-P1', None, None, None]
+    assert len(caplog.records) == 3
+    assert 'in 1 of 5 items' in caplog.records[0].getMessage()
+    assert 'in 2 of 5 items' in caplog.records[1].getMessage()
+    assert 'XX' in caplog.records[2].getMessage()
+
+
+def test_parse_cache(CBUIDParser):
+    buid_p = CBUIDParser(ignore_unknown=True, mode='all', cache_size=2)
+
+    assert buid_p.parse('WB0001_SL0002') == ['WB0001', 'SL0002']
+    buid_p.parse('WB0001_SL0002').append('XX0001')
+    assert buid_p.parse('WB0001_SL0002') == ['WB0001', 'SL0002']
+    assert buid_p.parse_type('WB0001_SL0002') == ['WB', 'SL']
+    assert buid_p.cache_info() == dict(hits=2, misses=2, evictions=0, size=2, maxsize=2)
+
+    # mode and flags are part of the key
+    buid_p.mode = 'first'
+    assert buid_p.parse('WB0001_SL0002') == 'WB0001'
+    assert buid_p.cache_info()['evictions'] == 1
+
+    # results with a warning are not cached
+    buid_p = CBUIDParser(ignore_unknown=True, mode='unique', cache_size=8)
+    assert buid_p.parse('WB0001_SL0002') is None
+    assert buid_p.parse('WB0001_SL0002') is None
+    assert buid_p.cache_info()['size'] == 0
+
+    assert CBUIDParser(ignore_unknown=True).cache_info() is None
+    assert CBUIDParser(cache_size=8).parse('XX0001') == 'XX0001'
+
+
+def test_parse_cache_database(make_tmp_db):
+    bdb = make_tmp_db({'Webs': ['WB0001_first']}, buid_cache_size=64)
+    bdb.load_entities()
+
+    assert all('wb01' in bdb for _ in range(3))
+    assert bdb['wb01'].name == bdb['WB0001'].name == 'first'
+    assert bdb.buid_normalizer.cache_info()['hits'] >= 2
+    assert pickle.loads(pickle.dumps(bdb)).buid_normalizer.cache_info()['maxsize'] == 64
+
+
 def test_format(bdb):
     buid_p = bdb.BUIDParser(ignore_unknown=True, mode='unique')
 
@@ -0,0 +1,90 @@
+import pytest
+import pickle
+import concurrent.futures
+import multiprocessing
+
+from barely_db import *
+
+
+LAYOUT = {
+    'Webs': ['WB0001_first', 'WB0002_second'],
+    'Cells': ['CL0001_cell'],
+}
+
+
+def entity_info(entity):
+    bdb = entity.bdb
+    info = (entity.buid, entity.name, bdb['CL0001'].name, [e.buid for e in bdb.find_entities('second')])
+    return info, dict(bdb.walker.stats)
+
+
+def test_pickle_database(make_tmp_db, tmp_path):
+    bdb = make_tmp_db(LAYOUT, component_cache_policy='never')
+    tmp_path.joinpath('Webs', 'WB0001_first', '-Q1_quality').mkdir()
+    bdb.load_entities(with_components=True)
+    bdb.register_error_handler(lambda *args: None)
+
+    clone = pickle.loads(pickle.dumps(bdb))
+    clone.walker.stats.clear()
+
+    assert clone.entities == bdb.entities
+    assert clone.buid_type_paths == bdb.buid_type_paths
+    assert clone['WB0001'].components == ['Q1']
+    assert clone.BUIDParser.buid_types == bdb.buid_types
+    assert clone.error_handler is None
+    assert [entity.buid for entity in clone.find_entities('first')] == ['WB0001']
+    assert clone.walker.stats == {}
+
+    # the clone is a working database of its own
+    clone.create_new_entity(name='third', after='WB0001')
+    assert 'WB0003' in clone and 'WB0003' not in bdb
+    assert pickle.loads(pickle.dumps(clone)).get_entity_name('WB0003') == 'third'
+
+
+def test_pickle_during_component_changes(make_tmp_db):
+    bdb = make_tmp_db(LAYOUT, component_cache_policy='never')
+    bdb.load_entities(with_components=True)
+
+    class ChangingComponentPathIndex(ComponentPathIndex):
+        # the watcher drops an entry (without the load lock) right after the keys were taken
+        def __iter__(self):
+            buids = list(super().__iter__())
+            self.pop('WB0001', None)
+            return iter(buids)
+
+    component_paths = ChangingComponentPathIndex(bdb._indexed_entity_path)
+    component_paths.update_names(bdb.component_paths.all_names())
+    bdb.component_paths = component_paths
+
+    clone = pickle.loads(pickle.dumps(bdb))
+    assert sorted(clone.component_paths) == ['CL0001', 'WB0001', 'WB0002']
+
+
+def test_pickle_entity(make_tmp_db):
+    bdb = make_tmp_db(LAYOUT)
+    bdb.load_entities()
+
+    entities = pickle.loads(pickle.dumps([bdb['WB0001'], bdb['WB0002'], bdb['WB0001-Q1']]))
+    assert entities[0].bdb is entities[1].bdb is entities[2].bdb
+    assert entities[0] is entities[2].parent
+    assert entities[2].buid_with_component == 'WB0001-Q1'
+    assert entities[1].name == 'second'
+
+
+def test_process_pool(make_tmp_db):
+    bdb = make_tmp_db(LAYOUT)
+    bdb.load_entities()
+
+    entities = [bdb['WB0001'], bdb['WB0002']]
+    stats = dict(bdb.walker.stats)
+
+    context = multiprocessing.get_context('fork')
+    with concurrent.futures.ProcessPoolExecutor(max_workers=2, mp_context=context) as executor:
+        results = list(executor.map(entity_info, entities))
+
+    assert [info for info, _ in results] == [
+        ('WB0001', 'first', 'cell', ['WB0002']),
+        ('WB0002', 'second', 'cell', ['WB0002']),
+    ]
+    # the workers did not touch the filesystem
+    assert [worker_stats for _, worker_stats in results] == [stats, stats]
@@ -0,0 +1,126 @@
+import pytest
+import shutil
+from pathlib import Path
+
+import barely_db
+from barely_db import *
+from conftest import set_old_mtime, count_scans
+
+
+LAYOUT = {
+    'Webs': ['WB0001_first', 'WB0002_second'],
+    'Cells': ['CL0001_cell', 'CL0002_cell'],
+}
+
+
+@pytest.fixture
+def tmp_bdb(make_tmp_db, tmp_path):
+    bdb = make_tmp_db(LAYOUT)
+    for type_dir in LAYOUT:
+        set_old_mtime(tmp_path.joinpath(type_dir))
+    bdb.load_entities()
+    return bdb
+
+
+def test_refresh_no_changes(tmp_bdb):
+    entity_paths = tmp_bdb._entity_paths
+    name_index = tmp_bdb.name_index
+    version = entity_paths.version
+    tmp_bdb['WB0001'].path
+
+    scanned = count_scans(tmp_bdb)
+    result = tmp_bdb.refresh()
+
+    assert not result
+    assert scanned == []
+
+    # the indexes and their caches are kept
+    assert tmp_bdb._entity_paths is entity_paths and entity_paths.version == version
+    assert tmp_bdb.name_index is name_index
+    assert 'WB0001' in entity_paths._resolved
+
+
+def test_refresh_external_changes(tmp_bdb, tmp_path):
+    tmp_bdb['WB0001'].create_component(component='Q1', name='quality')
+    tmp_bdb['CL0001'].components
+    assert 'CL0001' in tmp_bdb.component_paths
+
+    tmp_path.joinpath('Webs', 'WB0003_new').mkdir()
+    tmp_path.joinpath('Webs', 'WB0002_second').rmdir()
+    tmp_path.joinpath('Cells', 'CL0001_cell').rename(tmp_path.joinpath('Cells', 'CL0001_renamed_cell'))
+
+    scanned = count_scans(tmp_bdb)
+    result = tmp_bdb.refresh()
+
+    assert sorted(scanned) == ['Cells', 'Webs']
+    assert result.added == ['WB0003']
+    assert result.removed == ['WB0002']
+    assert result.moved == ['CL0001']
+    assert sorted(result.rescanned) == ['Cells', 'Webs']
+
+    assert tmp_bdb['CL0001'].name == 'renamed_cell'
+    assert 'CL0001' not in tmp_bdb.component_paths
+    assert 'WB0002' not in tmp_bdb
+    assert sorted(tmp_bdb.entities) == ['CL0001', 'CL0002', 'WB0001', 'WB0003']
+
+
+def test_refresh_removed_entity(make_tmp_db, tmp_path):
+    bdb = make_tmp_db(LAYOUT, component_cache_policy='never')
+    bdb.load_entities()
+    bdb['WB0001'].create_component(component='Q1', name='quality')
+    assert bdb['WB0001'].components == ['Q1']
+
+    shutil.rmtree(tmp_path.joinpath('Webs', 'WB0001_first'))
+    assert bdb.refresh().removed == ['WB0001']
+    assert 'WB0001' not in bdb.component_paths
+
+    tmp_path.joinpath('Webs', 'WB0001_again').mkdir()
+    bdb.refresh()
+    assert bdb['WB0001'].name == 'again'
+    assert bdb['WB0001'].components == []
+
+
+def test_create_entities_without_rescan(tmp_bdb):
+    scanned = count_scans(tmp_bdb)
+
+    for i in range(0, 50):
+        ent = tmp_bdb.create_new_entity(after='WB0001', name=f'web_{i}')
+        ent.create_component(component='Q1', name='quality')
+        assert ent.components == ['Q1']
+
+    assert scanned == []
+    assert len(tmp_bdb.entities) == 54
+
+    # the type directory that was changed is scanned once, nothing new is found
+    result = tmp_bdb.refresh()
+    assert scanned == ['Webs']
+    assert not result
+
+    bdb_fresh = BarelyDB(base_path=tmp_bdb.base_path)
+    bdb_fresh.load_entities()
+    assert sorted(bdb_fresh.entity_paths.items()) == sorted(tmp_bdb.entity_paths.items())
+    assert bdb_fresh.buid_type_paths == tmp_bdb.buid_type_paths
+
+
+def test_create_entity_new_type(make_tmp_db, tmp_path):
+    bdb = make_tmp_db({'Webs': ['WB0001_first']})
+    bdb.load_entities()
+
+    tmp_path.joinpath('Slurries').mkdir()
+    bdb.buid_type_paths['SL'] = tmp_path.joinpath('Slurries')
+
+    ent = bdb.create_new_entity(buid='SL0001', name='slurry')
+    assert ent.exists
+    assert 'Slurries' in bdb.refresh().rescanned
+    assert 'SL0001' in bdb
+
+
+def test_refresh_with_components(tmp_bdb, tmp_path):
+    tmp_bdb.load_entities(with_components=True)
+    assert tmp_bdb.component_paths['WB0001'] == {}
+
+    tmp_path.joinpath('Webs', 'WB0003_new', '-Q1').mkdir(parents=True)
+    result = tmp_bdb.refresh(with_components=True)
+
+    assert result.added == ['WB0003']
+    assert tmp_bdb.component_paths['WB0003'] == {'Q1': tmp_path.joinpath('Webs', 'WB0003_new', '-Q1')}
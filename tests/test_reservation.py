@@ -0,0 +1,88 @@
+import pytest
+import threading
+
+from barely_db import *
+
+
+LAYOUT = {
+    'Webs': ['WB0001_first', 'WB0003_third', 'WB0040_fortieth'],
+    'Cells': ['CL0001_cell'],
+}
+
+
+def test_reservation_blocks(make_tmp_db, tmp_path):
+    bdb = make_tmp_db(LAYOUT)
+    other = BarelyDB(base_path=tmp_path)
+    bdb.load_entities()
+    other.load_entities()
+
+    reservation = bdb.reserve_buids('WB0001', block_size=8)
+    other_reservation = other.reserve_buids('WB0001', block_size=8)
+
+    assert reservation.take(3) == ['WB0002', 'WB0004', 'WB0005']
+    assert other_reservation.take(2) == ['WB0008', 'WB0009']
+    assert tmp_path.joinpath('Webs', '.bdb_reserved', 'WB0000-WB0007').is_dir()
+
+    # an entity created by another worker inside a claimed block is skipped
+    other.create_new_entity(name='late', buid='WB0018')
+    assert reservation.take(6) == ['WB0006', 'WB0007', 'WB0016', 'WB0017', 'WB0019', 'WB0020']
+
+    entity = reservation.create_new_entity(name='new', components={'Q1': None})
+    assert entity.buid == 'WB0021'
+    assert entity.component_paths == {'Q1': tmp_path.joinpath('Webs', 'WB0021_new', '-Q1')}
+
+    reservation.release()
+    other_reservation.release()
+    assert list(tmp_path.joinpath('Webs', '.bdb_reserved').iterdir()) == []
+
+    # released blocks can be reserved again, only created entities stay taken
+    with bdb.reserve_buids('WB0016', block_size=8) as reservation:
+        assert reservation.take(3) == ['WB0016', 'WB0017', 'WB0019']
+        assert len(reservation.blocks) == 1
+
+    bdb.load_entities(use_snapshot=False)
+    assert bdb._duplicate_buid == []
+    assert 'WB0021' in bdb.entities
+
+
+def test_reservation_clear_and_exhausted(make_tmp_db, tmp_path):
+    bdb = make_tmp_db(LAYOUT)
+    bdb.load_entities()
+
+    reservation = bdb.reserve_buids('WB9990', block_size=8)
+    assert reservation.take(9) == [f'WB{i}' for i in range(9990, 9999)]
+    with pytest.raises(ValueError):
+        reservation.take()
+
+    bdb.clear_buid_reservations('WB')
+    assert list(tmp_path.joinpath('Webs', '.bdb_reserved').iterdir()) == []
+    bdb.clear_buid_reservations('CL')
+
+
+def test_parallel_workers(make_tmp_db, tmp_path):
+    make_tmp_db(LAYOUT).load_entities()
+
+    errors = []
+
+    def worker(i):
+        try:
+            bdb = BarelyDB(base_path=tmp_path)
+            bdb.load_entities(use_snapshot=False)
+            with bdb.reserve_buids('WB0001', block_size=4) as reservation:
+                for j in range(5):
+                    reservation.create_new_entities([dict(name=f'worker{i}_{j}_{k}') for k in range(3)])
+        except Exception as e:  # pragma: no cover
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+
+    entity_dirs = [path.name for path in tmp_path.joinpath('Webs').iterdir() if path.name.startswith('WB')]
+    buids = [name[:6] for name in entity_dirs]
+    assert len(entity_dirs) == 3 + 8 * 5 * 3
+    assert len(set(buids)) == len(buids)
@@ -0,0 +1,54 @@
+import pytest
+import os
+
+from barely_db import *
+
+
+LAYOUT = {
+    'Webs': ['WB0001_first'],
+    'Cells': ['CL0001_cell'],
+}
+
+
+@pytest.fixture
+def realpath_calls(monkeypatch):
+    calls = []
+    realpath = os.path.realpath
+
+    def counting_realpath(path, *args, **kwds):
+        calls.append(path)
+        return realpath(path, *args, **kwds)
+
+    monkeypatch.setattr(os.path, 'realpath', counting_realpath)
+    return calls
+
+
+def test_resolved_paths_cached(make_tmp_db, tmp_path, realpath_calls):
+    bdb = make_tmp_db(LAYOUT, component_cache_policy='never')
+    target = tmp_path.joinpath('Outside', 'storage', 'WB0002_linked')
+    target.joinpath('-Q1_quality').mkdir(parents=True)
+    tmp_path.joinpath('Webs', 'WB0002_linked').symlink_to(target)
+    bdb.load_entities()
+
+    assert bdb.get_entity_path('WB0002') == target
+    assert bdb['WB0002'].component_paths == {'Q1': target.joinpath('-Q1_quality')}
+
+    realpath_calls.clear()
+    for _ in range(3):
+        bdb.get_entity_path('WB0002')
+        bdb['WB0002'].name
+        bdb['WB0002']['Q1'].path
+    assert realpath_calls == []
+
+    # creation and refresh update the resolved paths
+    entity = bdb['WB0002']
+    entity.create_component(component='Q2', name=None)
+    assert entity['Q2'].path == target.joinpath('-Q2')
+
+    bdb.create_new_entity(name='new', buid='WB0003')
+    assert bdb.get_entity_path('WB0003') == tmp_path.joinpath('Webs', 'WB0003_new')
+
+    tmp_path.joinpath('Webs', 'WB0002_linked').unlink()
+    tmp_path.joinpath('Webs', 'WB0002_linked').symlink_to(tmp_path.joinpath('Cells'))
+    bdb.refresh()
+    assert bdb.get_entity_path('WB0002') == tmp_path.joinpath('Cells')
@@ -0,0 +1,99 @@
+import pytest
+import os
+import collections
+from pathlib import Path
+
+import barely_db
+from barely_db import *
+
+
+def _count_stat_calls(monkeypatch, func):
+    calls = collections.Counter()
+    os_stat = os.stat
+
+    def counting_stat(*args, **kwds):
+        calls['stat'] += 1
+        return os_stat(*args, **kwds)
+
+    monkeypatch.setattr(os, 'stat', counting_stat)
+    func()
+    monkeypatch.setattr(os, 'stat', os_stat)
+    return calls['stat']
+
+
+def test_scandir_walker_saves_stat_calls(make_tmp_db, monkeypatch):
+    layout = {
+        'Webs': [f'WB{i:04d}_web' for i in range(0, 200)],
+        'Cells': [f'CL{i:04d}_cell' for i in range(0, 100)],
+    }
+    base_path = make_tmp_db(layout).base_path
+
+    stat_calls = {}
+    for walker in [PathlibWalker(), ScandirWalker()]:
+        bdb = BarelyDB(base_path=base_path, walker=walker)
+        stat_calls[walker.__class__] = _count_stat_calls(monkeypatch, bdb.load_entities)
+        assert len(bdb.entities) == 300
+
+    # pathlib stats every entry, scandir only the type directories (for their mtime)
+    assert stat_calls[PathlibWalker] >= 302
+    assert stat_calls[ScandirWalker] == 2
+
+
+def test_walker_glob(bdb):
+    path = bdb.base_path.joinpath('Webs', 'WB3001_SL')
+
+    for pattern in ['*', '*.yaml', '-*', 'lalalalala_does_not_exist', '*/*.yaml', '**/*.png']:
+        expected = [str(p) for p in path.glob(pattern)]
+        for walker in [ScandirWalker(), PathlibWalker()]:
+            assert [e.path for e in walker.glob(str(path), pattern)] == expected
+
+    assert ScandirWalker().glob(str(path.joinpath('does_not_exist')), '*') == []
+
+
+def test_memory_walker(tmp_path):
+    BarelyDBConfig(name='memory', path_depth=1, buid_types={'web': 'WB', 'cells': 'CL'}).save(tmp_path)
+
+    tree = {
+        'Webs': {
+            'WB0001_first': {'-Q1_quality': {}, 'WB0001_data.yaml': None, 'other.yaml': None},
+            'WB0002_second': {},
+            'no_entity': {},
+        },
+        'Cells': {'CL0001_cell': {'-C1': {}, '-C2': {}}},
+        'readme.txt': None,
+    }
+    walker = MemoryWalker(tmp_path, tree)
+    bdb = BarelyDB(base_path=tmp_path, walker=walker)
+    bdb.load_entities()
+
+    assert bdb.entities == ['WB0001', 'WB0002', 'CL0001']
+    assert bdb.buid_type_paths == {'WB': tmp_path.joinpath('Webs'), 'CL': tmp_path.joinpath('Cells')}
+
+    ent = bdb['WB0001']
+    assert ent.name == 'first'
+    assert ent.components == ['Q1']
+    assert bdb['CL0001'].components == ['C1', 'C2']
+    assert ent.files('*.yaml') == [str(ent.path.joinpath(fn)) for fn in ['WB0001_data.yaml', 'other.yaml']]
+
+    # nothing was created on disk
+    new_ent = bdb.create_new_entity(after='WB0001', name='third')
+    new_ent.create_component(component='P1', name='part')
+    assert new_ent.buid == 'WB0003'
+    assert new_ent.components == ['P1']
+    assert 'WB0003_third' in tree['Webs']
+    assert not tmp_path.joinpath('Webs').exists()
+
+
+def test_memory_walker_rmdir(tmp_path):
+    walker = MemoryWalker(tmp_path, {'Webs': {'WB0001_first': {'-Q1': {}}, 'empty': {}}})
+    webs = str(tmp_path.joinpath('Webs'))
+
+    walker.rmdir(str(tmp_path.joinpath('Webs', 'empty')))
+    assert [entry.name for entry in walker.scandir(webs)] == ['WB0001_first']
+    assert walker.stats['rmdir'] == 1
+
+    with pytest.raises(OSError):
+        walker.rmdir(str(tmp_path.joinpath('Webs', 'WB0001_first')))
+    with pytest.raises(FileNotFoundError):
+        walker.rmdir(str(tmp_path.joinpath('Webs', 'missing')))
+    assert walker.exists(str(tmp_path.joinpath('Webs', 'WB0001_first', '-Q1')))
@@ -0,0 +1,69 @@
+import pytest
+import os
+import time
+import shutil
+from pathlib import Path
+
+import barely_db
+from barely_db import *
+from barely_db.watcher import inotify_available
+
+
+LAYOUT = {
+    'Webs': ['WB0001_first', 'WB0002_second'],
+    'Cells': ['CL0001_cell'],
+}
+
+
+def wait_for(condition, timeout=10.0):
+    t_end = time.time() + timeout
+    while time.time() < t_end:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return condition()
+
+
+modes = ['poll', pytest.param('inotify', marks=pytest.mark.skipif(not inotify_available(), reason='no inotify'))]
+
+
+@pytest.mark.parametrize('mode', modes)
+def test_watcher(make_tmp_db, tmp_path, mode):
+    bdb = make_tmp_db(LAYOUT)
+    bdb.load_entities()
+    assert bdb['WB0001'].components == []
+
+    watcher = bdb.start_watcher(mode=mode, interval=0.05)
+    assert bdb.watching
+    assert watcher.mode == mode
+
+    try:
+        # entities
+        tmp_path.joinpath('Webs', 'WB0003_new').mkdir()
+        assert wait_for(lambda: 'WB0003' in bdb)
+
+        shutil.rmtree(tmp_path.joinpath('Webs', 'WB0002_second'))
+        assert wait_for(lambda: 'WB0002' not in bdb)
+
+        tmp_path.joinpath('Cells', 'CL0001_cell').rename(tmp_path.joinpath('Cells', 'CL0001_renamed'))
+        assert wait_for(lambda: bdb.entity_paths['CL0001'].name == 'CL0001_renamed')
+
+        # new type directory
+        tmp_path.joinpath('Slurries', 'SL0001_slurry').mkdir(parents=True)
+        assert wait_for(lambda: 'SL0001' in bdb)
+
+        # components
+        tmp_path.joinpath('Webs', 'WB0001_first', '-Q1').mkdir()
+        assert wait_for(lambda: bdb['WB0001'].components == ['Q1'])
+
+        tmp_path.joinpath('Webs', 'WB0001_first', '-Q1').rename(tmp_path.joinpath('Webs', 'WB0001_first', '-Q2'))
+        assert wait_for(lambda: bdb['WB0001'].components == ['Q2'])
+
+        # reads do not touch the filesystem while watching
+        bdb.load_components = None
+        assert bdb['WB0001'].components == ['Q2']
+    finally:
+        bdb.stop_watcher()
+        del bdb.load_components
+
+    assert not bdb.watching